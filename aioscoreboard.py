@@ -0,0 +1,202 @@
+#!/usr/bin/python
+# -*- coding: utf8 -*-
+
+"""The scoreboard driver for asyncio applications.
+
+    board = AsyncScoreboard(device_name)
+    await board.update(Data(home_score=1)) # returns once the board shows it
+    async for statistics in board.stream_statistics(interval=5):
+        ...
+
+No threads are involved: the serial ports are served by the event loop,
+thus the module works on POSIX systems only and requires python 3.6."""
+
+import asyncio
+import unittest
+
+import reactor
+from scoreboard import Data
+from scoreboard import Scoreboard
+from scoreboard import monotonic
+
+
+class _Driver(object):
+    """Drives the scoreboard links on an event loop, as `reactor.Reactor`
+    does on its own thread."""
+
+    def __init__(self, loop, on_change):
+        self._loop = loop
+        self._on_change = on_change
+        self._pending = set() # the channels to be serviced soon
+        self._timers = {} # channel -> asyncio.TimerHandle
+        self.links = []
+
+    def add(self, port, link):
+        channel = reactor.Channel(self, port, link)
+        self.links.append(link)
+        self._wake(channel)
+        return channel
+
+    def _register(self, channel, fd):
+        self._loop.add_reader(fd, self._read, channel)
+
+    def _unregister(self, fd):
+        self._loop.remove_reader(fd)
+
+    def _close(self, channel):
+        channel._should_close = True
+        self._service(channel)
+
+    def _wake(self, channel):
+        if channel not in self._pending:
+            self._pending.add(channel)
+            self._loop.call_soon(self._service, channel)
+
+    def _read(self, channel):
+        channel._read(monotonic())
+        self._service(channel)
+
+    def _service(self, channel):
+        self._pending.discard(channel)
+        timer = self._timers.pop(channel, None)
+        if timer:
+            timer.cancel()
+        # the default event loops use the same clock
+        deadline = channel._service(monotonic())
+        if deadline is not None:
+            self._timers[channel] = self._loop.call_at(
+                deadline, self._service, channel)
+        self._on_change()
+
+
+class AsyncScoreboard(object):
+    """The same as `scoreboard.Scoreboard`, with coroutines that return once
+    all the boards show the change (or a later one).
+
+    A board that does not answer makes the coroutines wait until it is back:
+    use `asyncio.wait_for` to bound the wait. The methods must be called by
+    the event loop thread."""
+
+    def __init__(self, device_name, protocol=None, loop=None):
+        self._loop = loop or asyncio.get_event_loop()
+        self._driver = _Driver(self._loop, self._resolve_waiters)
+        self._waiters = [] # (packet, future), in submission order
+        self._scoreboard = Scoreboard(
+            device_name, protocol, reactor=self._driver)
+
+    @property
+    def device_name(self):
+        return self._scoreboard.device_name
+
+    def statistics(self):
+        """Return a snapshot of the link `Statistics`."""
+        return self._scoreboard.statistics()
+
+    async def stream_statistics(self, interval=1.):
+        """Yield a snapshot of the link `Statistics` every `interval`s."""
+        while True:
+            yield self._scoreboard.statistics()
+            await asyncio.sleep(interval)
+
+    def close(self):
+        self._scoreboard.close()
+        for _, future in self._waiters:
+            future.cancel()
+        del self._waiters[:]
+
+    async def update(self, data):
+        self._scoreboard.update(data)
+        await self._shown()
+
+    async def show_scrolling_text(self, text, delay):
+        self._scoreboard.show_scrolling_text(text, delay)
+        await self._shown()
+
+    async def hide_scrolling_text(self):
+        self._scoreboard.hide_scrolling_text()
+        await self._shown()
+
+    def _shown(self):
+        """Return a future done once the packet last submitted is shown."""
+        future = self._loop.create_future()
+        self._waiters.append((self._driver.links[0].packet, future))
+        self._resolve_waiters()
+        return future
+
+    def _resolve_waiters(self):
+        if not self._waiters:
+            return
+        # the boards show the packets up to the waiter `count - 1`
+        count = len(self._waiters)
+        for link in self._driver.links:
+            shown = link.shown_packet
+            index = len(self._waiters) - 1
+            while index >= 0 and self._waiters[index][0] is not shown:
+                index -= 1
+            count = min(count, index + 1)
+        for _, future in self._waiters[:count]:
+            if not future.done():
+                future.set_result(None)
+        del self._waiters[:count]
+
+
+class TestAsyncScoreboard(unittest.TestCase):
+
+    def setUp(self):
+        from emulator import Emulator
+        self.emulators = [Emulator(response_delay=0.002) for i in range(2)]
+        for emulator in self.emulators:
+            emulator.start()
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+        for emulator in self.emulators:
+            emulator.close()
+
+    def run_with_board(self, coroutine):
+        async def main():
+            board = AsyncScoreboard(
+                ','.join(i.device_name for i in self.emulators),
+                loop=self.loop)
+            try:
+                return await asyncio.wait_for(coroutine(board), 2)
+            finally:
+                board.close()
+        return self.loop.run_until_complete(main())
+
+    def test_update_returns_once_all_the_boards_show_the_data(self):
+        async def update(board):
+            await board.update(Data(home_score=12))
+            return [emulator.text[1:4] for emulator in self.emulators]
+        self.assertEqual(self.run_with_board(update), [' 12'] * 2)
+
+    def test_superseded_updates_return_too(self):
+        async def update(board):
+            await asyncio.gather(*[
+                board.update(Data(home_score=i)) for i in range(10)])
+            return self.emulators[0].text[1:4]
+        self.assertEqual(self.run_with_board(update), '  9')
+
+    def test_scrolling_text_is_shown_on_return(self):
+        async def show(board):
+            await board.update(Data(timestamp=(12, 34)))
+            # the bulletin starts with blanks, over the clock
+            await board.show_scrolling_text('CIAO', 10000)
+            shown = self.emulators[0].text
+            await board.hide_scrolling_text()
+            return shown, self.emulators[0].text
+        shown, hidden = self.run_with_board(show)
+        self.assertEqual(shown[4:8], '    ')
+        self.assertEqual(hidden[4:8], '1234')
+
+    def test_statistics_stream(self):
+        async def stream(board):
+            await board.update(Data(guest_score=3))
+            async for statistics in board.stream_statistics(0.01):
+                return statistics
+        self.assertEqual(self.run_with_board(stream).sent_packet_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
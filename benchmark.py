@@ -0,0 +1,1183 @@
+#!/usr/bin/python
+# -*- coding: utf8 -*-
+
+"""Performance benchmarks of the scoreboard driver.
+
+Run `python benchmark.py --help` for the list of available benchmarks;
+the ones that need a scoreboard use the emulator, no hardware required."""
+
+import argparse
+import math
+import multiprocessing
+import queue
+import resource
+import sys
+import threading
+import time
+import timeit
+
+import chrono
+import clock
+import reactor
+import scoreboard
+from emulator import Emulator
+
+
+def _run_protocol(protocol, duration, response_delay):
+    emulator = Emulator(response_delay=response_delay)
+    emulator.start()
+    board = scoreboard.Scoreboard(emulator.device_name, protocol)
+    try:
+        score = 0
+        start = time.time()
+        while time.time() - start < duration:
+            # a new frame every millisecond, way faster than the link
+            score = (score + 1) % 200
+            board.update(scoreboard.Data(home_score=score))
+            time.sleep(0.001)
+        elapsed = time.time() - start
+    finally:
+        board.close()
+        emulator.close()
+    return board.sent_packet_count / elapsed, board
+
+
+def protocol(args):
+    """Acknowledged frames per second, stop-and-wait vs. windowed."""
+    print('response delay: {:.1f}ms'.format(args.response_delay * 1000))
+    for name, protocol in [
+            ('legacy', scoreboard.LegacyProtocol()),
+            ('windowed(2)', scoreboard.WindowedProtocol(window=2)),
+            ('windowed(4)', scoreboard.WindowedProtocol(window=4)),
+            ('windowed(8)', scoreboard.WindowedProtocol(window=8))]:
+        rate, board = _run_protocol(
+            protocol, args.duration, args.response_delay)
+        print('{:<12} {:8.1f} frames/s (lost {}, bad {}, errors {})'.format(
+            name, rate, board.lost_packet_count, board.bad_packet_count,
+            board.unexpected_error_count))
+
+
+def _match_clock(count):
+    """Generate `count` changes of the data of a running match clock."""
+    for half_second in range(count):
+        second = half_second // 2
+        yield scoreboard.Data(
+            timestamp=(second // 60, second % 60),
+            dot=half_second % 2 == 0,
+            home_score=second // 30,
+            guest_score=second // 45)
+
+
+def _wait_for_ack(board, count, timeout=1.):
+    start = time.time()
+    while board.sent_packet_count == count and time.time() - start < timeout:
+        time.sleep(0.0001)
+
+
+def delta(args):
+    """Bytes on the wire and round trip time, full vs. delta frames."""
+    print('baud rate: {}, response delay: {:.1f}ms'.format(
+        args.baudrate, args.response_delay * 1000))
+    for name, protocol in [
+            ('legacy', scoreboard.LegacyProtocol()),
+            ('legacy+delta', scoreboard.LegacyProtocol(delta=True)),
+            ('windowed', scoreboard.WindowedProtocol()),
+            ('windowed+delta', scoreboard.WindowedProtocol(delta=True))]:
+        emulator = Emulator(
+            response_delay=args.response_delay, baudrate=args.baudrate)
+        emulator.start()
+        board = scoreboard.Scoreboard(emulator.device_name, protocol)
+        latencies = []
+        try:
+            for data in _match_clock(args.frames):
+                count = board.sent_packet_count
+                start = time.time()
+                board.update(data)
+                _wait_for_ack(board, count)
+                latencies.append(time.time() - start)
+        finally:
+            board.close()
+            emulator.close()
+        print('{:<15} {:5.2f} bytes/frame ({} delta of {}), '
+            'round trip {:.2f}ms avg, {:.2f}ms max'.format(
+                name,
+                float(emulator.byte_count) / emulator.frame_count,
+                emulator.delta_frame_count,
+                emulator.frame_count,
+                1000 * sum(latencies) / len(latencies),
+                1000 * max(latencies)))
+
+
+class _LegacyUpdate(object):
+    """`Scoreboard.update` as it was before the packets were built from
+    lookup tables, run against a board of today: the reference
+    `benchmark.py update --legacy` measures. Data was compared through the
+    attribute dictionaries, that `_asdict` builds as `__dict__` did; the
+    scrolling text has moved to the links since, so it's left out."""
+
+    def __init__(self, board):
+        self._board = board
+        font = scoreboard.Font()
+        self._blank = font.encode(' ')
+        self._digits = [font.encode(i) for i in '0123456789']
+        self._last_data = None
+        self._last_packet = bytearray(
+            [scoreboard.LegacyProtocol.STX] + [self._blank] * 12
+                + [scoreboard.LegacyProtocol.ETX])
+
+    def update(self, data):
+        packet_to_transmit = self._last_packet[:]
+        if not self._last_data \
+                or self._last_data._asdict() != data._asdict():
+            minute, second = data.timestamp
+            buffer = packet_to_transmit
+            buffer[ 1] = self._encode_digit(self._units(data.home_set))
+            buffer[ 2] = self._encode_digit(
+                min(1, self._hundreds(data.home_score)))
+            buffer[ 3] = self._encode_digit(self._tens(data.home_score))
+            buffer[ 4] = self._encode_digit(self._units(data.home_score))
+            tens_minute = self._tens(minute)
+            if data.leading_zero_in_minute:
+                tens_minute = max(0, tens_minute)
+            buffer[ 5] = self._encode_digit(tens_minute)
+            buffer[ 6] = self._encode_digit(self._units(minute))
+            buffer[ 7] = self._encode_digit(max(0, self._tens(second)))
+            buffer[ 8] = self._encode_digit(self._units(second))
+            buffer[ 9] = self._encode_digit(
+                min(1, self._hundreds(data.guest_score)))
+            buffer[10] = self._encode_digit(self._tens(data.guest_score))
+            buffer[11] = self._encode_digit(self._units(data.guest_score))
+            buffer[12] = self._encode_digit(self._units(data.guest_set))
+            buffer[2] = buffer[2] \
+                | (0x40 if data.home_seventh_foul else 0x00) \
+                | (0x20 if data.home_first_timeout else 0x00) \
+                | (0x10 if data.home_second_timeout else 0x00)
+            buffer[5] = buffer[5] | (0x80 if data.siren else 0x00)
+            buffer[6] = buffer[6] | (0x80 if data.dot else 0x00)
+            buffer[9] = buffer[9] \
+                | (0x40 if data.guest_first_timeout else 0x00) \
+                | (0x20 if data.guest_second_timeout else 0x00) \
+                | (0x10 if data.guest_seventh_foul else 0x00)
+        self._last_data = data
+        if packet_to_transmit != self._last_packet:
+            self._last_packet = packet_to_transmit
+            for transmitter in self._board._transmitters:
+                transmitter.submit(bytes(packet_to_transmit))
+
+    def _units(self, value):
+        return value % 10
+
+    def _tens(self, value):
+        return -1 if value < 10 else int(value / 10) % 10
+
+    def _hundreds(self, value):
+        return -1 if value < 100 else int(value / 100) % 10
+
+    def _encode_digit(self, value):
+        return self._blank if value < 0 or value > 9 else self._digits[value]
+
+
+def update(args):
+    """Cost of the Scoreboard.update calls made by the UI every 20ms; with
+    --legacy, of the update before the lookup tables."""
+    emulator = Emulator()
+    emulator.start()
+    board = scoreboard.Scoreboard(emulator.device_name)
+    update = _LegacyUpdate(board).update if args.legacy else board.update
+    try:
+        changes = list(_match_clock(args.calls))
+        # the UI builds a brand new object on every call
+        unchanged = [
+            scoreboard.Data(timestamp=(12, 34), home_score=12, guest_score=7)
+                for i in range(args.calls)]
+        for name, sequence in [
+                ('unchanged', unchanged), ('changed', changes)]:
+            update(sequence[-1])
+            calls = iter(sequence)
+            seconds = timeit.timeit(
+                lambda: update(next(calls)), number=args.calls)
+            print('{:<10} {:6.2f}us/call'.format(
+                name, 1e6 * seconds / args.calls))
+    finally:
+        board.close()
+        emulator.close()
+
+
+def font(args):
+    """Encoding of long bulletins and decoding of large packet traces."""
+    font = scoreboard.Font()
+    text = 'Benvenuti al palazzetto! Prossima partita: sabato ore 18:30. ' \
+        * (args.length // 60 + 1)
+    text = text[:args.length]
+    seconds = timeit.timeit(
+        lambda: bytearray([font._encode(i) for i in text]), number=args.repeat)
+    print('encode {} characters, per character: {:9.1f}us'.format(
+        len(text), 1e6 * seconds / args.repeat))
+    seconds = timeit.timeit(lambda: font.encode(text), number=args.repeat)
+    print('encode {} characters, translation:   {:9.1f}us'.format(
+        len(text), 1e6 * seconds / args.repeat))
+    trace = b''.join(
+        bytes(bytearray(12 * [font.encode(str(i % 10))]))
+            for i in range(args.packets))
+    seconds = timeit.timeit(lambda: font.decode(trace), number=1)
+    print('decode {} packets, translation:      {:9.1f}us'.format(
+        args.packets, 1e6 * seconds))
+
+
+class _HandWrittenEncoder(object):
+    """The SPS-HC20 encoder as it was before `scoreboard.Layout`: the
+    reference the encode plans are measured against."""
+
+    _MAX_SCORE = 199
+    _MAX_CLOCK_VALUE = 99
+
+    _INDICATOR_DISPLAYS = [2, 5, 6, 9]
+    _GROUP_DISPLAYS = [
+        (scoreboard.Data.HOME_SCORE, [1, 2, 3, 4]),
+        (scoreboard.Data.CLOCK, [5, 6, 7, 8]),
+        (scoreboard.Data.GUEST_SCORE, [9, 10, 11, 12]),
+        (scoreboard.Data.INDICATORS, _INDICATOR_DISPLAYS),
+    ]
+
+    def __init__(self):
+        self._font = scoreboard.Font()
+        self._blank = self._font.encode(' ')
+        self._digits = [self._font.encode(i) for i in '0123456789']
+        # encoding tables, see `_lookup`
+        self._scores = [
+            self._encode_score(i) for i in range(self._MAX_SCORE + 1)]
+        self._minutes = [
+            [self._encode_minute(i, leading_zero)
+                for i in range(self._MAX_CLOCK_VALUE + 1)]
+                    for leading_zero in (False, True)]
+        self._seconds = [
+            self._encode_second(i) for i in range(self._MAX_CLOCK_VALUE + 1)]
+        # the digits and the indicators share some displays
+        self._segments = bytearray([self._blank] * 14)
+        self._indicators = bytearray(14)
+        self._data = None
+
+    @property
+    def blank(self):
+        return self._blank
+
+    def encode(self, data, packet):
+        """Update the display bytes of `packet`; return the groups changed."""
+        groups = data.changes(self._data)
+        if groups & scoreboard.Data.HOME_SCORE:
+            self._encode_home_score(data)
+        if groups & scoreboard.Data.CLOCK:
+            self._encode_clock(data)
+        if groups & scoreboard.Data.GUEST_SCORE:
+            self._encode_guest_score(data)
+        if groups & scoreboard.Data.INDICATORS:
+            self._encode_indicators(data)
+        for group, displays in self._GROUP_DISPLAYS:
+            if groups & group:
+                for i in displays:
+                    packet[i] = self._segments[i] | self._indicators[i]
+        self._data = data
+        return groups
+
+    def _encode_home_score(self, data):
+        hundreds, tens, units = self._lookup(
+            self._scores, data.home_score, self._encode_score)
+        segments = self._segments
+        segments[1] = self._digits[data.home_set % 10]
+        segments[2] = hundreds
+        segments[3] = tens
+        segments[4] = units
+
+    def _encode_clock(self, data):
+        minute, second = data.timestamp
+        minute_tens, minute_units = self._lookup(
+            self._minutes[bool(data.leading_zero_in_minute)],
+            minute,
+            lambda value: self._encode_minute(
+                value, data.leading_zero_in_minute))
+        second_tens, second_units = self._lookup(
+            self._seconds, second, self._encode_second)
+        segments = self._segments
+        segments[5] = minute_tens
+        segments[6] = minute_units
+        segments[7] = second_tens
+        segments[8] = second_units
+
+    def _encode_guest_score(self, data):
+        hundreds, tens, units = self._lookup(
+            self._scores, data.guest_score, self._encode_score)
+        segments = self._segments
+        segments[ 9] = hundreds
+        segments[10] = tens
+        segments[11] = units
+        segments[12] = self._digits[data.guest_set % 10]
+
+    def _encode_indicators(self, data):
+        indicators = self._indicators
+        indicators[2] = (0x40 if data.home_seventh_foul else 0x00) \
+            | (0x20 if data.home_first_timeout else 0x00) \
+            | (0x10 if data.home_second_timeout else 0x00)
+        indicators[5] = 0x80 if data.siren else 0x00
+        indicators[6] = 0x80 if data.dot else 0x00
+        indicators[9] = (0x40 if data.guest_first_timeout else 0x00) \
+            | (0x20 if data.guest_second_timeout else 0x00) \
+            | (0x10 if data.guest_seventh_foul else 0x00)
+
+    def _lookup(self, table, value, encode):
+        """Return the encoded digits of `value`, from `table` if possible."""
+        if 0 <= value < len(table):
+            return table[value]
+        return encode(value)
+
+    def _encode_score(self, value):
+        return (
+            self._encode_digit(min(1, self._hundreds(value))),
+            self._encode_digit(self._tens(value)),
+            self._encode_digit(self._units(value)))
+
+    def _encode_minute(self, value, leading_zero):
+        tens = self._tens(value)
+        if leading_zero:
+            tens = max(0, tens)
+        return self._encode_digit(tens), self._encode_digit(self._units(value))
+
+    def _encode_second(self, value):
+        return (
+            self._encode_digit(max(0, self._tens(value))),
+            self._encode_digit(self._units(value)))
+
+    def _units(self, value):
+        return value % 10
+
+    def _tens(self, value):
+        return -1 if value < 10 else int(value / 10) % 10
+
+    def _hundreds(self, value):
+        return -1 if value < 100 else int(value / 100) % 10
+
+    def _encode_digit(self, value):
+        return self._blank if value < 0 or value > 9 else self._digits[value]
+
+
+def layout(args):
+    """Cost of the compiled encode plans against the hand-written encoder."""
+    sequence = list(_match_clock(args.calls))
+    wide = scoreboard.Layout(
+        16,
+        [
+            ('home_set', [1], 'digit'),
+            ('home_score', [2, 3, 4, 5], 'score'),
+            ('minute', [6, 7], 'minute'),
+            ('second', [8, 9], 'second'),
+            ('guest_score', [10, 11, 12, 13], 'score'),
+            ('guest_set', [14], 'digit'),
+        ],
+        scoreboard.SPS_HC20.indicators)
+    for name, encoder, length in [
+            ('hand-written', _HandWrittenEncoder(), 12),
+            ('SPS-HC20 plan', scoreboard.Encoder(), 12),
+            ('16 displays', scoreboard.Encoder(wide), 16)]:
+        packet = bytearray(length + 2)
+        calls = iter(sequence)
+        seconds = timeit.timeit(
+            lambda: encoder.encode(next(calls), packet), number=args.calls)
+        print('{:<14} {:6.2f}us/call'.format(
+            name, 1e6 * seconds / args.calls))
+
+
+class _LegacyThreadedClock(object):
+    """The clock with a thread of its own as it was before
+    `clock.Scheduler`: the reference the scheduler is measured against.
+
+    Emits a `tick` event every fraction of a second.
+
+    ThreadedClock does not guarantee that the `tick` calls are equally spaced
+    in time, although it does it best to do so. It guarantees that no `tick`
+    is lost. They may become unequally spaced or in bursts, but they will
+    arrive, soon or later.
+
+    Note: the `tick` method is called on a different thread than the one that
+    created the object. Keep in mind thread-safety when developing a
+    ThreadedClock Observer object."""
+
+    STOP = 1
+    CONTINUE = 2
+
+    def __init__(self, resolution):
+        self._thread = None
+        self._should_stop = False
+        self._observer = None
+        self._seconds_to_ticks = 10 ** (-resolution)
+        self._pause = 1. / (self._seconds_to_ticks * 2)
+
+    def register(self, observer):
+        self._observer = observer
+
+    def start_stop(self):
+        if self._thread:
+            self._should_stop = True
+            self._thread.join()
+            self._thread = None
+        else:
+            self._should_stop = False
+            self._thread = threading.Thread(target=self._run)
+            self._thread.start()
+
+    def _run(self):
+        point_in_time = int(time.time() * self._seconds_to_ticks)
+        while not self._should_stop:
+            new_point_in_time = int(time.time() * self._seconds_to_ticks)
+            if new_point_in_time - point_in_time < 1:
+                time.sleep(self._pause)
+            else:
+                if self._observer:
+                    for i in range(new_point_in_time - point_in_time):
+                        if self._observer.tick() == clock.ThreadedClock.STOP:
+                            self._should_stop = True
+                            self._thread = None
+                point_in_time = new_point_in_time
+
+
+class _TickCounter(object):
+    """Counts the ticks of a clock, as the stopwatches did before they were
+    evaluated lazily."""
+
+    def __init__(self, clock):
+        self.ticks = 0
+        self._clock = clock
+        self._clock.register(self)
+
+    def start(self):
+        self._clock.start_stop()
+
+    stop = start
+
+    def tick(self):
+        self.ticks += 1
+        return clock.ThreadedClock.CONTINUE
+
+
+def clocks(args):
+    """Wakeups and CPU time of running stopwatches: a ticking thread for
+    each stopwatch vs. a shared ticking thread vs. lazily evaluated."""
+    print('{:>11} {:>12} {:>10} {:>8}'.format(
+        'stopwatches', 'clock', 'wakeups/s', 'CPU'))
+    for count in args.stopwatches:
+        for name in ['thread each', 'scheduler', 'lazy']:
+            if name == 'thread each':
+                stopwatches = [_TickCounter(_LegacyThreadedClock(-2))
+                    for i in range(count)]
+            elif name == 'scheduler':
+                stopwatches = [_TickCounter(clock.ThreadedClock(-2))
+                    for i in range(count)]
+            else:
+                stopwatches = [clock.Stopwatch() for i in range(count)]
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            start = time.time()
+            for stopwatch in stopwatches:
+                stopwatch.start()
+            time.sleep(args.duration)
+            for stopwatch in stopwatches:
+                stopwatch.stop()
+            elapsed = time.time() - start
+            end_usage = resource.getrusage(resource.RUSAGE_SELF)
+            wakeups = end_usage.ru_nvcsw - usage.ru_nvcsw
+            cpu_time = end_usage.ru_utime + end_usage.ru_stime \
+                - usage.ru_utime - usage.ru_stime
+            print('{:>11} {:>12} {:>10.0f} {:>7.1f}%'.format(
+                count, name, wakeups / elapsed, 100 * cpu_time / elapsed))
+
+
+class _LegacyStopwatch(object):
+    """The stopwatch as it was before it was evaluated lazily, counting the
+    ticks one by one: the reference the lazy `clock.Stopwatch` is measured
+    against."""
+
+    def __init__(self):
+        self._ticks_to_seconds = 100.
+        self._is_running = True
+        self._triggers = []
+        self._observers = []
+        self._set(0)
+        self._full_scale = (99, 59, 9)
+        self._tick_increment = 1
+
+    def register_trigger(self, trigger):
+        self._triggers.append(trigger)
+
+    def register_observer(self, observer):
+        self._observers.append(observer)
+
+    def reschedule(self, trigger):
+        pass
+
+    def now(self):
+        return self._time
+
+    def is_counting_down(self):
+        return self._tick_increment < 0
+
+    def set(self, minute, second):
+        self._set((minute * 60 + second) * self._ticks_to_seconds)
+        for observer in self._observers:
+            observer.time_changed(*self._time)
+
+    def tick(self):
+        _time = self._ticks_to_time()
+        if _time == self._full_scale:
+            self._is_running = False
+            return clock.ThreadedClock.STOP
+        self._ticks += self._tick_increment
+        _time = self._ticks_to_time()
+        if _time != self._time:
+            self._time = _time
+            if any([t.should_stop(*self._time) for t in self._triggers]):
+                self._is_running = False
+                return clock.ThreadedClock.STOP
+        return clock.ThreadedClock.CONTINUE
+
+    def _set(self, ticks):
+        self._ticks = ticks
+        self._time = self._ticks_to_time()
+
+    def _ticks_to_time(self):
+        elapsed = self._ticks / self._ticks_to_seconds
+        return (int(elapsed / 60), int(elapsed) % 60, int(10 * elapsed) % 10)
+
+
+class _SteppingClock(object):
+    """A scheduler whose time moves `step` seconds ahead whenever it is
+    read, and that never serves the deadlines: a stopwatch read on it pays
+    for its own bookkeeping only."""
+
+    def __init__(self, step):
+        self._now = 0.
+        self._step = step
+
+    def add(self, item):
+        pass
+
+    def remove(self, item):
+        pass
+
+    def reschedule(self):
+        pass
+
+    def now(self):
+        self._now += self._step
+        return self._now
+
+
+def stall(args):
+    """Catching up with the clock after the process stalled: a `tick` call
+    for each missed tick vs. the lazy stopwatch, that has no ticks to catch
+    up with. The stall is simulated by a `clock.VirtualClock`, that serves
+    the deadlines met on the way as the scheduler does; the time is then
+    read once."""
+    print('{:>8} {:>10} {:>12} {:>10}'.format(
+        'stall', 'catch-up', 'time', 'triggers'))
+    for seconds in args.stalls:
+        ticks = int(seconds * 100)
+        for name in ['tick each', 'lazy']:
+            virtual_clock = clock.VirtualClock()
+            if name == 'tick each':
+                stopwatch = _LegacyStopwatch()
+                catch_up = lambda: [stopwatch.tick() for i in range(ticks)]
+            else:
+                stopwatch = clock.Stopwatch(virtual_clock)
+                catch_up = lambda: (
+                    virtual_clock.advance(seconds), stopwatch.now())
+            queue_ = queue.Queue()
+            clock.Period(stopwatch).set_duration(1, queue_)
+            clock.Trigger(stopwatch).arm(0, 50, queue_)
+            elapsed = 0
+            for i in range(args.repeat):
+                # the match starts over, the period is not over
+                if name == 'lazy':
+                    stopwatch.stop()
+                stopwatch.set(0, 0)
+                if name == 'lazy':
+                    stopwatch.start()
+                start = time.time()
+                catch_up()
+                elapsed += time.time() - start
+            print('{:>7.1f}s {:>10} {:>10.3f}ms {:>10}'.format(
+                seconds, name, 1000 * elapsed / args.repeat,
+                queue_.qsize() // args.repeat))
+
+
+def triggers(args):
+    """Cost of a tick with many armed triggers (e.g. the suspensions of the
+    players), none of them due: every trigger called at each tenth vs. the
+    lazy stopwatch read once a tick, that looks at the top of its heap of
+    deadlines only. The time of the lazy stopwatch moves a tick ahead at
+    each reading (see `_SteppingClock`), thus no scheduler is timed."""
+    print('{:>8} {:>10} {:>10}'.format('triggers', 'stopwatch', 'time'))
+    for count in args.triggers:
+        for name in ['legacy', 'heap']:
+            if name == 'legacy':
+                stopwatch = _LegacyStopwatch()
+                tick = stopwatch.tick
+            else:
+                stopwatch = clock.Stopwatch(_SteppingClock(0.01))
+                stopwatch.start()
+                tick = stopwatch.now
+            queue_ = queue.Queue()
+            for i in range(count):
+                clock.Trigger(stopwatch).arm(90, i % 60, queue_)
+            seconds = timeit.timeit(tick, number=args.ticks)
+            print('{:>8} {:>10} {:>8.2f}us'.format(
+                count, name, 1e6 * seconds / args.ticks))
+
+
+def simulate(args):
+    """Full matches simulated on virtual time: two periods counted down,
+    the time polled as the console does, with a timeout warning armed."""
+    config = chrono.TimeViewConfig(countdown=True)
+    start = time.time()
+    for i in range(args.matches):
+        virtual_clock = clock.VirtualClock()
+        timer = chrono.Timer(config, scheduler=virtual_clock)
+        timer.configure(config)
+        timer.set_period_duration(args.period)
+        for period in range(2):
+            timer.reset()
+            timer.arm_trigger(0, 50)
+            timer.start()
+            while not timer.is_expired():
+                virtual_clock.advance(args.poll)
+                timer.figures()
+            assert timer.is_triggered() and timer.now() == (0, 0, 0)
+    elapsed = time.time() - start
+    print('{} matches of 2x{} minutes in {:.2f}s: {:.1f}ms/match'.format(
+        args.matches, args.period, elapsed, 1000 * elapsed / args.matches))
+
+
+def _timer_under_test(kind, seconds):
+    """Return the start function, the reading, the tick count, the period
+    queue and the start time (in seconds) of a timer whose period expires
+    `seconds` after the start."""
+    minutes = int(math.ceil(seconds / 60.))
+    start = minutes * 60 - seconds
+    if kind == 'lazy':
+        timer = chrono.Timer()
+        timer.set_period_duration(minutes)
+        timer.set(start // 60, start % 60)
+        return (timer.start, timer.now, lambda: timer._stopwatch._ticks,
+            timer._period_queue, start)
+    stopwatch = _LegacyStopwatch()
+    if kind == 'tick thread':
+        ticking_clock = _LegacyThreadedClock(-2)
+    else:
+        ticking_clock = clock.ThreadedClock(-2)
+    ticking_clock.register(stopwatch)
+    queue_ = queue.Queue()
+    clock.Period(stopwatch).set_duration(minutes, queue_)
+    stopwatch.set(start // 60, start % 60)
+    return (ticking_clock.start_stop, stopwatch.now, lambda: stopwatch._ticks,
+        queue_, start)
+
+
+def _match_duration(text):
+    """The argparse type of a duration in seconds the stopwatch can count."""
+    seconds = int(text)
+    # the period must end before the full scale, 99:59.9
+    if not 0 < seconds <= 99 * 60:
+        raise argparse.ArgumentTypeError(
+            'between 1 and {} seconds'.format(99 * 60))
+    return seconds
+
+
+def _busy(should_stop):
+    while not should_stop.is_set():
+        sum(range(1000))
+
+
+def drift(args):
+    """The game time against the monotonic clock, under CPU load: a ticking
+    thread for each timer vs. ticks from the shared scheduler vs. the lazy
+    evaluation of `chrono.Timer`.
+
+    The time is read every `--poll` seconds, as the consolle does. Drift is
+    the error of the tick count at the end of the run, jitter the standard
+    deviation of that error; lag is how late the time shown (in tenths) is,
+    expiry the delay of the period end on the period queue."""
+    print('{:>4} {:>12} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+        'load', 'timer', 'drift', 'jitter', 'lag avg', 'lag max', 'expiry'))
+    for load in args.loads:
+        should_stop = threading.Event()
+        threads = [threading.Thread(target=_busy, args=(should_stop,))
+            for i in range(load)]
+        for thread in threads:
+            thread.start()
+        try:
+            for kind in ['tick thread', 'scheduler', 'lazy']:
+                start_timer, reading, ticks, queue_, origin = \
+                    _timer_under_test(kind, args.duration)
+                expiry_times = []
+                waiter = threading.Thread(target=lambda: expiry_times.append(
+                    (queue_.get(), scoreboard.monotonic())))
+                waiter.start()
+                errors = []
+                lags = []
+                start = scoreboard.monotonic()
+                start_timer()
+                # the last readings would be frozen at the period end
+                while scoreboard.monotonic() - start \
+                        < args.duration - 2 * args.poll:
+                    time.sleep(args.poll)
+                    minute, second, tenth = reading()
+                    elapsed = scoreboard.monotonic() - start
+                    errors.append((ticks() / 100. - origin) - elapsed)
+                    shown = minute * 60 + second + tenth / 10. - origin
+                    lags.append(elapsed - shown)
+                waiter.join()
+                mean = sum(errors) / len(errors)
+                jitter = (sum((i - mean) ** 2 for i in errors)
+                    / len(errors)) ** 0.5
+                expiry = expiry_times[0][1] - start - args.duration
+                print('{:>4} {:>12} {:>7.1f}ms {:>7.1f}ms {:>7.1f}ms '
+                    '{:>7.1f}ms {:>7.1f}ms'.format(
+                        load, kind, 1000 * errors[-1], 1000 * jitter,
+                        1000 * sum(lags) / len(lags), 1000 * max(lags),
+                        1000 * expiry))
+        finally:
+            should_stop.set()
+            for thread in threads:
+                thread.join()
+
+
+def filters(args):
+    """Cost of the filter chain when a frame is built."""
+    text = scoreboard.ScrollingText()
+    siren = scoreboard.Siren()
+    blink = scoreboard.Blink([1, 2, 3, 4])
+    chain = scoreboard.FilterChain([text, siren, blink])
+    packet = bytes(bytearray([0x02] + [0x3f] * 12 + [0x03]))
+    buffer = bytearray(packet)
+    now = scoreboard.monotonic()
+    for name in ['inactive', 'active']:
+        seconds = timeit.timeit(
+            lambda: chain.apply(packet, buffer, now), number=args.calls)
+        print('{:<10} {:6.2f}us/frame'.format(
+            name, 1e6 * seconds / args.calls))
+        text.show('Benvenuti al palazzetto!', 300)
+        siren.sound(start=now)
+        blink.start()
+    for timing in chain.timings():
+        print('{:<14} {:6.2f}us avg, {:6.2f}us max'.format(
+            timing.name, 1e6 * timing.average, 1e6 * timing.max))
+
+
+def _percentile(values, percentile):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile / 100.))]
+
+
+def _protocol(args):
+    if args.protocol == 'windowed':
+        return scoreboard.WindowedProtocol(args.window, delta=args.delta)
+    return scoreboard.LegacyProtocol(delta=args.delta)
+
+
+def _display_latencies(submitted, history):
+    """Match the displays submitted with the ones shown by the emulator."""
+    latencies = []
+    history = list(history)
+    i = 0
+    for submit_time, display in submitted:
+        while i < len(history) and history[i][0] < submit_time:
+            i += 1
+        for shown_time, shown_display in history[i:]:
+            if shown_display == display:
+                latencies.append(shown_time - submit_time)
+                break
+    return latencies
+
+
+def pipeline(args):
+    """The consolle update loop, timer included, on a faulty link.
+
+    The timer counts down the last minute of a period, with the tenths of
+    second on the clock: the worst case, the display changes 10 times a
+    second."""
+    emulator = Emulator(
+        response_delay=args.response_delay,
+        baudrate=args.baudrate,
+        jitter=args.jitter,
+        nak_rate=args.nak_rate,
+        loss_rate=args.loss_rate,
+        seed=args.seed,
+        history=100000)
+    emulator.start()
+    board = scoreboard.Scoreboard(
+        emulator.device_name,
+        _protocol(args),
+        max_frame_rate=args.max_frame_rate)
+    timer = chrono.Timer()
+    timer.configure(chrono.TimeViewConfig(countdown=True))
+    timer.set_period_duration(1)
+    timer.reset()
+    encoder = scoreboard.Encoder()
+    packet = bytearray(14)
+    submitted = [] # (time, display)
+    costs = []
+    try:
+        timer.start()
+        start = time.time()
+        while time.time() - start < args.duration:
+            # what consolle's Application._update does every 20ms
+            _, second, tenth = timer.now()
+            data = scoreboard.Data(
+                timestamp=timer.figures(),
+                dot=tenth < 5,
+                home_score=second // 7,
+                guest_score=second // 11)
+            now = scoreboard.monotonic()
+            board.update(data)
+            costs.append(scoreboard.monotonic() - now)
+            encoder.encode(data, packet)
+            if not submitted or submitted[-1][1] != packet[1:13]:
+                submitted.append((now, bytes(packet[1:13])))
+            time.sleep(0.02)
+        time.sleep(0.2) # let the last frames through
+        statistics = board.statistics()
+    finally:
+        timer.stop()
+        board.close()
+        emulator.close()
+    latencies = _display_latencies(submitted, emulator.history)
+    print('update(): {:.1f}us avg, {:.1f}us max over {} calls'.format(
+        1e6 * sum(costs) / len(costs), 1e6 * max(costs), len(costs)))
+    print('displays: {} submitted, {} shown, {} superseded'.format(
+        len(submitted), len(latencies), len(submitted) - len(latencies)))
+    if latencies:
+        print('update to display: {:.2f}ms p50, {:.2f}ms p95, '
+            '{:.2f}ms max'.format(
+                1000 * _percentile(latencies, 50),
+                1000 * _percentile(latencies, 95),
+                1000 * max(latencies)))
+    print('link: {} sent, {} bad, {} lost, {} errors, {} saved'.format(
+        statistics.sent_packet_count,
+        statistics.bad_packet_count,
+        statistics.lost_packet_count,
+        statistics.unexpected_error_count,
+        statistics.saved_frame_count))
+    round_trip = statistics.round_trip
+    if round_trip.count:
+        print('round trip: {:.2f}ms p50, {:.2f}ms p95, {:.2f}ms p99, '
+            '{:.2f}ms max'.format(
+                1000 * round_trip.p50,
+                1000 * round_trip.p95,
+                1000 * round_trip.p99,
+                1000 * round_trip.max))
+    for rate in statistics.rates:
+        print('last {}s: {:.1f} packets/s, {:.1f}% failed'.format(
+            rate.window, rate.packet_rate, rate.loss_percentage))
+
+
+def fanout(args):
+    """Cost and latency of mirroring the data to several scoreboards.
+
+    The first board is a slow one (or a dead one, with --dead), to show it
+    does not delay the others."""
+    print('{:>6} {:>10} {:>20}'.format(
+        'boards', 'update()', 'others p95 latency'))
+    for count in args.boards:
+        emulators = [
+            Emulator(
+                response_delay=args.slow_delay if i == 0 \
+                    else args.response_delay,
+                history=100000)
+                for i in range(count)]
+        for i, emulator in enumerate(emulators):
+            if i or not args.dead:
+                emulator.start()
+        board = scoreboard.Scoreboard(
+            ','.join(i.device_name for i in emulators))
+        encoder = scoreboard.Encoder()
+        packet = bytearray(14)
+        submitted = []
+        costs = []
+        try:
+            for data in _match_clock(args.updates):
+                now = scoreboard.monotonic()
+                board.update(data)
+                costs.append(scoreboard.monotonic() - now)
+                encoder.encode(data, packet)
+                submitted.append((now, bytes(packet[1:13])))
+                time.sleep(0.01)
+            time.sleep(0.2)
+        finally:
+            board.close()
+            for emulator in emulators:
+                emulator.close()
+        latencies = []
+        for emulator in emulators[1:]:
+            latencies.extend(_display_latencies(submitted, emulator.history))
+        print('{:>6} {:>8.1f}us {:>18}'.format(
+            count,
+            1e6 * sum(costs) / len(costs),
+            '{:.2f}ms'.format(1000 * _percentile(latencies, 95)) \
+                if latencies else '-'))
+
+
+def _serve_emulators(count, response_delay, connection):
+    emulators = [Emulator(response_delay=response_delay) for i in range(count)]
+    for emulator in emulators:
+        emulator.start()
+    connection.send([i.device_name for i in emulators])
+    connection.recv() # wait for the benchmark to end
+    for emulator in emulators:
+        emulator.close()
+
+
+def _thread_time(thread):
+    return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+
+
+def _drive(boards, duration):
+    """Update the boards every 20ms, as many consolle instances would."""
+    clocks = [_match_clock(100000) for board in boards]
+    start = time.time()
+    while time.time() - start < duration:
+        for board, clock in zip(boards, clocks):
+            board.update(next(clock))
+        time.sleep(0.02)
+    return time.time() - start
+
+
+def io_reactor(args):
+    """Driver CPU time with many boards, a thread per board vs. a reactor.
+
+    The emulated boards run in a separate process. The driver CPU is the
+    time of the transmitter threads or of the reactor thread; the process
+    CPU includes the callers too, that wake the reactor up through a pipe:
+    compare that one."""
+    print('{:>6} {:>9} {:>8} {:>10} {:>8} {:>8}'.format(
+        'boards', 'driver', 'threads', 'frames/s', 'driver', 'process'))
+    for count in args.boards:
+        connection, child_connection = multiprocessing.Pipe()
+        server = multiprocessing.Process(
+            target=_serve_emulators,
+            args=(count, args.response_delay, child_connection))
+        server.start()
+        device_names = connection.recv()
+        try:
+            for name in ['threads', 'reactor']:
+                driver = reactor.Reactor() if name == 'reactor' else None
+                boards = [
+                    scoreboard.Scoreboard(i, reactor=driver)
+                        for i in device_names]
+                if driver:
+                    threads = [driver._thread]
+                else:
+                    threads = [b._transmitters[0]._thread for b in boards]
+                time.sleep(0.2) # let the ports open
+                cpu_time = sum(_thread_time(i) for i in threads)
+                process_time = time.process_time()
+                sent_count = sum(i.sent_packet_count for i in boards)
+                elapsed = _drive(boards, args.duration)
+                cpu_time = sum(_thread_time(i) for i in threads) - cpu_time
+                process_time = time.process_time() - process_time
+                sent_count = sum(i.sent_packet_count for i in boards) \
+                    - sent_count
+                for board in boards:
+                    board.close()
+                if driver:
+                    driver.close()
+                print('{:>6} {:>9} {:>8} {:>10.1f} {:>7.1f}% {:>7.1f}%'.format(
+                    count, name, len(threads), sent_count / elapsed,
+                    100 * cpu_time / elapsed, 100 * process_time / elapsed))
+        finally:
+            connection.send(None)
+            server.join()
+
+
+def reconnect(args):
+    """Time the board takes to show the score again after a restart."""
+    emulator = Emulator(response_delay=args.response_delay)
+    emulator.start()
+    board = scoreboard.Scoreboard(emulator.device_name)
+    encoder = scoreboard.Encoder()
+    packet = bytearray(14)
+    recoveries = []
+    try:
+        for i in range(args.restarts):
+            data = scoreboard.Data(home_score=i)
+            encoder.encode(data, packet)
+            board.update(data)
+            time.sleep(0.2)
+            # the board stops answering, then restarts with a blank display
+            emulator.stop()
+            time.sleep(args.outage)
+            emulator.reset()
+            emulator.start()
+            start = time.time()
+            while emulator.display != packet[1:13] \
+                    and time.time() - start < 10:
+                time.sleep(0.001)
+            recoveries.append(time.time() - start)
+    finally:
+        board.close()
+        emulator.close()
+    print('outage {:.1f}s: recovery in {:.1f}ms avg, {:.1f}ms max '
+        '({} reconnections)'.format(
+            args.outage,
+            1000 * sum(recoveries) / len(recoveries),
+            1000 * max(recoveries),
+            board.reconnection_count))
+
+
+def siren(args):
+    """On-times of the siren, as shown by the board, while the clock runs.
+
+    Each pattern step is measured between the times the board shows the
+    siren bit change; the display changes 10 times a second meanwhile."""
+    emulator = Emulator(
+        response_delay=args.response_delay,
+        baudrate=57600,
+        jitter=args.jitter,
+        history=100000)
+    emulator.start()
+    board = scoreboard.Scoreboard(emulator.device_name)
+    pattern = scoreboard.Siren.DOUBLE_BLAST
+    try:
+        for i in range(args.blasts):
+            board.sound_siren(pattern)
+            start = time.time()
+            while time.time() - start < sum(pattern) + 0.2:
+                tenths = int((time.time() - start) * 10)
+                board.update(scoreboard.Data(timestamp=(59 - tenths, i)))
+                time.sleep(0.02)
+        on_times = board.siren_on_times()[0]
+    finally:
+        board.close()
+        emulator.close()
+    # the times the board has shown the siren bit change
+    edges = []
+    siren_on = False
+    for shown_time, display in emulator.history:
+        if bool(bytearray(display)[4] & 0x80) != siren_on:
+            siren_on = not siren_on
+            edges.append(shown_time)
+    errors = []
+    for i in range(0, len(edges), len(pattern) + 1):
+        blast = edges[i:i + len(pattern) + 1]
+        for step, end, duration in zip(blast, blast[1:], pattern):
+            errors.append(abs(end - step - duration))
+    print('{} steps shown: {:.2f}ms avg error, {:.2f}ms max'.format(
+        len(errors),
+        1000 * sum(errors) / len(errors),
+        1000 * max(errors)))
+    print('on-times measured by the driver: {}'.format(', '.join(
+        '{:.1f}ms'.format(1000 * i) for i in on_times)))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest='benchmark')
+    subparser = subparsers.add_parser('protocol', help=protocol.__doc__)
+    subparser.add_argument('--duration', type=float, default=2.)
+    subparser.add_argument('--response-delay', type=float, default=0.005)
+    subparser.set_defaults(function=protocol)
+    subparser = subparsers.add_parser('delta', help=delta.__doc__)
+    subparser.add_argument('--frames', type=int, default=300)
+    subparser.add_argument('--baudrate', type=int, default=57600)
+    subparser.add_argument('--response-delay', type=float, default=0.001)
+    subparser.set_defaults(function=delta)
+    subparser = subparsers.add_parser('update', help=update.__doc__)
+    subparser.add_argument('--calls', type=int, default=20000)
+    subparser.add_argument(
+        '--legacy', action='store_true',
+        help='the update before the lookup tables')
+    subparser.set_defaults(function=update)
+    subparser = subparsers.add_parser('font', help=font.__doc__)
+    subparser.add_argument('--length', type=int, default=10000)
+    subparser.add_argument('--repeat', type=int, default=100)
+    subparser.add_argument('--packets', type=int, default=1000000)
+    subparser.set_defaults(function=font)
+    subparser = subparsers.add_parser('layout', help=layout.__doc__)
+    subparser.add_argument('--calls', type=int, default=100000)
+    subparser.set_defaults(function=layout)
+    subparser = subparsers.add_parser('clocks', help=clocks.__doc__)
+    subparser.add_argument(
+        '--stopwatches', type=int, nargs='+', default=[1, 2, 8])
+    subparser.add_argument('--duration', type=float, default=3.)
+    subparser.set_defaults(function=clocks)
+    subparser = subparsers.add_parser('stall', help=stall.__doc__)
+    subparser.add_argument(
+        '--stalls', type=float, nargs='+', default=[0.1, 1., 10., 55.])
+    subparser.add_argument('--repeat', type=int, default=100)
+    subparser.set_defaults(function=stall)
+    subparser = subparsers.add_parser('triggers', help=triggers.__doc__)
+    subparser.add_argument(
+        '--triggers', type=int, nargs='+', default=[2, 20, 200])
+    subparser.add_argument('--ticks', type=int, default=10000)
+    subparser.set_defaults(function=triggers)
+    subparser = subparsers.add_parser('simulate', help=simulate.__doc__)
+    subparser.add_argument('--matches', type=int, default=100)
+    subparser.add_argument('--period', type=int, default=25)
+    subparser.add_argument(
+        '--poll', type=float, default=1., help='virtual seconds')
+    subparser.set_defaults(function=simulate)
+    subparser = subparsers.add_parser('drift', help=drift.__doc__)
+    subparser.add_argument(
+        '--duration', type=_match_duration, default=5,
+        help='seconds, 99 minutes at most')
+    subparser.add_argument(
+        '--loads', type=int, nargs='+', default=[0, 4],
+        help='busy threads')
+    subparser.add_argument('--poll', type=float, default=0.02)
+    subparser.set_defaults(function=drift)
+    subparser = subparsers.add_parser('filters', help=filters.__doc__)
+    subparser.add_argument('--calls', type=int, default=100000)
+    subparser.set_defaults(function=filters)
+    subparser = subparsers.add_parser('pipeline', help=pipeline.__doc__)
+    subparser.add_argument('--duration', type=float, default=5.)
+    subparser.add_argument(
+        '--protocol', choices=['legacy', 'windowed'], default='legacy')
+    subparser.add_argument('--window', type=int, default=4)
+    subparser.add_argument('--delta', action='store_true')
+    subparser.add_argument('--baudrate', type=int, default=57600)
+    subparser.add_argument('--response-delay', type=float, default=0.002)
+    subparser.add_argument('--jitter', type=float, default=0.002)
+    subparser.add_argument('--nak-rate', type=float, default=0.01)
+    subparser.add_argument('--loss-rate', type=float, default=0.01)
+    subparser.add_argument('--seed', type=int, default=0)
+    subparser.add_argument(
+        '--max-frame-rate', type=float, help='frames/s, no limit if omitted')
+    subparser.set_defaults(function=pipeline)
+    subparser = subparsers.add_parser('fanout', help=fanout.__doc__)
+    subparser.add_argument(
+        '--boards', type=int, nargs='+', default=[1, 2, 4, 8])
+    subparser.add_argument('--updates', type=int, default=200)
+    subparser.add_argument('--response-delay', type=float, default=0.002)
+    subparser.add_argument('--slow-delay', type=float, default=0.04)
+    subparser.add_argument('--dead', action='store_true')
+    subparser.set_defaults(function=fanout)
+    subparser = subparsers.add_parser('reactor', help=io_reactor.__doc__)
+    subparser.add_argument(
+        '--boards', type=int, nargs='+', default=[1, 8, 32])
+    subparser.add_argument('--duration', type=float, default=3.)
+    subparser.add_argument('--response-delay', type=float, default=0.002)
+    subparser.set_defaults(function=io_reactor)
+    subparser = subparsers.add_parser('reconnect', help=reconnect.__doc__)
+    subparser.add_argument('--restarts', type=int, default=5)
+    subparser.add_argument('--outage', type=float, default=1.)
+    subparser.add_argument('--response-delay', type=float, default=0.002)
+    subparser.set_defaults(function=reconnect)
+    subparser = subparsers.add_parser('siren', help=siren.__doc__)
+    subparser.add_argument('--blasts', type=int, default=5)
+    subparser.add_argument('--response-delay', type=float, default=0.002)
+    subparser.add_argument('--jitter', type=float, default=0.002)
+    subparser.set_defaults(function=siren)
+    args = parser.parse_args(argv)
+    if not args.benchmark:
+        parser.print_help()
+        return
+    args.function(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
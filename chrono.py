@@ -20,10 +20,10 @@ except:
     import queue
 
 import re
-import sys
-import threading
-import time
 
+from clock import Period
+from clock import Stopwatch
+from clock import Trigger
 from common import InputTimeDialog
 from palette import Palette
 from widget import StyledFrame
@@ -42,226 +42,6 @@ INVALID_TIME_VALUE = \
     "il numero di secondi dev'essere inferiore a 60 e i due " \
     "devono essere separati da un carattere qualunque."
 
-class ThreadedClock(object):
-    """Emits a `tick` event every fraction of a second.
-
-    ThreadedClock does not guarantee that the `tick` calls are equally spaced
-    in time, although it does it best to do so. It guarantees that no `tick`
-    is lost. They may become unequally spaced or in bursts, but they will
-    arrive, soon or later.
-
-    Note: the `tick` method is called on a different thread than the one that
-    created the object. Keep in mind thread-safety when developing a
-    ThreadedClock Observer object."""
-
-    STOP = 1
-    CONTINUE = 2
-
-    def __init__(self, resolution):
-        self._thread = None
-        self._should_stop = False
-        self._observer = None
-        self._seconds_to_ticks = 10 ** (-resolution)
-        self._pause = 1. / (self._seconds_to_ticks * 2)
-
-    def register(self, observer):
-        self._observer = observer
-
-    def start_stop(self):
-        if self._thread:
-            self._should_stop = True
-            self._thread.join()
-            self._thread = None
-        else:
-            self._should_stop = False
-            self._thread = threading.Thread(target=self._run)
-            self._thread.start()
-
-    def _run(self):
-        point_in_time = int(time.time() * self._seconds_to_ticks)
-        while not self._should_stop:
-            new_point_in_time = int(time.time() * self._seconds_to_ticks)
-            if new_point_in_time - point_in_time < 1:
-                time.sleep(self._pause)
-            else:
-                if self._observer:
-                    for i in range(new_point_in_time - point_in_time):
-                        if self._observer.tick() == self.STOP:
-                            self._should_stop = True
-                            self._thread = None
-                point_in_time = new_point_in_time
-
-
-class Stopwatch(object):
-    """Convert the ticks of a `ThreadedClock` in a time duration.
-
-    Time durations are expressed as (minute, second, tenth) tuples.
-
-    Stopwatches can be manually started and stopped. Stopwatches stop
-    automatically when one of the registered `Trigger`s becomes active
-    (i.e. the `should_stop` returns `True`)."""
-
-    def __init__(self):
-        self._resolution = -2 # set resolution to 1/100s
-        self._clock = ThreadedClock(self._resolution)
-        self._ticks_to_seconds = float(10 ** (-self._resolution))
-        self._clock.register(self)
-        self._is_running = False
-        self._triggers = []
-        self._observers = []
-        self._set(0)
-        self.count_up()
-
-    def register_trigger(self, trigger):
-        self._triggers.append(trigger)
-
-    def register_observer(self, observer):
-        self._observers.append(observer)
-
-    def now(self):
-        return self._time
-
-    def count_up(self):
-        self._full_scale = (99, 59, 9)
-        self._tick_increment = 1
-
-    def count_down(self):
-        self._full_scale = (0, 0, 0)
-        self._tick_increment = -1
-
-    def is_counting_down(self):
-        return self._tick_increment < 0
-
-    def is_running(self):
-        return self._is_running
-
-    def start_stop(self):
-        self._clock.start_stop()
-        self._is_running = not self._is_running
-
-    def start(self):
-        if not self._is_running:
-            self.start_stop()
-
-    def stop(self):
-        if self._is_running:
-            self.start_stop()
-
-    def set(self, minute, second):
-        assert not self._is_running
-        self._set((minute * 60 + second) * self._ticks_to_seconds)
-        for observer in self._observers:
-            observer.time_changed(*self._time)
-
-    def reset(self, period):
-        self.set(period if self.is_counting_down() else 0, 0)
-
-    def tick(self):
-        _time = self._ticks_to_time()
-        if _time == self._full_scale:
-            self._is_running = False
-            return ThreadedClock.STOP
-        self._ticks += self._tick_increment
-        _time = self._ticks_to_time()
-        if _time != self._time:
-            self._time = _time
-            if any([t.should_stop(*self._time) for t in self._triggers]):
-                self._is_running = False
-                return ThreadedClock.STOP
-        return ThreadedClock.CONTINUE
-
-    def _set(self, ticks):
-        self._ticks = ticks
-        self._time = self._ticks_to_time()
-
-    def _ticks_to_time(self):
-        """Convert the current tick count to (minutes, seconds, tenths of second)"""
-        elapsed = self._ticks / self._ticks_to_seconds
-        return (int(elapsed / 60), int(elapsed) % 60, int(10 * elapsed) % 10)
-
-
-class Period(object):
-    """A trigger that activates when a given period of time is elapsed.
-
-    To ensure thread-safety, the activation is signalled to the client by
-    enqueuing the current minute indication into a thread-safe queue.
-
-    The client can deduce that the trigger activated by inspecting the
-    content of the synchronized queue."""
-
-    def __init__(self, stopwatch):
-        self._stopwatch = stopwatch
-        self._stopwatch.register_trigger(self)
-        self._stopwatch.register_observer(self)
-        self._duration = None
-        self._expired_periods = []
-
-    def is_last_minute(self):
-        minute, second, tenth = self._stopwatch.now()
-        if second == 0 and tenth == 0:
-            return False
-        minute_in_period = self._elapsed_time(minute) % self._duration
-        if self._stopwatch.is_counting_down():
-            return minute_in_period == 0
-        else:
-            return minute_in_period == self._duration - 1
-
-    def duration(self):
-        return self._duration
-
-    def set_duration(self, minutes, queue):
-        self._duration = minutes
-        self._queue = queue
-
-    # Stopwatch's observer callback
-    def time_changed(self, minute, second, tenth):
-        self._expired_periods = [x for x in self._expired_periods if x < minute]
-
-    # Stopwatch's trigger callback
-    def should_stop(self, minute, second, tenth):
-        if tenth == 0 and second == 0 and self._is_expired(minute):
-            if self._queue:
-                self._queue.put(minute)
-            self._expired_periods.append(minute)
-            return True
-        return False
-
-    def _is_expired(self, minute):
-        return self._elapsed_time(minute) % self._duration == 0
-
-    def _elapsed_time(self, minute):
-        return minute - max(self._expired_periods or [0])
-
-
-class Trigger(object):
-    """A trigger that activates when a given time is reached.
-
-    To ensure thread-safety, the activation is signalled to the client by
-    enqueuing the current minute indication into a thread-safe queue.
-
-    The client can deduce that the trigger activated by inspecting the
-    content of the synchronized queue."""
-
-    def __init__(self, stopwatch):
-        self._stopwatch = stopwatch
-        self._stopwatch.register_trigger(self)
-        self._minute = None
-        self._second = None
-        self._queue = None
-
-    def arm(self, minute, second, queue):
-        self._minute, self._second = minute, second
-        self._queue = queue
-
-    # Stopwatch's trigger callback
-    def should_stop(self, minute, second, tenth):
-        if not self._queue:
-            return False
-        if minute == self._minute and second == self._second and tenth == 0:
-            self._queue.put((minute, second))
-        return False
-
-
 class TimeViewConfig(object):
 
     def __init__(
@@ -331,10 +111,11 @@ class Timer(object):
     """General timer manager.
 
     Timer has one `Stopwatch` and two triggers: one for the automatic stop
-    at the end of the period and a generic one for customization."""
+    at the end of the period and a generic one for customization; given a
+    `VirtualClock`, it runs on virtual time."""
 
-    def __init__(self, config=TimeViewConfig()):
-        self._stopwatch = Stopwatch()
+    def __init__(self, config=TimeViewConfig(), scheduler=None):
+        self._stopwatch = Stopwatch(scheduler)
         self._period = Period(self._stopwatch)
         self._period_queue = queue.Queue()
         self._trigger = Trigger(self._stopwatch)
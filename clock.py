@@ -0,0 +1,751 @@
+#!/usr/bin/python
+# -*- coding: utf8 -*-
+
+"""The time keeping of the timers, with no user interface.
+
+The stopwatches are served by a `Scheduler` thread, or by a `VirtualClock`
+whose time moves only when told to, that makes a match simulated in no
+time:
+
+    clock = VirtualClock()
+    stopwatch = Stopwatch(clock)
+    ...
+    stopwatch.start()
+    clock.advance(25 * 60) # the triggers fire on the way"""
+
+try:
+    # python 3.x
+    import queue
+except:
+    # python 2.x
+    import Queue as queue
+
+import bisect
+import heapq
+import itertools
+import threading
+import unittest
+
+try:
+    # python 3.x
+    from time import monotonic
+except:
+    # python 2.x
+    from time import time as monotonic
+
+
+class Scheduler(object):
+    """Serves the deadlines of any number of `ThreadedClock`s and
+    `Stopwatch`es on one thread.
+
+    The thread sleeps until the earliest deadline, when it calls the
+    `_expire` method of the items due; an item tells its deadline through
+    `_deadline` (None if it has none), and is dropped when `_expire` returns
+    `ThreadedClock.STOP`. The thread is started when the first item is added,
+    and ends when the last one is removed."""
+
+    def __init__(self):
+        # held while the items expire, so that an item removed by another
+        # thread doesn't expire anymore once `remove` returns
+        self._condition = threading.Condition(threading.RLock())
+        self._items = []
+        self._thread = None
+        self.wakeup_count = 0
+
+    def add(self, item):
+        with self._condition:
+            if item not in self._items:
+                self._items.append(item)
+            if not self._thread:
+                self._thread = threading.Thread(
+                    target=self._run, name='Scheduler')
+                self._thread.start()
+            self._condition.notify()
+
+    def remove(self, item):
+        with self._condition:
+            if item in self._items:
+                self._items.remove(item)
+            self._condition.notify()
+
+    def now(self):
+        """Return the time the deadlines refer to."""
+        return monotonic()
+
+    def reschedule(self):
+        """Tell the thread that a deadline has changed."""
+        with self._condition:
+            self._condition.notify()
+
+    def _run(self):
+        with self._condition:
+            while self._items:
+                now = self.now()
+                deadlines = [i._deadline() for i in self._items]
+                deadlines = [i for i in deadlines if i is not None]
+                if not deadlines:
+                    self._condition.wait()
+                    continue
+                if now < min(deadlines):
+                    self._condition.wait(min(deadlines) - now)
+                    continue
+                self.wakeup_count += 1
+                for item in list(self._items):
+                    deadline = item._deadline()
+                    if deadline is not None and deadline <= now \
+                            and item._expire(now) == ThreadedClock.STOP:
+                        self._items.remove(item)
+            self._thread = None
+
+
+_scheduler = Scheduler()
+
+
+class VirtualClock(object):
+    """Takes the place of a `Scheduler` for simulations and tests: its time
+    moves only when `advance` is called, and does it at once, the items
+    expiring on the way in deadline order, on the calling thread."""
+
+    def __init__(self, now=0.):
+        self._now = now
+        self._items = []
+        self.wakeup_count = 0
+
+    def add(self, item):
+        if item not in self._items:
+            self._items.append(item)
+
+    def remove(self, item):
+        if item in self._items:
+            self._items.remove(item)
+
+    def now(self):
+        return self._now
+
+    def reschedule(self):
+        pass
+
+    def advance(self, seconds):
+        """Move the time `seconds` ahead."""
+        end = self._now + seconds
+        while True:
+            deadlines = [i._deadline() for i in self._items]
+            deadlines = [i for i in deadlines if i is not None and i <= end]
+            if not deadlines:
+                break
+            self._now = max(self._now, min(deadlines))
+            self.wakeup_count += 1
+            for item in list(self._items):
+                deadline = item._deadline()
+                if deadline is not None and deadline <= self._now \
+                        and item._expire(self._now) == ThreadedClock.STOP:
+                    self._items.remove(item)
+        self._now = end
+
+
+class ThreadedClock(object):
+    """Emits a `tick` event every fraction of a second.
+
+    ThreadedClock does not guarantee that the `tick` calls are equally spaced
+    in time, although it does it best to do so. It guarantees that no `tick`
+    is lost. They may become unequally spaced or in bursts, but they will
+    arrive, soon or later.
+
+    The clocks share the thread of a `Scheduler`, unless they are given a
+    `VirtualClock`.
+
+    Note: the `tick` method is called on a different thread than the one that
+    created the object. Keep in mind thread-safety when developing a
+    ThreadedClock Observer object."""
+
+    STOP = 1
+    CONTINUE = 2
+
+    def __init__(self, resolution, scheduler=None):
+        self._scheduler = scheduler or _scheduler
+        self._is_running = False
+        self._observer = None
+        self._seconds_to_ticks = 10 ** (-resolution)
+        self._point_in_time = None # the last tick delivered
+
+    def register(self, observer):
+        self._observer = observer
+
+    def start_stop(self):
+        if self._is_running:
+            self._is_running = False
+            self._scheduler.remove(self)
+        else:
+            self._is_running = True
+            self._point_in_time = self._ticks_at(self._scheduler.now())
+            self._scheduler.add(self)
+
+    # Scheduler's callback
+    def _deadline(self):
+        return (self._point_in_time + 1) / float(self._seconds_to_ticks)
+
+    # Scheduler's callback
+    def _expire(self, now):
+        # the tick due is delivered, whatever the rounding of `now`
+        new_point_in_time = max(self._ticks_at(now), self._point_in_time + 1)
+        missed_ticks = new_point_in_time - self._point_in_time
+        self._point_in_time = new_point_in_time
+        if not self._observer:
+            return self.CONTINUE
+        status = self.CONTINUE
+        for i in range(missed_ticks):
+            status = self._observer.tick()
+            if status == self.STOP:
+                break
+        if status == self.STOP:
+            self._is_running = False
+        return status
+
+    def _ticks_at(self, now):
+        return int(now * self._seconds_to_ticks + 1e-9)
+
+
+class Stopwatch(object):
+    """Measures a time duration.
+
+    Time durations are expressed as (minute, second, tenth) tuples.
+
+    The time is not counted tick by tick: it is derived from the time of the
+    scheduler (the monotonic clock, unless it is a `VirtualClock`) whenever
+    it is read, and the stopwatch needs the scheduler attention only at the
+    deadlines of its triggers.
+
+    Stopwatches can be manually started and stopped. Stopwatches stop
+    automatically when one of the registered `Trigger`s becomes active
+    (i.e. the `should_stop` returns `True`), which happens when the time
+    changes to the one the trigger tells with `next_deadline`; the
+    deadlines are kept in a heap, thus only the triggers due are called."""
+
+    def __init__(self, scheduler=None):
+        self._resolution = -2 # set resolution to 1/100s
+        self._ticks_to_seconds = float(10 ** (-self._resolution))
+        self._ticks_per_tenth = int(self._ticks_to_seconds / 10)
+        self._scheduler = scheduler or _scheduler
+        # the triggers are called by the scheduler thread too
+        self._lock = threading.RLock()
+        self._is_running = False
+        # the tick count at the time the stopwatch has been started
+        self._origin_ticks = 0
+        self._origin_time = None
+        self._triggers = []
+        # (ticks in the counting direction, sequence number, trigger)
+        self._deadlines = []
+        # trigger -> sequence number of its heap entry, the others are stale
+        self._sequence_numbers = {}
+        # the tick count the first trigger (or the full scale) is due at
+        self._next_ticks = None
+        self._sequence = itertools.count()
+        self._observers = []
+        self._set(0)
+        self.count_up()
+
+    def register_trigger(self, trigger):
+        with self._lock:
+            self._triggers.append(trigger)
+        self.reschedule(trigger)
+
+    def register_observer(self, observer):
+        self._observers.append(observer)
+
+    def reschedule(self, trigger):
+        """Take the new deadline of `trigger` into account."""
+        with self._lock:
+            # the deadline is the next one from the current time
+            is_stopped = self._advance(self._scheduler.now())
+            self._schedule(trigger)
+            self._next_deadline()
+        if is_stopped:
+            self._scheduler.remove(self)
+        elif self._is_running:
+            self._scheduler.reschedule()
+
+    def now(self):
+        with self._lock:
+            is_stopped = self._advance(self._scheduler.now())
+            time_ = self._time
+        if is_stopped:
+            self._scheduler.remove(self)
+        return time_
+
+    def count_up(self):
+        self._change_direction((99, 59, 9), 1)
+
+    def count_down(self):
+        self._change_direction((0, 0, 0), -1)
+
+    def is_counting_down(self):
+        return self._tick_increment < 0
+
+    def is_running(self):
+        return self._is_running
+
+    def start_stop(self):
+        if self._is_running:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._is_running:
+                return
+            self._is_running = True
+            self._restart(self._scheduler.now())
+        self._scheduler.add(self)
+
+    def stop(self):
+        with self._lock:
+            if not self._is_running:
+                return
+            self._advance(self._scheduler.now())
+            self._is_running = False
+        self._scheduler.remove(self)
+
+    def set(self, minute, second):
+        """Change the time; a running stopwatch goes on from there."""
+        with self._lock:
+            self._set((minute * 60 + second) * self._ticks_to_seconds)
+            if self._is_running:
+                self._restart(self._scheduler.now())
+            for observer in self._observers:
+                observer.time_changed(*self._time)
+            self._schedule_all()
+        if self._is_running:
+            self._scheduler.reschedule()
+
+    def reset(self, period):
+        self.set(period if self.is_counting_down() else 0, 0)
+
+    # Scheduler's callback
+    def _deadline(self):
+        with self._lock:
+            if not self._is_running:
+                return None
+            return self._origin_time + abs(
+                self._next_ticks - self._origin_ticks) / self._ticks_to_seconds
+
+    # Scheduler's callback
+    def _expire(self, now):
+        with self._lock:
+            self._advance(now)
+            return ThreadedClock.CONTINUE if self._is_running \
+                else ThreadedClock.STOP
+
+    def _change_direction(self, full_scale, tick_increment):
+        with self._lock:
+            if self._is_running:
+                now = self._scheduler.now()
+                self._advance(now)
+                self._restart(now)
+            self._full_scale = full_scale
+            self._tick_increment = tick_increment
+            self._full_scale_ticks = self._deadline_ticks(*full_scale)
+            self._schedule_all()
+        if self._is_running:
+            self._scheduler.reschedule()
+
+    def _restart(self, now):
+        self._origin_ticks = self._ticks
+        self._origin_time = now
+
+    def _advance(self, now):
+        """Bring the time up to `now`, activating the triggers met on the
+        way; return True if the stopwatch has stopped."""
+        if not self._is_running:
+            return False
+        # the deadlines are due at their very time, rounding errors aside
+        elapsed_ticks = int(
+            (now - self._origin_time) * self._ticks_to_seconds + 1e-6)
+        ticks = self._origin_ticks + self._tick_increment * elapsed_ticks
+        if (ticks - self._next_ticks) * self._tick_increment < 0:
+            # no trigger due, as it happens most of the times
+            if ticks != self._ticks:
+                self._set(ticks)
+            return False
+        return self._advance_to(ticks)
+
+    def _advance_to(self, ticks):
+        """Bring the tick count to `ticks` in a single step, activating the
+        triggers met on the way; return True if one of them stops the
+        stopwatch, that keeps the time it stopped at."""
+        while (ticks - self._next_ticks) * self._tick_increment >= 0:
+            deadline = self._next_ticks
+            self._set(deadline)
+            triggers = []
+            while self._deadlines and \
+                    self._deadlines[0][0] == deadline * self._tick_increment:
+                _, sequence_number, trigger = heapq.heappop(self._deadlines)
+                if self._sequence_numbers.get(trigger) == sequence_number:
+                    triggers.append(trigger)
+            is_stopped = any([t.should_stop(*self._time) for t in triggers])
+            for trigger in triggers:
+                self._schedule(trigger)
+            self._next_deadline()
+            if is_stopped or self._time == self._full_scale:
+                self._is_running = False
+                return True
+        if ticks != self._ticks:
+            self._set(ticks)
+        return False
+
+    def _next_deadline(self):
+        """Find the tick count the next trigger activates at, kept in
+        `_next_ticks` until the heap changes."""
+        deadline = self._full_scale_ticks
+        while self._deadlines:
+            key, sequence_number, trigger = self._deadlines[0]
+            if self._sequence_numbers.get(trigger) == sequence_number:
+                deadline = min(key, deadline * self._tick_increment) \
+                    * self._tick_increment
+                break
+            heapq.heappop(self._deadlines) # stale
+        self._next_ticks = deadline
+
+    def _schedule(self, trigger):
+        """Push the next deadline of `trigger` into the heap."""
+        time_ = trigger.next_deadline(
+            *(self._time + (self.is_counting_down(),)))
+        if time_ is None:
+            self._sequence_numbers.pop(trigger, None)
+            return
+        sequence_number = next(self._sequence)
+        self._sequence_numbers[trigger] = sequence_number
+        heapq.heappush(self._deadlines, (
+            self._deadline_ticks(*time_) * self._tick_increment,
+            sequence_number,
+            trigger))
+
+    def _schedule_all(self):
+        """Rebuild the heap, when the time or the direction changes."""
+        self._deadlines = []
+        self._sequence_numbers = {}
+        for trigger in self._triggers:
+            self._schedule(trigger)
+        self._next_deadline()
+
+    def _deadline_ticks(self, minute, second, tenth=0):
+        """Return the tick count the time changes to the one given at."""
+        ticks = ((minute * 60 + second) * 10 + tenth) * self._ticks_per_tenth
+        if self.is_counting_down():
+            ticks += self._ticks_per_tenth - 1
+        return ticks
+
+    def _set(self, ticks):
+        self._ticks = ticks
+        self._time = self._ticks_to_time()
+
+    def _ticks_to_time(self):
+        """Convert the current tick count to (minutes, seconds, tenths of second)"""
+        elapsed = self._ticks / self._ticks_to_seconds
+        return (int(elapsed / 60), int(elapsed) % 60, int(10 * elapsed) % 10)
+
+
+class Period(object):
+    """A trigger that activates when a given period of time is elapsed.
+
+    To ensure thread-safety, the activation is signalled to the client by
+    enqueuing the current minute indication into a thread-safe queue.
+
+    The client can deduce that the trigger activated by inspecting the
+    content of the synchronized queue."""
+
+    def __init__(self, stopwatch):
+        self._stopwatch = stopwatch
+        self._duration = None
+        self._expired_periods = [] # sorted
+        self._stopwatch.register_trigger(self)
+        self._stopwatch.register_observer(self)
+
+    def is_last_minute(self):
+        minute, second, tenth = self._stopwatch.now()
+        if second == 0 and tenth == 0:
+            return False
+        minute_in_period = self._elapsed_time(minute) % self._duration
+        if self._stopwatch.is_counting_down():
+            return minute_in_period == 0
+        else:
+            return minute_in_period == self._duration - 1
+
+    def duration(self):
+        return self._duration
+
+    def set_duration(self, minutes, queue):
+        self._duration = minutes
+        self._queue = queue
+        self._stopwatch.reschedule(self)
+
+    # Stopwatch's observer callback
+    def time_changed(self, minute, second, tenth):
+        del self._expired_periods[
+            bisect.bisect_left(self._expired_periods, minute):]
+
+    # Stopwatch's trigger callback
+    def next_deadline(self, minute, second, tenth, is_counting_down):
+        """Return the (minute, second) the next period expires at."""
+        if not self._duration:
+            return None
+        last_expired = self._last_expired()
+        if is_counting_down:
+            first = minute if second or tenth else minute - 1
+            minute = first - (first - last_expired) % self._duration
+            return (minute, 0) if minute >= 0 else None
+        first = minute + 1
+        return first + (last_expired - first) % self._duration, 0
+
+    # Stopwatch's trigger callback
+    def should_stop(self, minute, second, tenth):
+        if tenth == 0 and second == 0 and self._is_expired(minute):
+            if self._queue:
+                self._queue.put(minute)
+            bisect.insort(self._expired_periods, minute)
+            return True
+        return False
+
+    def _is_expired(self, minute):
+        return self._elapsed_time(minute) % self._duration == 0
+
+    def _elapsed_time(self, minute):
+        return minute - self._last_expired()
+
+    def _last_expired(self):
+        return self._expired_periods[-1] if self._expired_periods else 0
+
+
+class Trigger(object):
+    """A trigger that activates when a given time is reached.
+
+    To ensure thread-safety, the activation is signalled to the client by
+    enqueuing the current minute indication into a thread-safe queue.
+
+    The client can deduce that the trigger activated by inspecting the
+    content of the synchronized queue."""
+
+    def __init__(self, stopwatch):
+        self._stopwatch = stopwatch
+        self._minute = None
+        self._second = None
+        self._queue = None
+        self._stopwatch.register_trigger(self)
+
+    def arm(self, minute, second, queue):
+        self._minute, self._second = minute, second
+        self._queue = queue
+        self._stopwatch.reschedule(self)
+
+    # Stopwatch's trigger callback
+    def next_deadline(self, minute, second, tenth, is_counting_down):
+        if not self._queue:
+            return None
+        armed = (self._minute, self._second, 0)
+        if is_counting_down:
+            is_ahead = armed < (minute, second, tenth)
+        else:
+            is_ahead = armed > (minute, second, tenth)
+        return (self._minute, self._second) if is_ahead else None
+
+    # Stopwatch's trigger callback
+    def should_stop(self, minute, second, tenth):
+        if not self._queue:
+            return False
+        if minute == self._minute and second == self._second and tenth == 0:
+            self._queue.put((minute, second))
+        return False
+
+
+class TestThreadedClock(unittest.TestCase):
+
+    class Observer(object):
+
+        def __init__(self):
+            self.ticks = 0
+
+        def tick(self):
+            self.ticks += 1
+            return ThreadedClock.CONTINUE
+
+    def setUp(self):
+        self.virtual_clock = VirtualClock()
+        self.clock = ThreadedClock(-2, self.virtual_clock)
+        self.observer = self.Observer()
+        self.clock.register(self.observer)
+        self.clock.start_stop()
+
+    def test_no_tick_is_lost_on_virtual_time(self):
+        for i in range(3):
+            self.virtual_clock.advance(1)
+        self.assertEqual(self.observer.ticks, 300)
+        self.clock.start_stop()
+        self.virtual_clock.advance(1)
+        self.assertEqual(self.observer.ticks, 300)
+
+    def test_deadlines_rounded_down_are_delivered(self):
+        # int(0.29 * 100) is 28
+        for i in range(100):
+            self.virtual_clock.advance(0.01)
+        self.assertTrue(99 <= self.observer.ticks <= 100)
+
+
+
+class TestStopwatch(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.stopwatch = Stopwatch(self.clock)
+
+    def test_time_is_counted_up_across_the_minutes(self):
+        self.stopwatch.start()
+        self.clock.advance(59.9)
+        self.assertEqual(self.stopwatch.now(), (0, 59, 9))
+        self.clock.advance(0.2)
+        self.assertEqual(self.stopwatch.now(), (1, 0, 1))
+        self.clock.advance(120)
+        self.assertEqual(self.stopwatch.now(), (3, 0, 1))
+        self.assertTrue(self.stopwatch.is_running())
+
+    def test_time_is_counted_down_across_the_minutes(self):
+        self.stopwatch.count_down()
+        self.stopwatch.set(2, 0)
+        self.stopwatch.start()
+        self.clock.advance(0.05)
+        self.assertEqual(self.stopwatch.now(), (1, 59, 9))
+        self.clock.advance(60)
+        self.assertEqual(self.stopwatch.now(), (0, 59, 9))
+
+    def test_full_scale_stops_the_stopwatch(self):
+        self.stopwatch.count_down()
+        self.stopwatch.set(0, 5)
+        self.stopwatch.start()
+        self.clock.advance(10)
+        self.assertFalse(self.stopwatch.is_running())
+        self.assertEqual(self.stopwatch.now(), (0, 0, 0))
+
+    def test_stopped_time_does_not_change(self):
+        self.stopwatch.start()
+        self.clock.advance(3)
+        self.stopwatch.stop()
+        self.clock.advance(3)
+        self.assertEqual(self.stopwatch.now(), (0, 3, 0))
+        self.stopwatch.start()
+        self.clock.advance(3)
+        self.assertEqual(self.stopwatch.now(), (0, 6, 0))
+
+    def test_set_while_running(self):
+        self.stopwatch.start()
+        self.clock.advance(5)
+        self.stopwatch.set(1, 0)
+        self.assertEqual(self.stopwatch.now(), (1, 0, 0))
+        self.clock.advance(2)
+        self.assertTrue(self.stopwatch.is_running())
+        self.assertEqual(self.stopwatch.now(), (1, 2, 0))
+
+
+
+class TestPeriod(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.stopwatch = Stopwatch(self.clock)
+        self.queue = queue.Queue()
+        Period(self.stopwatch).set_duration(1, self.queue)
+
+    def test_expiry_stops_the_stopwatch(self):
+        self.stopwatch.start()
+        self.clock.advance(90)
+        self.assertFalse(self.stopwatch.is_running())
+        self.assertEqual(self.stopwatch.now(), (1, 0, 0))
+        self.assertEqual(self.queue.get_nowait(), 1)
+        # the next period
+        self.stopwatch.start()
+        self.clock.advance(90)
+        self.assertEqual(self.stopwatch.now(), (2, 0, 0))
+        self.assertEqual(self.queue.get_nowait(), 2)
+        self.assertTrue(self.queue.empty())
+
+    def test_expiry_when_counting_down(self):
+        self.stopwatch.count_down()
+        self.stopwatch.set(1, 0)
+        self.stopwatch.start()
+        self.clock.advance(90)
+        self.assertFalse(self.stopwatch.is_running())
+        self.assertEqual(self.stopwatch.now(), (0, 0, 0))
+        self.assertEqual(self.queue.get_nowait(), 0)
+
+    def test_set_time_forgets_the_later_expiries(self):
+        self.stopwatch.start()
+        self.clock.advance(90)
+        self.queue.get_nowait()
+        self.stopwatch.set(0, 30)
+        self.stopwatch.start()
+        self.clock.advance(60)
+        self.assertEqual(self.stopwatch.now(), (1, 0, 0))
+        self.assertEqual(self.queue.get_nowait(), 1)
+
+
+class TestTrigger(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.stopwatch = Stopwatch(self.clock)
+        self.trigger = Trigger(self.stopwatch)
+        self.queue = queue.Queue()
+
+    def fired(self):
+        fired = []
+        while not self.queue.empty():
+            fired.append(self.queue.get_nowait())
+        return fired
+
+    def test_trigger_fires_once_and_does_not_stop(self):
+        self.trigger.arm(0, 10, self.queue)
+        self.stopwatch.start()
+        self.clock.advance(30)
+        self.assertEqual(self.fired(), [(0, 10)])
+        self.assertTrue(self.stopwatch.is_running())
+        self.clock.advance(30)
+        self.assertEqual(self.fired(), [])
+
+    def test_trigger_is_rearmed(self):
+        self.trigger.arm(0, 10, self.queue)
+        self.stopwatch.start()
+        self.clock.advance(15)
+        self.trigger.arm(0, 40, self.queue)
+        self.clock.advance(30)
+        self.assertEqual(self.fired(), [(0, 10), (0, 40)])
+
+    def test_trigger_fires_when_counting_down(self):
+        self.stopwatch.count_down()
+        self.stopwatch.set(1, 0)
+        self.trigger.arm(0, 50, self.queue)
+        self.stopwatch.start()
+        self.clock.advance(9.85)
+        self.assertEqual(self.fired(), [])
+        # 0:50.0 is shown from 0:50.09 down
+        self.clock.advance(0.06)
+        self.assertEqual(self.fired(), [(0, 50)])
+
+    def test_trigger_rescheduled_into_the_past(self):
+        self.stopwatch.start()
+        self.clock.advance(45)
+        self.trigger.arm(0, 20, self.queue)
+        self.clock.advance(30)
+        self.assertEqual(self.fired(), [])
+        # once the time is set back, it's ahead again
+        self.stopwatch.set(0, 0)
+        self.clock.advance(30)
+        self.assertEqual(self.fired(), [(0, 20)])
+
+    def test_many_triggers_fire_in_order(self):
+        for second in [30, 10, 20]:
+            Trigger(self.stopwatch).arm(0, second, self.queue)
+        self.stopwatch.start()
+        self.clock.advance(60)
+        self.assertEqual(self.fired(), [(0, 10), (0, 20), (0, 30)])
+
+
+if __name__ == '__main__':
+    unittest.main()
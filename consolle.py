@@ -27,6 +27,7 @@ from common import InputNumberDialog
 from palette import Palette
 import scoreboard
 import widget
+import wiretrace
 
 # constants
 TIMEOUT_DURATION = 1 # minutes
@@ -68,6 +69,10 @@ CONFIG_DIALOG_PERIOD_DURATION_BUTTON_LABEL = "Cambia"
 CONFIG_DIALOG_OPTIONS_HEADING = "Opzioni"
 CONFIG_DIALOG_SERIAL_PORT_HEADING = "Porta seriale"
 CONFIG_DIALOG_SERIAL_PORT_LABEL = "Nome del dispositivo:"
+CONFIG_DIALOG_DISCOVER_SERIAL_PORT_BUTTON_LABEL = "Cerca"
+CONFIG_DIALOG_SERIAL_PORT_NOT_FOUND = \
+    "Il dispositivo di comunicazione con il tabellone non è stato trovato: " \
+    "verificare che sia connesso al computer."
 CONFIG_DIALOG_LEADING_ZERO_IN_MINUTE_BUTTON_LABEL = \
     "Mostra lo zero iniziale nei minuti"
 CONFIG_DIALOG_TENTH_SECOND_ON_LAST_MINUTE_BUTTON_LABEL = \
@@ -119,6 +124,11 @@ COMM_STATS_SENT_PACKETS = "Pacchetti spediti: {:d}"
 COMM_STATS_BAD_PACKETS = "Pacchetti rifiutati: {:d}"
 COMM_STATS_LOST_PACKETS = "Pacchetti persi: {:d}"
 COMM_STATS_UNEXPECTED_ERRORS = "Errori generici: {:d}"
+COMM_STATS_RECONNECTIONS = "Riconnessioni: {:d}"
+COMM_STATS_ROUND_TRIP = "Tempo di risposta (95%): {:.1f}ms"
+COMM_STATS_PACKET_RATE = "Pacchetti al secondo: {:.1f}"
+COMM_STATS_LOSS_PERCENTAGE = "Pacchetti falliti (10s): {:.1f}%"
+COMM_STATS_SAVED_FRAMES = "Pacchetti risparmiati: {:d}"
 
 # keyboard shortcuts
 TIMER_STARTSTOP_KEY = 'r'
@@ -147,6 +157,8 @@ class AppConfig(object):
         self.enable_keyboard_shortcuts = False
         self.show_comm_stats = False # for debug purposes only, won't be saved
         self.device_name = ''
+        self.trace_file_path = '' # no trace, not shown in ConfigDialog
+        self.max_frame_rate = 0. # no limit, not shown in ConfigDialog
 
     @property
     def aggregate_time(self):
@@ -201,6 +213,9 @@ class AppConfig(object):
             self.enable_keyboard_shortcuts = config.getboolean(
                 'Consolle', 'enable_keyboard_shortcuts')
             self.device_name = config.get('Consolle', 'device_name')
+            self.trace_file_path = config.get('Consolle', 'trace_file_path')
+            self.max_frame_rate = config.getfloat(
+                'Consolle', 'max_frame_rate')
         except:
             pass
 
@@ -217,6 +232,8 @@ class AppConfig(object):
         config.set('Consolle', 'enable_keyboard_shortcuts',
             str(self.enable_keyboard_shortcuts))
         config.set('Consolle', 'device_name', self.device_name)
+        config.set('Consolle', 'trace_file_path', self.trace_file_path)
+        config.set('Consolle', 'max_frame_rate', str(self.max_frame_rate))
         config.add_section('TimeView')
         config.set('TimeView', 'period_duration', str(self.period_duration))
         config.set('TimeView', 'leading_zero_in_minute',
@@ -320,6 +337,11 @@ class ConfigDialog(widget.BaseDialog):
             row=0, column=0, stick=tk.W, padx=(5, 0), pady=5)
         ttk.Entry(serial_port, textvariable=self._serial_port).grid(
             row=0, column=1, stick=tk.W, padx=(5, 0), pady=5)
+        ttk.Button(
+            serial_port,
+            command=self._on_discover_serial_port,
+            text=CONFIG_DIALOG_DISCOVER_SERIAL_PORT_BUTTON_LABEL).grid(
+                row=0, column=2, stick=tk.E, padx=5, pady=5)
         ttk.Button(master, text=OK_BUTTON_LABEL, command=self.ok).grid(
             row=4, column=1, stick=tk.E, padx=(0, 5), pady=(10, 5))
         ttk.Button(master, text=CANCEL_BUTTON_LABEL, command=self.cancel).grid(
@@ -354,6 +376,20 @@ class ConfigDialog(widget.BaseDialog):
             self._period_duration = int(period_duration)
             self._update()
 
+    def _on_discover_serial_port(self, event=None):
+        self.config(cursor='watch')
+        self.update_idletasks()
+        try:
+            device_name = scoreboard.discover_port(
+                cache_path=os.path.expanduser('~/.sps-hc20_port'))
+        finally:
+            self.config(cursor='')
+        if device_name:
+            self._serial_port.set(device_name)
+        else:
+            tkMessageBox.showinfo(
+                CONFIG_DIALOG_TITLE, CONFIG_DIALOG_SERIAL_PORT_NOT_FOUND)
+
     def _update(self):
         self._period_duration_label['text'] = \
             CONFIG_DIALOG_PERIOD_DURATION_LABEL.format(self._period_duration)
@@ -532,6 +568,11 @@ class CommStatsWidget(widget.StyledFrame):
                     COMM_STATS_BAD_PACKETS,
                     COMM_STATS_LOST_PACKETS,
                     COMM_STATS_UNEXPECTED_ERRORS,
+                    COMM_STATS_RECONNECTIONS,
+                    COMM_STATS_ROUND_TRIP,
+                    COMM_STATS_PACKET_RATE,
+                    COMM_STATS_LOSS_PERCENTAGE,
+                    COMM_STATS_SAVED_FRAMES,
                 ]
         ]
 
@@ -540,10 +581,18 @@ class CommStatsWidget(widget.StyledFrame):
             comm_stat.grid(row=i, column=0, stick=tk.W)
 
     def update(self, scoreboard):
-        self._comm_stats[0].update(scoreboard.sent_packet_count)
-        self._comm_stats[1].update(scoreboard.bad_packet_count)
-        self._comm_stats[2].update(scoreboard.lost_packet_count)
-        self._comm_stats[3].update(scoreboard.unexpected_error_count)
+        statistics = scoreboard.statistics()
+        # the shortest window shows the link degrading sooner
+        rate = statistics.rates[0]
+        self._comm_stats[0].update(statistics.sent_packet_count)
+        self._comm_stats[1].update(statistics.bad_packet_count)
+        self._comm_stats[2].update(statistics.lost_packet_count)
+        self._comm_stats[3].update(statistics.unexpected_error_count)
+        self._comm_stats[4].update(statistics.reconnection_count)
+        self._comm_stats[5].update(1000 * (statistics.round_trip.p95 or 0))
+        self._comm_stats[6].update(rate.packet_rate)
+        self._comm_stats[7].update(rate.loss_percentage)
+        self._comm_stats[8].update(statistics.saved_frame_count)
 
 
 class Application(widget.StyledWidget):
@@ -824,11 +873,22 @@ class Application(widget.StyledWidget):
         else:
             if not self._scoreboard \
                 or self._scoreboard.device_name != device_name:
+                if self._scoreboard:
+                    self._scoreboard.close()
                 try:
-                    self._scoreboard = scoreboard.Scoreboard(device_name)
+                    recorder = None
+                    if self._config.trace_file_path:
+                        recorder = wiretrace.Recorder(
+                            self._config.trace_file_path)
+                    self._scoreboard = scoreboard.Scoreboard(
+                        device_name,
+                        recorder=recorder,
+                        max_frame_rate=self._config.max_frame_rate)
                 except:
                     self._scoreboard = None
                     _, error, _ = sys.exc_info()
+                    if recorder:
+                        recorder.close()
                     tkMessageBox.showerror(
                         APP_NAME,
                         SCOREBOARD_CONNECTION_ERROR.format(device_name, error))
@@ -842,6 +902,8 @@ class Application(widget.StyledWidget):
     def _terminate(self):
         self._timer.stop()
         self._timeout_timer.stop()
+        if self._scoreboard:
+            self._scoreboard.close()
         self._root.destroy()
 
     def _period_expired(self):
@@ -869,14 +931,15 @@ class Application(widget.StyledWidget):
 
     def _timeout_about_to_expire(self):
         if self._config.timeout_expired_blast:
-            self._activate_siren()
+            self._activate_siren(scoreboard.Siren.DOUBLE_BLAST)
 
     def _timeout_expired(self):
         self._exit_timeout_mode()
 
-    def _activate_siren(self):
-        self._root.after(0, self._on_siren_on)
-        self._root.after(1000, self._on_siren_off)
+    def _activate_siren(self, pattern=scoreboard.Siren.LONG_BLAST):
+        # timed by the transmitter threads, whatever the UI is doing
+        if self._scoreboard:
+            self._scoreboard.sound_siren(pattern)
 
     # TimerWidget's callback
     def timer_started(self):
@@ -0,0 +1,287 @@
+#!/usr/bin/python
+# -*- coding: utf8 -*-
+
+"""A stand-in for the Arduino-based scoreboard interface.
+
+Run `python emulator.py` to get a virtual scoreboard: the program prints
+the name of the device to be configured in consolle or report; see
+`python emulator.py --help` for the options."""
+
+import argparse
+import collections
+import os
+import random
+import select
+import sys
+import threading
+import time
+import tty
+
+from scoreboard import Font
+from scoreboard import LegacyProtocol
+from scoreboard import WindowedProtocol
+from scoreboard import monotonic
+
+
+class Emulator(object):
+    """Emulates the scoreboard interface firmware over a pseudo-terminal.
+
+    The scoreboard driver opens the slave end of the pseudo-terminal (see
+    `device_name`) as if it were the serial port the Arduino board is
+    connected to, while the emulator serves the master end. Both the legacy
+    (stop-and-wait) and the windowed protocol are understood, along with
+    their delta frames: the start byte of each frame tells them apart.
+
+    The responses are sent `response_delay` seconds (plus a random amount up
+    to `jitter` seconds) after the frame has been received, independently of
+    each other, as it happens with the USB latency of the real interface.
+    If `baudrate` is given, the time the bytes take on the serial line is
+    accounted for too.
+
+    The link faults are emulated as well: a frame can be lost (no response
+    at all) with probability `loss_rate` and can be damaged (NAK) with
+    probability `nak_rate`; `seed` makes the faults reproducible. After
+    `reset` the frames are ignored for `boot_time` seconds, the time the
+    real board takes to boot.
+
+    The last `history` displays shown are kept in `history`, along with the
+    time they were shown at."""
+
+    def __init__(
+            self,
+            response_delay=0.,
+            baudrate=None,
+            jitter=0.,
+            nak_rate=0.,
+            loss_rate=0.,
+            seed=None,
+            history=0,
+            boot_time=0.):
+        self._response_delay = response_delay
+        self._boot_time = boot_time
+        self._ready_time = 0
+        self._jitter = jitter
+        self._nak_rate = nak_rate
+        self._loss_rate = loss_rate
+        self._random = random.Random(seed)
+        self._byte_time = 10. / baudrate if baudrate else 0. # 8N1
+        self._font = Font()
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self._device_name = os.ttyname(self._slave)
+        self._buffer = bytearray()
+        self._responses = collections.deque() # (deadline, bytes)
+        self._line_free_time = 0
+        self._thread = None
+        self._should_stop = False
+        self._is_synchronized = False
+        self._sequence = None
+        self.display = bytearray(LegacyProtocol.DATA_LENGTH)
+        self.history = collections.deque(maxlen=history) # (time, display)
+        self.byte_count = 0
+        self.frame_count = 0
+        self.delta_frame_count = 0
+        self.bad_frame_count = 0
+        self.lost_frame_count = 0
+
+    @property
+    def device_name(self):
+        return self._device_name
+
+    @property
+    def text(self):
+        """The text shown by the displays."""
+        return self._font.decode(self.display)
+
+    @property
+    def siren(self):
+        return bool(self.display[4] & 0x80)
+
+    @property
+    def dot(self):
+        return bool(self.display[5] & 0x80)
+
+    def start(self):
+        self._should_stop = False
+        self._thread = threading.Thread(target=self._run, name='Emulator')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._should_stop = True
+        self._thread.join()
+        self._thread = None
+
+    def reset(self):
+        """Emulate the board restart: the display state is lost."""
+        self._is_synchronized = False
+        self._sequence = None
+        self.display[:] = bytearray(len(self.display))
+        self._ready_time = monotonic() + self._boot_time
+
+    def close(self):
+        if self._thread:
+            self.stop()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _run(self):
+        while not self._should_stop:
+            timeout = 0.01
+            if self._responses:
+                timeout = max(0, min(
+                    timeout, self._responses[0][0] - monotonic()))
+            readable, _, _ = select.select([self._master], [], [], timeout)
+            if readable:
+                data = os.read(self._master, 1024)
+                if monotonic() >= self._ready_time: # not booting
+                    self._buffer.extend(data)
+                    self._parse()
+            now = monotonic()
+            while self._responses and self._responses[0][0] <= now:
+                os.write(self._master, self._responses.popleft()[1])
+
+    def _parse(self):
+        while self._buffer:
+            length = self._frame_length()
+            if length is None:
+                # out of sync: wait for the start of the next frame
+                del self._buffer[0]
+                continue
+            if not length or len(self._buffer) < length:
+                break
+            frame = self._buffer[:length]
+            del self._buffer[:length]
+            self.byte_count += length
+            # the frames queue up on the serial line at the given baud rate
+            arrival_time = max(monotonic(), self._line_free_time) \
+                + length * self._byte_time
+            self._line_free_time = arrival_time
+            if self._random.random() < self._loss_rate:
+                self.lost_frame_count += 1
+                continue
+            is_damaged = self._random.random() < self._nak_rate
+            response = self._process(frame, is_damaged)
+            if response[0] == LegacyProtocol.ACK and self.history.maxlen:
+                self.history.append((arrival_time, bytes(self.display)))
+            self._respond(arrival_time, response)
+
+    def _frame_length(self):
+        """Return the length of the frame at the head of the buffer.
+
+        For the delta frames, the length is known as soon as the position
+        bitmap has been received; 0 is returned until then."""
+        start = self._buffer[0]
+        if start == LegacyProtocol.STX:
+            return LegacyProtocol.FRAME_LENGTH
+        if start == WindowedProtocol.SOH:
+            return WindowedProtocol.FRAME_LENGTH
+        if start == LegacyProtocol.SO:
+            header_length = 1
+        elif start == WindowedProtocol.SI:
+            header_length = 2
+        else:
+            return None
+        if len(self._buffer) < header_length + 2:
+            return 0
+        mask = self._buffer[header_length] \
+            | (self._buffer[header_length + 1] << 8)
+        return header_length + 2 + bin(mask).count('1') + 1
+
+    def _process(self, frame, is_damaged):
+        start = frame[0]
+        is_sequenced = start in (WindowedProtocol.SOH, WindowedProtocol.SI)
+        if is_damaged:
+            is_valid = False
+        elif start in (LegacyProtocol.SO, WindowedProtocol.SI):
+            is_valid = self._apply_delta(frame, is_sequenced)
+        else:
+            is_valid = frame[-1] == LegacyProtocol.ETX
+            if is_valid:
+                self.display[:] = frame[-13:-1]
+        if is_valid:
+            self.frame_count += 1
+            self._is_synchronized = True
+            if is_sequenced:
+                self._sequence = frame[1]
+            code = LegacyProtocol.ACK
+        else:
+            self.bad_frame_count += 1
+            if not is_sequenced:
+                self._is_synchronized = False
+            code = LegacyProtocol.NAK
+        if is_sequenced:
+            return bytearray([code, frame[1]])
+        return bytearray([code])
+
+    def _apply_delta(self, frame, is_sequenced):
+        if is_sequenced:
+            if self._sequence is None \
+                    or frame[1] != (self._sequence + 1) % 256:
+                return False
+            frame = frame[1:]
+        elif not self._is_synchronized:
+            return False
+        mask = frame[1] | (frame[2] << 8)
+        if frame[-1] != LegacyProtocol.ETX \
+                or mask >> LegacyProtocol.DATA_LENGTH:
+            return False
+        changes = iter(frame[3:-1])
+        for i in range(LegacyProtocol.DATA_LENGTH):
+            if mask & (1 << i):
+                self.display[i] = next(changes)
+        self.delta_frame_count += 1
+        return True
+
+    def _respond(self, arrival_time, response):
+        deadline = arrival_time + self._response_delay \
+            + self._random.uniform(0, self._jitter) \
+            + len(response) * self._byte_time
+        # the responses can't overtake each other
+        if self._responses:
+            deadline = max(deadline, self._responses[-1][0])
+        self._responses.append((deadline, bytes(response)))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--response-delay', type=float, default=0.)
+    parser.add_argument('--jitter', type=float, default=0.)
+    parser.add_argument('--baudrate', type=int)
+    parser.add_argument('--nak-rate', type=float, default=0.)
+    parser.add_argument('--loss-rate', type=float, default=0.)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument(
+        '--verbose', action='store_true', help='show the display changes')
+    args = parser.parse_args(argv)
+    emulator = Emulator(
+        response_delay=args.response_delay,
+        baudrate=args.baudrate,
+        jitter=args.jitter,
+        nak_rate=args.nak_rate,
+        loss_rate=args.loss_rate,
+        seed=args.seed)
+    emulator.start()
+    print('Scoreboard emulator listening on {}'.format(emulator.device_name))
+    display = None
+    try:
+        while True:
+            time.sleep(0.05)
+            if args.verbose and emulator.display != display:
+                display = bytearray(emulator.display)
+                print('[{}] {}{}'.format(
+                    emulator.text,
+                    'siren ' if emulator.siren else '',
+                    'dot' if emulator.dot else ''))
+    except KeyboardInterrupt:
+        emulator.close()
+    print('{} frames ({} delta), {} bad, {} lost'.format(
+        emulator.frame_count,
+        emulator.delta_frame_count,
+        emulator.bad_frame_count,
+        emulator.lost_frame_count))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
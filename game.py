@@ -1,11 +1,20 @@
 #!/usr/bin/python
 # -*- coding: utf8 -*-
 
+try:
+    # python 3.x
+    import queue
+except:
+    # python 2.x
+    import Queue as queue
+
 import collections
 import copy
 import re
 import unittest
 
+import clock
+
 # The term `game` refers to the structure of the sporting event, while `match`
 # is the actual challenge (in other words, `match` is an instance of `game`).
 
@@ -837,24 +846,10 @@ class TestCountingObserver(object):
         return True
 
 
-class TestStopwatch(object):
-
-    def __init__(self):
-        self._minute = 0
-        self._second = 0
-
-    def now(self):
-        return (self._minute, self._second, 0)
-
-    def set(self, minute, second):
-        self._minute = minute
-        self._second = second
-
-
 class TestGame(unittest.TestCase):
 
     def setUp(self):
-        self.stopwatch = TestStopwatch()
+        self.stopwatch = clock.Stopwatch(clock.VirtualClock())
         self.match = Game(ChampionshipGameCourse(25), self.stopwatch)
 
     def test_initial_score_is_null(self):
@@ -1385,10 +1380,57 @@ class TestGame(unittest.TestCase):
         self.assertEqual(match.current_phase().id, GamePhase.AFTER_MATCH)
 
 
+class TestSimulatedMatch(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = clock.VirtualClock()
+        self.stopwatch = clock.Stopwatch(self.clock)
+        self.period_queue = queue.Queue()
+        clock.Period(self.stopwatch).set_duration(25, self.period_queue)
+        self.trigger = clock.Trigger(self.stopwatch)
+        self.trigger_queue = queue.Queue()
+        self.match = Game(ChampionshipGameCourse(25), self.stopwatch)
+
+    def play_period(self, events):
+        self.stopwatch.set(0, 0)
+        self.match.phase_expired() # entering the period
+        self.stopwatch.start()
+        for seconds, event, argument in events:
+            self.clock.advance(seconds)
+            event(argument)
+        self.clock.advance(60 * 60) # well beyond the end of the period
+        self.assertFalse(self.stopwatch.is_running())
+        self.assertEqual(self.stopwatch.now(), (25, 0, 0))
+        self.assertEqual(self.period_queue.get_nowait(), 25)
+        self.match.phase_expired() # entering the interval, or after match
+
+    def arm_suspension_expiry(self, code):
+        expiry = [s.expiration for s in self.match.suspensions
+            if s.player.code() == code][-1]
+        self.trigger.arm(expiry.minute, expiry.second, self.trigger_queue)
+
+    def test_match_is_simulated_on_virtual_time(self):
+        self.play_period([
+            (7 * 60 + 12, self.match.player_scored, 'A1'),
+            (60, self.match.player_suspended, 'B3'),
+            (0, self.arm_suspension_expiry, 'B3'),
+            (5 * 60, self.match.timeout, 'B')])
+        self.assertEqual(self.trigger_queue.get_nowait(), (10, 12))
+        self.play_period([
+            (30, self.match.player_scored, 'B3'),
+            (24 * 60, self.match.player_scored, 'B4')])
+        self.assertTrue(self.match.is_ended())
+        self.assertEqual(self.match.score(), (1, 2))
+        self.assertEqual(
+            [(e.timestamp.minute, e.timestamp.second) for e in self.match],
+            [(0, 0), (7, 12), (8, 12), (13, 12), (25, 0),
+                (0, 0), (0, 30), (24, 30), (25, 0)])
+
+
 class TestSuspensions(unittest.TestCase):
 
     def setUp(self):
-        self.stopwatch = TestStopwatch()
+        self.stopwatch = clock.Stopwatch(clock.VirtualClock())
         self.match = Game(ChampionshipGameCourse(25), self.stopwatch)
 
     def test_game_without_suspensions(self):
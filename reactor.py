@@ -0,0 +1,375 @@
+#!/usr/bin/python
+# -*- coding: utf8 -*-
+
+"""Drives many scoreboard links on a single thread.
+
+The reactor is an alternative to the transmitter threads of the scoreboard
+driver, meant for a PC that drives several courts:
+
+    reactor = Reactor()
+    boards = [Scoreboard(name, reactor=reactor) for name in device_names]
+    ...
+    for board in boards:
+        board.close()
+    reactor.close()
+
+The serial ports are multiplexed by means of a selector, thus the reactor
+works on POSIX systems only, where serial ports are file descriptors, and
+requires python 3."""
+
+import math
+import os
+import selectors
+import serial
+import threading
+import time
+import unittest
+
+from scoreboard import LegacyProtocol
+from scoreboard import Link
+from scoreboard import Transmitter
+from scoreboard import monotonic
+
+
+class TimerWheel(object):
+    """Deadlines bucketed in a circular array of `size` slots.
+
+    Each slot covers `resolution` seconds; the deadlines are rounded up to
+    the slot they fall into, and those beyond the wheel horizon are put in
+    the last slot: they come out early and the caller schedules them again.
+    Scheduling an item again replaces its previous deadline.
+
+    A bitmap of the slots in use makes finding the next deadline cheap,
+    however far it is."""
+
+    def __init__(self, now, resolution=0.001, size=1024):
+        self._resolution = resolution
+        self._slots = [[] for i in range(size)]
+        self._occupied = 0 # bit i set if slot i is not empty
+        self._tick = int(now / resolution) # the first tick not expired yet
+        self._ticks = {} # item -> tick
+
+    def schedule(self, item, deadline):
+        tick = int(math.ceil(deadline / self._resolution))
+        tick = max(self._tick, min(tick, self._tick + len(self._slots) - 1))
+        if self._ticks.get(item) == tick:
+            return
+        self.cancel(item)
+        self._ticks[item] = tick
+        index = tick % len(self._slots)
+        self._slots[index].append(item)
+        self._occupied |= 1 << index
+
+    def cancel(self, item):
+        tick = self._ticks.pop(item, None)
+        if tick is not None:
+            index = tick % len(self._slots)
+            slot = self._slots[index]
+            slot.remove(item)
+            if not slot:
+                self._occupied &= ~(1 << index)
+
+    def next_deadline(self):
+        """Return the time the first slot not empty expires, if any."""
+        if not self._occupied:
+            return None
+        return (self._tick + self._next_offset()) * self._resolution
+
+    def expire(self, now):
+        """Return the items whose deadline is not later than `now`."""
+        items = []
+        last_tick = int(now / self._resolution)
+        while self._occupied:
+            tick = self._tick + self._next_offset()
+            if tick > last_tick:
+                break
+            index = tick % len(self._slots)
+            slot = self._slots[index]
+            for item in slot:
+                del self._ticks[item]
+            items.extend(slot)
+            del slot[:]
+            self._occupied &= ~(1 << index)
+            self._tick = tick + 1
+        self._tick = max(self._tick, last_tick + 1)
+        return items
+
+    def _next_offset(self):
+        """Return the distance of the first slot in use from the current."""
+        start = self._tick % len(self._slots)
+        occupied = self._occupied >> start
+        if not occupied: # wrap around
+            occupied = self._occupied << (len(self._slots) - start)
+        return (occupied & -occupied).bit_length() - 1
+
+
+class Channel(object):
+    """A link driven by the reactor; takes the place of a `Transmitter`.
+
+    The port is opened by the reactor thread, unless it is open already,
+    and reopened with the same backoff of the transmitter thread when it
+    fails or the board does not answer anymore; as with the transmitter,
+    the board is given the boot time of the link after each open (see
+    `Link.opened`).
+
+    The channel relies on the reactor for the readiness notifications
+    (`_register`, `_unregister`), to get serviced as soon as possible
+    (`_wake`) and to be detached (`_close`); the reactor calls `_read` when
+    the port is readable and `_service` when the link needs attention."""
+
+    def __init__(self, reactor, port, link):
+        self._reactor = reactor
+        self._port = port
+        self._port.timeout = 0 # non-blocking
+        self._link = link
+        self._backoff = 0
+        self._reopen_time = 0
+        self._is_registered = False
+        self._needs_reset = False
+        self._should_close = False
+        self._closed = threading.Event()
+
+    @property
+    def link(self):
+        return self._link
+
+    def submit(self, packet):
+        self._link.submit(packet)
+        self._reactor._wake(self)
+
+    def close(self):
+        """Detach the channel from the reactor; the port is left alone."""
+        self._reactor._close(self)
+
+    def _read(self, now):
+        try:
+            response = self._port.read(max(1, self._port.in_waiting))
+        except EnvironmentError: # serial.SerialException included
+            self._link.fail(now)
+            self._disconnect(now)
+            return
+        if response:
+            self._backoff = 0 # the board is back
+            self._link.receive(response, now)
+
+    def _service(self, now):
+        """Do whatever the link needs; return the time it needs it again."""
+        if self._should_close:
+            self._unregister()
+            self._closed.set()
+            return None
+        if not self._is_registered:
+            if now < self._reopen_time:
+                return self._reopen_time
+            if not self._open(now):
+                return self._reopen_time
+        try:
+            self._link.expire(now)
+            frame = self._link.next_frame(now)
+            while frame:
+                self._port.write(frame)
+                frame = self._link.next_frame(now)
+        except EnvironmentError:
+            self._link.fail(now)
+            self._disconnect(now)
+            return self._reopen_time
+        if self._link.is_unresponsive():
+            self._disconnect(now)
+            return self._reopen_time
+        return self._link.next_deadline(now)
+
+    def _open(self, now):
+        try:
+            if not self._port.is_open:
+                self._port.open()
+        except EnvironmentError:
+            self._disconnect(now)
+            return False
+        self._reactor._register(self, self._port.fileno())
+        self._is_registered = True
+        self._link.opened(now)
+        if self._needs_reset:
+            self._link.reset(now)
+        return True
+
+    def _disconnect(self, now):
+        self._unregister()
+        self._port.close()
+        self._reopen_time = now + self._backoff
+        self._backoff = min(
+            Transmitter._MAX_BACKOFF,
+            max(Transmitter._MIN_BACKOFF, 2 * self._backoff))
+        self._needs_reset = True
+
+    def _unregister(self):
+        if self._is_registered:
+            self._reactor._unregister(self._port.fileno())
+            self._is_registered = False
+
+
+class Reactor(object):
+    """Drives the links of any number of scoreboards on a single thread.
+
+    The reactor thread waits for the board responses on all the ports at
+    once; the deadlines of the links (ACK timeouts, retransmissions,
+    keep-alives and filters) are kept in a `TimerWheel`. The other threads
+    hand the packets over through the channels returned by `add`, that
+    wake the reactor up by means of a pipe."""
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._wheel = TimerWheel(monotonic())
+        self._lock = threading.Lock()
+        self._pending = set() # the channels woken up
+        self._should_stop = False
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        for fd in (self._wakeup_read, self._wakeup_write):
+            os.set_blocking(fd, False)
+        self._selector.register(
+            self._wakeup_read, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, name='Reactor')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add(self, port, link):
+        """Drive `link` over `port`, that gets opened by the reactor if it
+        is not open already."""
+        channel = Channel(self, port, link)
+        self._wake(channel)
+        return channel
+
+    def close(self):
+        with self._lock:
+            self._should_stop = True
+        os.write(self._wakeup_write, b'\0')
+        self._thread.join()
+        self._selector.close()
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+
+    def _register(self, channel, fd):
+        self._selector.register(fd, selectors.EVENT_READ, channel)
+
+    def _unregister(self, fd):
+        self._selector.unregister(fd)
+
+    def _close(self, channel):
+        channel._should_close = True
+        self._wake(channel)
+        channel._closed.wait()
+
+    def _wake(self, channel):
+        with self._lock:
+            is_idle = not self._pending
+            self._pending.add(channel)
+        if is_idle:
+            try:
+                os.write(self._wakeup_write, b'\0')
+            except BlockingIOError:
+                pass # the pipe is full, the reactor is awake anyway
+
+    def _run(self):
+        while True:
+            deadline = self._wheel.next_deadline()
+            timeout = None
+            if deadline is not None:
+                timeout = max(0, deadline - monotonic())
+            events = self._selector.select(timeout)
+            now = monotonic()
+            channels = set()
+            for key, _ in events:
+                if key.data is None:
+                    os.read(self._wakeup_read, 4096)
+                else:
+                    key.data._read(now)
+                    channels.add(key.data)
+            with self._lock:
+                if self._should_stop:
+                    break
+                channels.update(self._pending)
+                self._pending.clear()
+            channels.update(self._wheel.expire(now))
+            for channel in channels:
+                deadline = channel._service(now)
+                if deadline is None:
+                    self._wheel.cancel(channel)
+                else:
+                    self._wheel.schedule(channel, deadline)
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def test_items_expire_at_their_deadline(self):
+        wheel = TimerWheel(0, resolution=0.01, size=100)
+        wheel.schedule('a', 0.05)
+        wheel.schedule('b', 0.023)
+        self.assertAlmostEqual(wheel.next_deadline(), 0.03)
+        self.assertEqual(wheel.expire(0.029), [])
+        self.assertEqual(wheel.expire(0.03), ['b'])
+        self.assertAlmostEqual(wheel.next_deadline(), 0.05)
+        self.assertEqual(wheel.expire(1), ['a'])
+        self.assertEqual(wheel.next_deadline(), None)
+
+    def test_rescheduled_item_expires_once(self):
+        wheel = TimerWheel(0, resolution=0.01, size=100)
+        wheel.schedule('a', 0.05)
+        wheel.schedule('a', 0.02)
+        self.assertEqual(wheel.expire(0.02), ['a'])
+        self.assertEqual(wheel.expire(0.1), [])
+        wheel.schedule('a', 0.2)
+        wheel.cancel('a')
+        self.assertEqual(wheel.expire(1), [])
+
+    def test_deadlines_beyond_the_horizon_come_out_early(self):
+        wheel = TimerWheel(0, resolution=0.01, size=10)
+        wheel.schedule('a', 5)
+        self.assertAlmostEqual(wheel.next_deadline(), 0.09)
+        self.assertEqual(wheel.expire(0.09), ['a'])
+
+    def test_past_deadlines_come_out_at_the_next_tick(self):
+        wheel = TimerWheel(0, resolution=0.01, size=10)
+        wheel.expire(0.5)
+        wheel.schedule('a', 0.1)
+        self.assertAlmostEqual(wheel.next_deadline(), 0.51)
+        self.assertEqual(wheel.expire(0.51), ['a'])
+
+
+class TestChannel(unittest.TestCase):
+
+    def setUp(self):
+        from emulator import Emulator
+        self.emulator = Emulator(response_delay=0.002, boot_time=1.5)
+        self.emulator.start()
+        self.reactor = Reactor()
+
+    def tearDown(self):
+        self.reactor.close()
+        self.emulator.close()
+
+    def test_slow_booting_board_gets_connected(self):
+        emulator = self.emulator
+        class RebootingPort(serial.Serial):
+            # the board restarts whenever the port is opened, as the Arduino
+            # does when DTR is raised
+            def open(self):
+                serial.Serial.open(self)
+                emulator.reset()
+        port = RebootingPort()
+        port.port = emulator.device_name
+        blank = bytes([LegacyProtocol.STX] + [0] * 12 + [LegacyProtocol.ETX])
+        packet = bytes([LegacyProtocol.STX] + [1] * 12 + [LegacyProtocol.ETX])
+        link = Link(LegacyProtocol(), blank)
+        channel = self.reactor.add(port, link)
+        channel.submit(packet)
+        deadline = monotonic() + 4.
+        while not link.sent_packet_count and monotonic() < deadline:
+            time.sleep(0.05)
+        channel.close()
+        port.close()
+        self.assertTrue(link.sent_packet_count > 0)
+        self.assertEqual(link.reconnection_count, 0)
+        self.assertEqual(bytes(emulator.display), packet[1:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -42,6 +42,7 @@ from palette import Palette
 import scoreboard
 import summary
 import widget
+import wiretrace
 
 TIMEOUT_DURATION = 1 # minutes
 EXTRA_PERIOD_DURATION = 5
@@ -289,6 +290,10 @@ CONFIG_DIALOG_PERIOD_DURATION_BUTTON_LABEL = "Cambia"
 CONFIG_DIALOG_OPTIONS_HEADING = "Opzioni"
 CONFIG_DIALOG_SERIAL_PORT_HEADING = "Porta seriale"
 CONFIG_DIALOG_SERIAL_PORT_LABEL = "Nome del dispositivo:"
+CONFIG_DIALOG_DISCOVER_SERIAL_PORT_BUTTON_LABEL = "Cerca"
+CONFIG_DIALOG_SERIAL_PORT_NOT_FOUND = \
+    "Il dispositivo di comunicazione con il tabellone non è stato trovato: " \
+    "verificare che sia connesso al computer."
 CONFIG_DIALOG_AGGREGATE_TIME_BUTTON_LABEL = "Mostra il tempo aggregato"
 CONFIG_DIALOG_LEADING_ZERO_IN_MINUTE_BUTTON_LABEL = \
     "Mostra lo zero iniziale nei minuti"
@@ -319,6 +324,8 @@ class AppConfig(object):
         self.timeout_expiring_blast = False
         self.show_timeout_calls_on_scoreboard = False
         self.device_name = ''
+        self.trace_file_path = '' # no trace, not shown in ConfigDialog
+        self.max_frame_rate = 0. # no limit, not shown in ConfigDialog
         self._match = None
 
     def clone(self):
@@ -327,6 +334,8 @@ class AppConfig(object):
         config.knock_out_game = self.knock_out_game
         config.period_expired_blast = self.period_expired_blast
         config.device_name = self.device_name
+        config.trace_file_path = self.trace_file_path
+        config.max_frame_rate = self.max_frame_rate
         config._match = self._match
         return config
 
@@ -382,6 +391,10 @@ class AppConfig(object):
                 'Report', 'show_timeout_calls_on_scoreboard')
             self.device_name = config.get(
                 'Report', 'device_name')
+            self.trace_file_path = config.get(
+                'Report', 'trace_file_path')
+            self.max_frame_rate = config.getfloat(
+                'Report', 'max_frame_rate')
         except:
             pass
 
@@ -399,6 +412,8 @@ class AppConfig(object):
         config.set('Report', 'show_timeout_calls_on_scoreboard',
             str(self.show_timeout_calls_on_scoreboard))
         config.set('Report', 'device_name', self.device_name)
+        config.set('Report', 'trace_file_path', self.trace_file_path)
+        config.set('Report', 'max_frame_rate', str(self.max_frame_rate))
         config.add_section('TimeView')
         config.set('TimeView', 'period_duration', str(self.period_duration))
         config.set('TimeView', 'aggregate_time', str(self.aggregate_time))
@@ -548,6 +563,11 @@ class ConfigDialog(widget.BaseDialog):
             row=0, column=0, stick=tk.W, padx=(5, 0), pady=5)
         ttk.Entry(serial_port, textvariable=self._serial_port).grid(
             row=0, column=1, stick=tk.W, padx=(5, 0), pady=5)
+        ttk.Button(
+            serial_port,
+            command=self._on_discover_serial_port,
+            text=CONFIG_DIALOG_DISCOVER_SERIAL_PORT_BUTTON_LABEL).grid(
+                row=0, column=2, stick=tk.E, padx=5, pady=5)
         ttk.Button(master, text=OK_BUTTON_LABEL, command=self.ok).grid(
             row=6, column=1, stick=tk.E, padx=(0, 5), pady=(10, 5))
         ttk.Button(master, text=CANCEL_BUTTON_LABEL, command=self.cancel).grid(
@@ -589,6 +609,20 @@ class ConfigDialog(widget.BaseDialog):
             self._period_duration = int(period_duration)
             self._update()
 
+    def _on_discover_serial_port(self, event=None):
+        self.config(cursor='watch')
+        self.update_idletasks()
+        try:
+            device_name = scoreboard.discover_port(
+                cache_path=os.path.expanduser('~/.sps-hc20_port'))
+        finally:
+            self.config(cursor='')
+        if device_name:
+            self._serial_port.set(device_name)
+        else:
+            tkMessageBox.showinfo(
+                CONFIG_DIALOG_TITLE, CONFIG_DIALOG_SERIAL_PORT_NOT_FOUND)
+
     def _update(self):
         self._period_duration_label['text'] = \
             CONFIG_DIALOG_PERIOD_DURATION_LABEL.format(self._period_duration)
@@ -1317,11 +1351,22 @@ class Application(widget.StyledWidget):
         else:
             if not self._scoreboard \
                     or self._scoreboard.device_name != device_name:
+                if self._scoreboard:
+                    self._scoreboard.close()
                 try:
-                    self._scoreboard = scoreboard.Scoreboard(device_name)
+                    recorder = None
+                    if self._config.trace_file_path:
+                        recorder = wiretrace.Recorder(
+                            self._config.trace_file_path)
+                    self._scoreboard = scoreboard.Scoreboard(
+                        device_name,
+                        recorder=recorder,
+                        max_frame_rate=self._config.max_frame_rate)
                 except:
                     self._scoreboard = None
                     _, error, _ = sys.exc_info()
+                    if recorder:
+                        recorder.close()
                     tkMessageBox.showerror(
                         APP_NAME,
                         SCOREBOARD_CONNECTION_ERROR.format(device_name, error))
@@ -1597,6 +1642,8 @@ class Application(widget.StyledWidget):
         if tkMessageBox.askyesno(APP_NAME, CONFIRM_QUIT):
             self._period_timer.stop()
             self._timeout_timer.stop()
+            if self._scoreboard:
+                self._scoreboard.close()
             self._root.destroy()
 
     def _log_event(self, event):
@@ -1628,14 +1675,15 @@ class Application(widget.StyledWidget):
 
     def _timeout_expiring(self):
         if self._config.timeout_expiring_blast:
-            self._activate_siren()
+            self._activate_siren(scoreboard.Siren.DOUBLE_BLAST)
 
     def _timeout_expired(self):
         self._timer_widget.change_timer(self._period_timer)
 
-    def _activate_siren(self):
-        self._root.after(0, self._on_siren_on)
-        self._root.after(1000, self._on_siren_off)
+    def _activate_siren(self, pattern=scoreboard.Siren.LONG_BLAST):
+        # timed by the transmitter threads, whatever the UI is doing
+        if self._scoreboard:
+            self._scoreboard.sound_siren(pattern)
 
     def _bulletin_window_closed(self):
         self._bulletin_window = None
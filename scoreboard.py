@@ -1,10 +1,65 @@
+import bisect
+import codecs
+import collections
+import math
+import operator
+import os
 import serial
+import serial.tools.list_ports
+import tempfile
+import threading
 import time
+import unittest
 
-class Data(object):
+try:
+    # python 3.x
+    from time import monotonic
+except:
+    # python 2.x
+    from time import time as monotonic
 
-    def __init__(
-        self,
+try:
+    # python 3.x
+    import queue
+except:
+    # python 2.x
+    import Queue as queue
+
+_DataFields = collections.namedtuple('_DataFields', [
+    'timestamp',
+    'dot',
+    'leading_zero_in_minute',
+    'home_seventh_foul',
+    'home_first_timeout',
+    'home_second_timeout',
+    'home_set',
+    'home_score',
+    'guest_seventh_foul',
+    'guest_first_timeout',
+    'guest_second_timeout',
+    'guest_set',
+    'guest_score',
+    'siren',
+])
+
+
+class Data(_DataFields):
+    """What the scoreboard shows.
+
+    Data is an immutable tuple: comparing and hashing it is cheap. The
+    `changes` method tells which display groups differ between two Data."""
+
+    __slots__ = ()
+
+    # display groups
+    HOME_SCORE = 0x01 # home set and score digits
+    CLOCK = 0x02 # clock digits
+    GUEST_SCORE = 0x04 # guest score and set digits
+    INDICATORS = 0x08 # fouls, timeouts, siren and dot
+    ALL_GROUPS = HOME_SCORE | CLOCK | GUEST_SCORE | INDICATORS
+
+    def __new__(
+        cls,
         timestamp=(0, 0),
         dot=False,
         leading_zero_in_minute=False,
@@ -19,26 +74,69 @@ class Data(object):
         guest_set=0,
         guest_score=0,
         siren=False):
-        self.home_seventh_foul = home_seventh_foul
-        self.home_first_timeout = home_first_timeout
-        self.home_second_timeout = home_second_timeout
-        self.home_set = home_set
-        self.home_score = home_score
-        self.timestamp = timestamp
-        self.dot = dot
-        self.leading_zero_in_minute = leading_zero_in_minute
-        self.guest_seventh_foul = guest_seventh_foul
-        self.guest_first_timeout = guest_first_timeout
-        self.guest_second_timeout = guest_second_timeout
-        self.guest_score = guest_score
-        self.guest_set = guest_set
-        self.siren = siren
-
-    def __eq__(self, other):
-        return other and self.__dict__ == other.__dict__
-
-    def __ne__(self, other):
-        return not self == other
+        return _DataFields.__new__(
+            cls,
+            tuple(timestamp),
+            dot,
+            leading_zero_in_minute,
+            home_seventh_foul,
+            home_first_timeout,
+            home_second_timeout,
+            home_set,
+            home_score,
+            guest_seventh_foul,
+            guest_first_timeout,
+            guest_second_timeout,
+            guest_set,
+            guest_score,
+            siren)
+
+    def changes(self, other):
+        """Return the display groups that differ from `other`'s ones."""
+        if other is None:
+            return self.ALL_GROUPS
+        groups = 0
+        if self.home_score != other.home_score \
+                or self.home_set != other.home_set:
+            groups |= self.HOME_SCORE
+        if self.timestamp != other.timestamp \
+                or self.leading_zero_in_minute != other.leading_zero_in_minute:
+            groups |= self.CLOCK
+        if self.guest_score != other.guest_score \
+                or self.guest_set != other.guest_set:
+            groups |= self.GUEST_SCORE
+        if self.dot != other.dot \
+                or self.siren != other.siren \
+                or self.home_seventh_foul != other.home_seventh_foul \
+                or self.home_first_timeout != other.home_first_timeout \
+                or self.home_second_timeout != other.home_second_timeout \
+                or self.guest_seventh_foul != other.guest_seventh_foul \
+                or self.guest_first_timeout != other.guest_first_timeout \
+                or self.guest_second_timeout != other.guest_second_timeout:
+            groups |= self.INDICATORS
+        return groups
+
+
+# characters that can't be encoded in latin-1 are shown as blanks
+codecs.register_error('scoreboard.blank', lambda error: (u' ', error.end))
+
+
+def _encoding_table(font, blank):
+    return bytes(bytearray(
+        [font[code - 32] if 31 < code < 32 + len(font) else blank
+            for code in range(256)]))
+
+
+def _decoding_table(font, unknown):
+    table = bytearray([unknown] * 256)
+    # the first character wins when several share the same segments
+    characters = ' 0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ' \
+        'abcdefghijklmnopqrstuvwxyz-_=' + ''.join(map(chr, range(32, 127)))
+    for character in reversed(characters):
+        segments = font[ord(character) - 32]
+        # the most significant bit (siren or dot) is not part of the font
+        table[segments] = table[segments | 0x80] = ord(character)
+    return bytes(table)
 
 
 class Font(object):
@@ -149,164 +247,2216 @@ class Font(object):
 
     _BLANK = _FONT[0]
 
+    # translation tables, from latin-1 to segments and back again; the
+    # segments that match no character are decoded as an inverted question
+    # mark
+    _ENCODING_TABLE = _encoding_table(_FONT, _BLANK)
+    _DECODING_TABLE = _decoding_table(_FONT, 0xbf)
+
     def encode(self, text):
         if len(text) == 1:
             return self._encode(text[0])
         else:
-            return bytearray([self._encode(i) for i in text])
+            return bytearray(text.encode('latin-1', 'scoreboard.blank')
+                .translate(self._ENCODING_TABLE))
+
+    def decode(self, segments):
+        """Return the text shown by the given display bytes."""
+        return bytes(segments).translate(self._DECODING_TABLE) \
+            .decode('latin-1')
 
     def _encode(self, character):
         code = ord(character)
-        return self._FONT[code - 32] if 31 < code < 128 else self._BLANK
+        return self._ENCODING_TABLE[code] if code < 256 else self._BLANK
 
 
 class ScrollingText(object):
+    """A bulletin that scrolls on the clock displays.
 
-    _DISPLAYS = [5, 6, 7, 8] # clock displays
+    The text is rendered once, when shown, into a buffer that holds all the
+    window positions one after the other. The position to be shown is
+    derived from the time elapsed since then, thus the scrolling speed does
+    not depend on how often the packets are built.
 
-    def __init__(self):
+    The bulletin takes the `displays` given (the clock ones of the SPS-HC20
+    by default), but the `kept_bits` (the siren)."""
+
+    def __init__(self, displays=(5, 6, 7, 8), kept_bits=((5, 0x80),)):
+        kept_bits = dict(kept_bits)
+        self._displays = [(i, kept_bits.get(i, 0)) for i in displays]
+        self.owned_bits = [(i, ~kept & 0xff) for i, kept in self._displays]
+        self._window_length = len(self._displays)
         self._font = Font()
-        self._is_active = False
-        self._window_length = len(self._DISPLAYS)
         self._padding = ' ' * self._window_length
-        self._last_transform_time = 0
+        # (frames, positions, start time, delay); it's read by the
+        # transmitter thread, so it's replaced as a whole
+        self._bulletin = None
 
     def show(self, text, delay):
-        self._text = self._font.encode('{0}{1}{0}'.format(self._padding, text))
-        self._delay = delay
-        self._window_pos = 0
-        self._is_active = True
+        """Scroll `text`, a position every `delay` milliseconds."""
+        if delay <= 0:
+            raise ValueError('the delay must be positive, not {}'.format(delay))
+        text = self._font.encode('{0}{1}{0}'.format(self._padding, text))
+        positions = len(text) - self._window_length + 1
+        frames = bytearray()
+        for i in range(positions):
+            frames.extend(text[i:i + self._window_length])
+        self._bulletin = (
+            memoryview(bytes(frames)), positions, monotonic(), delay / 1000.)
 
     def hide(self):
-        self._is_active = False
+        self._bulletin = None
+
+    def is_active(self):
+        return self._bulletin is not None
 
-    # Scoreboard's filter callback
-    def transform(self, packet):
-        if not self._is_active:
+    # Link's filter callback
+    def transform(self, packet, now):
+        bulletin = self._bulletin
+        if not bulletin:
             return
-        for i, display in enumerate(self._DISPLAYS):
-            packet[display] = self._text[self._window_pos + i]
-        current_millis = self._millis()
-        if current_millis - self._last_transform_time > self._delay:
-            self._window_pos += 1
-            if len(self._text) - self._window_pos < self._window_length:
-                self._window_pos = 0
-            self._last_transform_time = current_millis
+        frames, positions, start, delay = bulletin
+        offset = int((now - start) / delay) % positions * self._window_length
+        for i, kept in self._displays:
+            packet[i] = (packet[i] & kept) | frames[offset]
+            offset += 1
 
-    def _millis(self):
-        return int(round(time.time() * 1000))
+    # Link's filter callback
+    def next_deadline(self, now):
+        """Return the time the window moves to the next position."""
+        bulletin = self._bulletin
+        if not bulletin:
+            return None
+        _, _, start, delay = bulletin
+        deadline = start + (int((now - start) / delay) + 1) * delay
+        return deadline if deadline > now else deadline + delay
 
+    # Link's filter callback
+    def acknowledged(self, packet, now):
+        pass
 
-class Scoreboard(object):
 
-    _BAUDRATE = 57600
-    _BYTESIZE = 8
-    _PARITY = serial.PARITY_NONE
-    _STOPBITS = serial.STOPBITS_ONE
-    _TIMEOUT = 0.05 # 5ms
+class Siren(object):
+    """Sounds the siren of a board following a pattern.
 
-    _STX = 0x02
-    _ETX = 0x03
-    _ACK = 0x06
-    _NAK = 0x15
-    _DATA_LENGTH = 12
+    A pattern is a sequence of durations in seconds, alternately on and off;
+    while it is being played the siren bit follows the pattern, whatever
+    the packet submitted says, and the link sends the changes at the exact
+    times they're due; `bit` is the (display, bit) of the siren. The
+    on-times the board has actually achieved, from the acknowledgment of the
+    frame that starts the siren to the one of the frame that stops it, are
+    kept in `on_times`."""
 
-    def __init__(self, device_name):
-        self._device_name = device_name
-        self._scrolling_text = ScrollingText()
+    LONG_BLAST = (1.,)
+    DOUBLE_BLAST = (0.5, 0.3, 0.5)
+
+    def __init__(self, history=10, bit=(5, 0x80)):
+        self._display, self._bit = bit # the SPS-HC20 one by default
+        self.owned_bits = [bit]
+        # (start time, ends of the pattern steps); it's read by the
+        # transmitter thread, so it's replaced as a whole
+        self._blast = None
+        self._on_since = None
+        self.on_times = collections.deque(maxlen=history)
+
+    def sound(self, pattern=LONG_BLAST, start=None):
+        ends = []
+        end = 0
+        for duration in pattern:
+            end += duration
+            ends.append(end)
+        self._blast = (
+            monotonic() if start is None else start, tuple(ends))
+
+    def is_active(self):
+        return self._blast is not None
+
+    # Link's filter callback
+    def transform(self, packet, now):
+        blast = self._blast
+        if not blast:
+            return
+        start, ends = blast
+        step = bisect.bisect_right(ends, now - start)
+        if now < start or step == len(ends):
+            return # not started yet, or played
+        if step % 2:
+            packet[self._display] &= ~self._bit & 0xff
+        else:
+            packet[self._display] |= self._bit
+
+    # Link's filter callback
+    def next_deadline(self, now):
+        """Return the time the siren changes next."""
+        blast = self._blast
+        if not blast:
+            return None
+        start, ends = blast
+        if now < start:
+            return start
+        step = bisect.bisect_right(ends, now - start)
+        return start + ends[step] if step < len(ends) else None
+
+    # Link's filter callback
+    def acknowledged(self, packet, now):
+        if packet[self._display] & self._bit:
+            if self._on_since is None:
+                self._on_since = now
+        elif self._on_since is not None:
+            self.on_times.append(now - self._on_since)
+            self._on_since = None
+
+
+class Blink(object):
+    """Makes some displays blink, e.g. to draw attention to a score.
+
+    The displays (1 to 12) are blanked in the second half of each `period`;
+    the dots and the indicators that share them are left alone."""
+
+    def __init__(self, displays, period=1.):
+        self.owned_bits = [(i, 0x7f) for i in displays]
+        self._period = period
+        self._start = None # read by the transmitter thread
+
+    def start(self):
+        self._start = monotonic()
+
+    def stop(self):
+        self._start = None
+
+    def is_active(self):
+        return self._start is not None
+
+    # Link's filter callback
+    def transform(self, packet, now):
+        start = self._start
+        if start is None or (now - start) % self._period < self._period / 2:
+            return
+        for i, bits in self.owned_bits:
+            packet[i] &= ~bits & 0xff
+
+    # Link's filter callback
+    def next_deadline(self, now):
+        """Return the time the displays are blanked or shown next."""
+        start = self._start
+        if start is None:
+            return None
+        half_period = self._period / 2
+        return start + (int((now - start) / half_period) + 1) * half_period
+
+    # Link's filter callback
+    def acknowledged(self, packet, now):
+        pass
+
+
+FilterTiming = collections.namedtuple(
+    'FilterTiming', ['name', 'call_count', 'average', 'max'])
+
+
+class FilterChain(object):
+    """The filters a link applies to the packets, in order.
+
+    A filter implements `is_active`, `transform`, `next_deadline` and
+    `acknowledged` (see `ScrollingText`), and declares the packet bits it
+    changes in `owned_bits`, a list of (packet index, bits): a filter can't
+    take bits owned by another one of the chain. The inactive filters cost
+    a call to `is_active` only; the time the active ones take is measured,
+    see `timings`.
+
+    The chain is changed by replacing the list of filters as a whole, thus
+    it can be changed by any thread while the link is being driven."""
+
+    def __init__(self, filters=()):
+        self._filters = [] # (filter, [call count, total time, max time])
+        for filter_ in filters:
+            self.add(filter_)
+
+    def __iter__(self):
+        return iter([filter_ for filter_, _ in self._filters])
+
+    def add(self, filter_):
+        for other, _ in self._filters:
+            if _overlap(filter_.owned_bits, other.owned_bits):
+                raise ValueError('{} and {} change the same bits'.format(
+                    type(filter_).__name__, type(other).__name__))
+        self._filters = self._filters + [(filter_, [0, 0., 0.])]
+
+    def remove(self, filter_):
+        self._filters = [i for i in self._filters if i[0] is not filter_]
+
+    def apply(self, packet, buffer, now):
+        """Return the packet transformed by the active filters, in `buffer`,
+        or None if no filter is active."""
+        is_transformed = False
+        for filter_, timing in self._filters:
+            if filter_.is_active():
+                if not is_transformed:
+                    buffer[:] = packet
+                    is_transformed = True
+                start = monotonic()
+                filter_.transform(buffer, now)
+                elapsed = monotonic() - start
+                timing[0] += 1
+                timing[1] += elapsed
+                if elapsed > timing[2]:
+                    timing[2] = elapsed
+        return buffer if is_transformed else None
+
+    def next_deadline(self, now):
+        """Return the time an active filter changes the packet next."""
+        deadline = None
+        for filter_, _ in self._filters:
+            if filter_.is_active():
+                filter_deadline = filter_.next_deadline(now)
+                if filter_deadline is not None \
+                        and (deadline is None or filter_deadline < deadline):
+                    deadline = filter_deadline
+        return deadline
+
+    def acknowledged(self, packet, now):
+        for filter_, _ in self._filters:
+            filter_.acknowledged(packet, now)
+
+    def timings(self):
+        """Return the `FilterTiming` of each filter, in seconds."""
+        return [
+            FilterTiming(
+                type(filter_).__name__,
+                call_count,
+                total / call_count if call_count else None,
+                max_time if call_count else None)
+            for filter_, (call_count, total, max_time) in self._filters]
+
+
+def _overlap(owned_bits, other_owned_bits):
+    other = dict(other_owned_bits)
+    return any(bits & other.get(i, 0) for i, bits in owned_bits)
+
+
+class LegacyProtocol(object):
+    """The original stop-and-wait protocol.
+
+    Each frame is made of STX, the 12 display bytes and ETX; the board
+    answers with a single ACK or NAK byte, so only one frame at a time can
+    be waiting for its response.
+
+    In delta mode the frames that differ from what the board shows in a few
+    display bytes only are sent as delta frames instead: SO, a bitmap of the
+    changed display positions (two bytes, little endian, bit 0 is the first
+    display), the changed bytes and ETX. The board rejects a delta frame
+    until it has received a full one."""
+
+    STX = 0x02
+    ETX = 0x03
+    ACK = 0x06
+    SO = 0x0E
+    NAK = 0x15
+    FRAME_LENGTH = 14
+    DATA_LENGTH = 12
+
+    START = STX
+    DELTA_START = SO
+
+    window = 1
+    is_sequenced = False
+    ack_timeout = 0.05 # 50ms
+    read_timeout = ack_timeout
+
+    def __init__(self, delta=False):
+        self.delta = delta
+
+    def frame(self, sequence, packet, base=None):
+        """Return the frame that carries `packet`.
+
+        `base` is the packet the board is known to show, if any: when given
+        in delta mode, a delta frame is returned if it is the shorter."""
+        if self.delta and base is not None:
+            changes = self._changes(packet, base)
+            if len(changes) < len(packet) - 2:
+                return self._delta_frame(sequence, changes)
+        return self._full_frame(sequence, packet)
+
+    def is_delta(self, frame):
+        return frame[0] == self.DELTA_START
+
+    def parse(self, buffer):
+        """Consume the responses in `buffer`, yielding (code, sequence)."""
+        while buffer:
+            code = buffer[0]
+            del buffer[0]
+            yield code, None
+
+    def _full_frame(self, sequence, packet):
+        return packet
+
+    def _delta_frame(self, sequence, changes):
+        return bytes(bytearray([self.SO]) + changes + bytearray([self.ETX]))
+
+    def _changes(self, packet, base):
+        """Return the position bitmap followed by the changed bytes."""
+        mask = 0
+        changes = bytearray(2)
+        for i in range(len(packet) - 2):
+            if packet[i + 1] != base[i + 1]:
+                mask |= 1 << i
+                changes.append(packet[i + 1])
+        changes[0] = mask & 0xff
+        changes[1] = mask >> 8
+        return changes
+
+
+class WindowedProtocol(LegacyProtocol):
+    """A pipelined protocol that allows several frames in flight.
+
+    Each frame is made of SOH, a sequence number, the 12 display bytes and
+    ETX; the board answers with ACK or NAK followed by the sequence number
+    of the frame, so the responses can be matched with the frames they
+    refer to.
+
+    Delta frames start with SI and the sequence number; the board rejects
+    the delta frames whose sequence number does not immediately follow the
+    one of the last frame accepted."""
+
+    SOH = 0x01
+    SI = 0x0F
+    FRAME_LENGTH = 15
+
+    START = SOH
+    DELTA_START = SI
+
+    is_sequenced = True
+    read_timeout = 0.001 # 1ms, poll for new frames to be sent meanwhile
+
+    def __init__(self, window=4, delta=False):
+        LegacyProtocol.__init__(self, delta)
+        self.window = window
+
+    def parse(self, buffer):
+        while buffer:
+            code = buffer[0]
+            if code not in (self.ACK, self.NAK):
+                del buffer[0]
+                yield code, None
+            elif len(buffer) < 2:
+                break
+            else:
+                sequence = buffer[1]
+                del buffer[:2]
+                yield code, sequence
+
+    def _full_frame(self, sequence, packet):
+        frame = bytearray(packet)
+        frame[0:1] = (self.SOH, sequence)
+        return bytes(frame)
+
+    def _delta_frame(self, sequence, changes):
+        return bytes(
+            bytearray([self.SI, sequence]) + changes + bytearray([self.ETX]))
+
+
+class Governor(object):
+    """Limits the frame rate of a link to `max_rate` frames per second.
+
+    The changes are held back until the interval since the previous frame
+    has elapsed, and then sent all together; the changes of the scores and
+    of the siren, that are urgent, are sent right away."""
+
+    def __init__(self, max_rate=10., layout=None):
+        self.interval = 1. / max_rate
+        layout = layout or SPS_HC20
+        # (packet index, bits) of the scores and of the siren
+        self._urgent_bits = [
+            (i, 0xff)
+                for value in ('home_set', 'home_score', 'guest_score',
+                    'guest_set')
+                    for i in layout.displays(value)]
+        self._urgent_bits.append(layout.indicator('siren'))
+
+    def is_urgent(self, packet, reference):
+        """Tell whether the changes of `packet` can't wait."""
+        for i, bits in self._urgent_bits:
+            if (packet[i] ^ reference[i]) & bits:
+                return True
+        return False
+
+
+RoundTrip = collections.namedtuple(
+    'RoundTrip', ['count', 'p50', 'p95', 'p99', 'max'])
+
+Rate = collections.namedtuple(
+    'Rate', ['window', 'packet_rate', 'loss_percentage'])
+
+Statistics = collections.namedtuple(
+    'Statistics', [
+        'sent_packet_count',
+        'bad_packet_count',
+        'lost_packet_count',
+        'unexpected_error_count',
+        'reconnection_count',
+        'saved_frame_count',
+        'round_trip',
+        'rates',
+    ])
+
+
+class Histogram(object):
+    """Distribution of the round trip times, in fixed memory.
+
+    The times are counted in logarithmic buckets, `_BUCKETS_PER_DECADE` per
+    decade from `_MIN_TIME` on: a percentile is the upper bound of the
+    bucket it falls into, that is it is overestimated by 12% at most; the
+    longer times all go in the last bucket."""
+
+    _MIN_TIME = 0.0001 # 100us
+    _DECADES = 5 # up to 10s
+    _BUCKETS_PER_DECADE = 20
+
+    def __init__(self):
+        self._scale = self._BUCKETS_PER_DECADE / math.log(10)
+        self._counts = [0] * (self._DECADES * self._BUCKETS_PER_DECADE + 1)
+        self._count = 0
+        self._max = 0.
+
+    def add(self, seconds):
+        bucket = 0
+        if seconds > self._MIN_TIME:
+            bucket = min(
+                len(self._counts) - 1,
+                int(math.log(seconds / self._MIN_TIME) * self._scale))
+        self._counts[bucket] += 1
+        self._count += 1
+        self._max = max(self._max, seconds)
+
+    def percentile(self, percentile):
+        if not self._count:
+            return None
+        rank = math.ceil(self._count * percentile / 100.)
+        total = 0
+        for bucket, count in enumerate(self._counts):
+            total += count
+            if total >= rank:
+                break
+        if bucket == len(self._counts) - 1:
+            return self._max # the last bucket has no upper bound
+        upper_bound = self._MIN_TIME * math.exp((bucket + 1) / self._scale)
+        return min(upper_bound, self._max)
+
+    def round_trip(self):
+        return RoundTrip(
+            self._count,
+            self.percentile(50),
+            self.percentile(95),
+            self.percentile(99),
+            self._max if self._count else None)
+
+
+class SlidingWindow(object):
+    """Packets acknowledged and failed during the last seconds.
+
+    The events are counted in one second slots, the oldest slot being
+    reused as time goes by; the rates cover the slots of the last `window`
+    seconds, the current one included, or the time since the first event
+    if shorter."""
+
+    def __init__(self, length=60):
+        # [second, acknowledged, failed]
+        self._slots = [[None, 0, 0] for i in range(length)]
+        self._first_second = None
+
+    def add(self, now, is_acknowledged):
+        second = int(now)
+        if self._first_second is None:
+            self._first_second = second
+        slot = self._slots[second % len(self._slots)]
+        if slot[0] != second:
+            slot[:] = [second, 0, 0]
+        slot[1 if is_acknowledged else 2] += 1
+
+    def rate(self, window, now):
+        second = int(now)
+        acknowledged = failed = 0
+        for slot in self._slots:
+            if slot[0] is not None and second - window < slot[0] <= second:
+                acknowledged += slot[1]
+                failed += slot[2]
+        elapsed = window - 1 + (now - second)
+        if self._first_second is not None:
+            elapsed = min(elapsed, now - self._first_second)
+        total = acknowledged + failed
+        return Rate(
+            window,
+            acknowledged / elapsed if elapsed else 0.,
+            100. * failed / total if total else 0.)
+
+
+class Monitor(object):
+    """Round trip times and rates of a link.
+
+    The link records the events from the thread that drives it, while
+    `statistics` can be called by any thread: a lock keeps the snapshot
+    consistent."""
+
+    WINDOWS = (10, 60) # seconds
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogram = Histogram()
+        self._sliding_window = SlidingWindow(max(self.WINDOWS))
+
+    def acknowledged(self, round_trip_time, now):
+        with self._lock:
+            self._histogram.add(round_trip_time)
+            self._sliding_window.add(now, True)
+
+    def failed(self, now):
+        with self._lock:
+            self._sliding_window.add(now, False)
+
+    def snapshot(self, now):
+        """Return the round trip times and the rates of each window."""
+        with self._lock:
+            return (
+                self._histogram.round_trip(),
+                [self._sliding_window.rate(i, now) for i in self.WINDOWS])
+
+
+class Link(object):
+    """The transmission state of a scoreboard link.
+
+    Link knows nothing about the actual I/O: it decides which frame has to be
+    written next, interprets the board responses and keeps track of the
+    frames that are waiting for a response. Only the most recent packet
+    submitted is transmitted (latest frame wins); it gets retransmitted
+    until the board acknowledges it or a newer one is submitted.
+
+    Delta frames are used only while the link is synchronized, that is
+    since the board has acknowledged a full frame: any NAK, lost response
+    or I/O error makes the link send a full frame again.
+
+    The packet acknowledged is sent again as a full frame every
+    `_KEEP_ALIVE` seconds, or as soon as possible while the board does not
+    answer: this way a board that restarted gets the packet back, and a
+    board that does not answer at all is detected. The link is deemed
+    unresponsive after `_MAX_UNANSWERED` frames in a row get no response,
+    not counting those lost within `boot_time` seconds since the port has
+    been opened (see `opened`): the board may restart when the port is
+    opened, and does not answer until it has booted. Once the port has been
+    reopened, `reset` makes the link resend the current packet.
+
+    The filters (a `FilterChain`, or a list of filters such as
+    `ScrollingText`) are applied to the submitted packet when the frame is
+    built; the link also wakes up when an active filter
+    is going to change the packet (see `next_deadline`), and tells the
+    filters the packets the board has acknowledged.
+
+    The counters are updated by the thread that drives the link only, thus
+    they can be safely read by any other thread without locking; the round
+    trip times and the rates are taken by `statistics`.
+
+    The frame rate is limited by `governor`, if given (see `Governor`); the
+    frames it saves are counted. The traffic is recorded by `recorder`, if
+    given (see `wiretrace.PortRecorder`)."""
+
+    _RETRY_DELAY = 0.02 # 20ms
+    _KEEP_ALIVE = 1. # 1s
+    _MAX_UNANSWERED = 10
+
+    def __init__(
+            self,
+            protocol,
+            packet,
+            filters=(),
+            recorder=None,
+            governor=None,
+            boot_time=2.):
+        self._protocol = protocol
+        self._boot_time = boot_time
+        self._boot_deadline = 0
+        self._filters = filters if isinstance(filters, FilterChain) \
+            else FilterChain(filters)
+        self._recorder = recorder
+        self._governor = governor
+        self._held_packet = None # held back by the governor
+        self._packet = None
+        self._buffer = bytearray(packet)
+        self._composed_packet = None
+        self._current_packet = None
+        self._acknowledged_packet = packet
+        # (sequence, packet, deadline, is_full_frame, sent_time, submitted)
+        self._in_flight = collections.deque()
+        self._is_synchronized = False
+        self._sequence = 0
+        self._response = bytearray()
+        self._failed_packet = None
+        self._retry_time = 0
+        self._shown_packet = None
+        self._unanswered_count = 0
+        self._last_sent_time = 0
         self.sent_packet_count = 0
         self.bad_packet_count = 0
         self.unexpected_error_count = 0
         self.lost_packet_count = 0
+        self.reconnection_count = 0
+        self.saved_frame_count = 0
+        self._monitor = Monitor()
+
+    @property
+    def protocol(self):
+        return self._protocol
+
+    @property
+    def filters(self):
+        """The `FilterChain`."""
+        return self._filters
+
+    @property
+    def packet(self):
+        """The packet last submitted."""
+        return self._packet
+
+    @property
+    def shown_packet(self):
+        """The submitted packet the board is known to show.
+
+        It is the very object passed to `submit`, before the filters: the
+        board shows it once a frame built from it has been acknowledged,
+        or right away if the frame would be the same of the one shown."""
+        return self._shown_packet
+
+    def submit(self, packet):
+        self._packet = packet
+
+    def is_waiting(self):
+        return bool(self._in_flight)
+
+    def is_unresponsive(self):
+        return self._unanswered_count >= self._MAX_UNANSWERED
+
+    def next_frame(self, now):
+        """Return the next frame to be written, if any."""
+        packet = self._current_packet = self._compose(now)
+        if packet is None:
+            return None
+        if self._held_packet is not None and packet != self._held_packet:
+            self.saved_frame_count += 1 # superseded before being sent
+            self._held_packet = None
+        is_keep_alive = packet == self._acknowledged_packet
+        if is_keep_alive and not self._unanswered_count \
+                and now < self._last_sent_time + self._KEEP_ALIVE:
+            if not self._in_flight:
+                self._shown_packet = self._packet
+            return None
+        if len(self._in_flight) >= self._protocol.window:
+            return None
+        if self._in_flight and self._in_flight[-1][1] == packet:
+            # already on its way, on behalf of the packet last submitted
+            self._in_flight[-1] = self._in_flight[-1][:5] + (self._packet,)
+            return None
+        if packet == self._failed_packet and now < self._retry_time:
+            return None
+        if self._is_held_back(packet, now):
+            self._held_packet = packet
+            return None
+        self._held_packet = None
+        sequence = self._sequence
+        self._sequence = (sequence + 1) % 256
+        frame = self._protocol.frame(
+            sequence, packet, None if is_keep_alive else self._base())
+        self._last_sent_time = now
+        self._in_flight.append((
+            sequence,
+            packet,
+            now + self._protocol.ack_timeout,
+            not self._protocol.is_delta(frame),
+            now,
+            self._packet))
+        if self._recorder:
+            self._recorder.sent(now, frame)
+        return frame
+
+    def next_deadline(self, now):
+        """Return the time the link needs attention, if nothing happens."""
+        deadline = None
+        if self._in_flight:
+            deadline = self._in_flight[0][2]
+        elif self._current_packet is not None \
+                and self._current_packet == self._failed_packet \
+                and now < self._retry_time:
+            deadline = self._retry_time
+        elif self._current_packet is not None:
+            deadline = self._last_sent_time + self._KEEP_ALIVE
+        filter_deadline = self._filters.next_deadline(now)
+        if filter_deadline is not None \
+                and (deadline is None or filter_deadline < deadline):
+            deadline = filter_deadline
+        if self._held_packet is not None:
+            release_time = self._last_sent_time + self._governor.interval
+            if deadline is None or release_time < deadline:
+                deadline = release_time
+        return deadline
+
+    def receive(self, data, now):
+        if self._recorder:
+            self._recorder.received(now, data)
+        self._unanswered_count = 0
+        self._response.extend(data)
+        for code, sequence in self._protocol.parse(self._response):
+            frame = self._match(sequence, now)
+            if frame is None:
+                self.unexpected_error_count += 1
+                continue
+            _, packet, _, is_full_frame, sent_time, submitted = frame
+            if code == self._protocol.ACK:
+                self.sent_packet_count += 1
+                self._monitor.acknowledged(now - sent_time, now)
+                self._acknowledged_packet = packet
+                self._shown_packet = submitted
+                self._filters.acknowledged(packet, now)
+                if is_full_frame:
+                    self._is_synchronized = True
+            elif code == self._protocol.NAK:
+                self.bad_packet_count += 1
+                self._monitor.failed(now)
+                self._retry_later(packet, now)
+            else:
+                self.unexpected_error_count += 1
+                self._monitor.failed(now)
+                self._retry_later(packet, now)
+
+    def expire(self, now):
+        """Give up waiting for the responses that are overdue."""
+        while self._in_flight and self._in_flight[0][2] <= now:
+            packet = self._in_flight.popleft()[1]
+            self.lost_packet_count += 1
+            if now >= self._boot_deadline:
+                self._unanswered_count += 1
+            self._monitor.failed(now)
+            self._retry_later(packet, now)
+
+    def fail(self, now):
+        """Account for an I/O error; the frames in flight are lost."""
+        if self._recorder:
+            self._recorder.failed(now)
+        self.unexpected_error_count += 1
+        self._monitor.failed(now)
+        self._in_flight.clear()
+        del self._response[:]
+        self._retry_later(self._packet, now)
+
+    def opened(self, now):
+        """Give the board `boot_time` seconds to answer, as the port has
+        just been opened."""
+        self._boot_deadline = now + self._boot_time
+        self._unanswered_count = 0
+
+    def reset(self, now):
+        """Forget the board state, e.g. after the port has been reopened."""
+        if self._recorder:
+            self._recorder.reset(now)
+        self._in_flight.clear()
+        del self._response[:]
+        self._acknowledged_packet = None
+        self._shown_packet = None
+        self._is_synchronized = False
+        self._failed_packet = None
+        self._unanswered_count = 0
+        self.reconnection_count += 1
+
+    def statistics(self, now):
+        """Return a snapshot of the counters, round trip times and rates."""
+        round_trip, rates = self._monitor.snapshot(now)
+        return Statistics(
+            self.sent_packet_count,
+            self.bad_packet_count,
+            self.lost_packet_count,
+            self.unexpected_error_count,
+            self.reconnection_count,
+            self.saved_frame_count,
+            round_trip,
+            rates)
+
+    def _compose(self, now):
+        """Return the submitted packet, transformed by the active filters."""
+        packet = self._packet
+        if packet is None:
+            return None
+        buffer = self._filters.apply(packet, self._buffer, now)
+        if buffer is None:
+            return packet
+        if buffer != self._composed_packet:
+            self._composed_packet = bytes(buffer)
+        return self._composed_packet
+
+    def _is_held_back(self, packet, now):
+        if not self._governor \
+                or now >= self._last_sent_time + self._governor.interval:
+            return False
+        if self._in_flight:
+            reference = self._in_flight[-1][1]
+        else:
+            reference = self._acknowledged_packet
+        return reference is not None \
+            and not self._governor.is_urgent(packet, reference)
+
+    def _base(self):
+        """Return the packet the board will show when the frame arrives."""
+        if not self._is_synchronized:
+            return None
+        if self._in_flight:
+            return self._in_flight[-1][1]
+        return self._acknowledged_packet
+
+    def _match(self, sequence, now):
+        if not self._protocol.is_sequenced:
+            return self._in_flight.popleft() if self._in_flight else None
+        if sequence is None \
+                or not any(i[0] == sequence for i in self._in_flight):
+            return None
+        # responses come in order: the frames before the matching one are lost
+        while self._in_flight[0][0] != sequence:
+            self._in_flight.popleft()
+            self.lost_packet_count += 1
+            self._monitor.failed(now)
+            self._is_synchronized = False
+        return self._in_flight.popleft()
+
+    def _retry_later(self, packet, now):
+        self._is_synchronized = False
+        self._failed_packet = packet
+        self._retry_time = now + self._RETRY_DELAY
+
+
+class Transmitter(object):
+    """Drives a `Link` on a dedicated thread, using blocking I/O.
+
+    The packets are handed over by means of `submit`, that never blocks;
+    the transmitter thread opens the port (unless it is open already),
+    writes the frames, waits for the board responses and takes care of the
+    retransmissions.
+
+    When the port fails (e.g. the USB cable is pulled) or the board stops
+    answering (e.g. it restarted), the thread reopens the port: the first
+    attempt is immediate, the following ones are spaced out exponentially
+    up to `_MAX_BACKOFF` seconds, until the board answers again. The board
+    is given the boot time of the link after each open (see `Link.opened`)
+    before it is deemed unresponsive."""
+
+    _MIN_BACKOFF = 0.05 # 50ms
+    _MAX_BACKOFF = 2.
+
+    def __init__(self, port, link):
+        self._port = port
+        self._link = link
+        self._condition = threading.Condition()
+        self._should_stop = False
+        self._backoff = 0
+        self._thread = threading.Thread(
+            target=self._run, name='Transmitter({})'.format(port.port))
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def link(self):
+        return self._link
+
+    def submit(self, packet):
+        with self._condition:
+            self._link.submit(packet)
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._should_stop = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _run(self):
+        if self._port.is_open:
+            self._link.opened(monotonic())
+        else:
+            self._connect()
+        while True:
+            with self._condition:
+                frame = self._next_frame()
+            if frame is None:
+                break
+            try:
+                if frame:
+                    self._port.write(frame)
+                if self._link.is_waiting():
+                    self._receive()
+            except EnvironmentError: # serial.SerialException included
+                self._link.fail(monotonic())
+                self._reconnect()
+                continue
+            if self._link.is_unresponsive():
+                self._reconnect()
+
+    def _connect(self):
+        """Open the port, waiting longer and longer between the attempts."""
+        while True:
+            try:
+                self._port.close()
+                self._port.open()
+            except EnvironmentError:
+                pass
+            else:
+                self._link.opened(monotonic())
+                return
+            self._backoff = min(
+                self._MAX_BACKOFF, max(self._MIN_BACKOFF, 2 * self._backoff))
+            if not self._sleep(self._backoff):
+                return # closing
+
+    def _reconnect(self):
+        self._connect()
+        self._link.reset(monotonic())
+
+    def _sleep(self, seconds):
+        """Wait unless the thread must stop; return False if it must."""
+        deadline = monotonic() + seconds
+        with self._condition:
+            while not self._should_stop:
+                now = monotonic()
+                if now >= deadline:
+                    return True
+                self._condition.wait(deadline - now)
+        return False
+
+    def _next_frame(self):
+        """Wait for something to do; return None if the thread must stop."""
+        while not self._should_stop:
+            now = monotonic()
+            self._link.expire(now)
+            frame = self._link.next_frame(now)
+            if frame or self._link.is_waiting():
+                return frame or b''
+            deadline = self._link.next_deadline(now)
+            self._condition.wait(
+                None if deadline is None else max(0, deadline - now))
+        return None
+
+    def _receive(self):
+        if self._link.protocol.is_sequenced:
+            response = self._port.read(max(1, self._port.in_waiting))
+        else:
+            response = self._port.read()
+        now = monotonic()
+        if response:
+            self._backoff = 0 # the board is back
+            self._link.receive(response, now)
+        else:
+            self._link.expire(now)
+
+
+class Layout(object):
+    """Where a scoreboard model shows each piece of `Data`.
+
+    `numbers` lists the numbers shown, as (value, displays, style): the
+    value is a field of `Data`, or the 'minute' or the 'second' of the
+    timestamp; the displays (1 to `length`) hold the digits, the most
+    significant first; the style tells how the digits are written:
+
+        'score': no leading zeros, the first display shows a 1 at most
+        'minute': a leading zero if `Data.leading_zero_in_minute`
+        'second': with leading zeros
+        'digit': the units only
+
+    `indicators` lists the (field, display, bit) of the `Data` flags. The
+    delta frames address 16 displays at most."""
+
+    _GROUPS = {
+        'home_set': Data.HOME_SCORE,
+        'home_score': Data.HOME_SCORE,
+        'minute': Data.CLOCK,
+        'second': Data.CLOCK,
+        'guest_score': Data.GUEST_SCORE,
+        'guest_set': Data.GUEST_SCORE,
+    }
+    _STYLES = ['score', 'minute', 'second', 'digit']
+    _MAX_DISPLAYS = 16
+
+    def __init__(self, length, numbers, indicators):
+        if length > self._MAX_DISPLAYS:
+            raise ValueError('{} displays at most'.format(self._MAX_DISPLAYS))
+        for value, displays, style in numbers:
+            if value not in self._GROUPS or style not in self._STYLES:
+                raise ValueError('{} can\'t be shown as {}'.format(
+                    value, style))
+        self.length = length
+        self.numbers = list(numbers)
+        self.indicators = list(indicators)
+
+    def group(self, value):
+        """Return the `Data` display group of `value`."""
+        return self._GROUPS.get(value, Data.INDICATORS)
+
+    def displays(self, value):
+        """Return the displays of the number `value`."""
+        for number, displays, _ in self.numbers:
+            if number == value:
+                return list(displays)
+        raise KeyError(value)
+
+    def indicator(self, field):
+        """Return the (display, bit) of the flag `field`."""
+        for flag, display, bit in self.indicators:
+            if flag == field:
+                return display, bit
+        raise KeyError(field)
+
+
+SPS_HC20 = Layout(
+    12,
+    [
+        ('home_set', [1], 'digit'),
+        ('home_score', [2, 3, 4], 'score'),
+        ('minute', [5, 6], 'minute'),
+        ('second', [7, 8], 'second'),
+        ('guest_score', [9, 10, 11], 'score'),
+        ('guest_set', [12], 'digit'),
+    ],
+    [
+        ('home_seventh_foul', 2, 0x40),
+        ('home_first_timeout', 2, 0x20),
+        ('home_second_timeout', 2, 0x10),
+        ('siren', 5, 0x80),
+        ('dot', 6, 0x80),
+        ('guest_first_timeout', 9, 0x40),
+        ('guest_second_timeout', 9, 0x20),
+        ('guest_seventh_foul', 9, 0x10),
+    ])
+
+
+class Encoder(object):
+    """Encodes `Data` into the display bytes of a packet, following a
+    `Layout` (the SPS-HC20 one by default).
+
+    The layout is compiled once into an encode plan: the digits of each
+    number are looked up in tables, and written at once when their displays
+    are contiguous. Only the display groups that changed since the previous
+    call are encoded again."""
+
+    _MAX_TABLE_LENGTH = 1000
+
+    def __init__(self, layout=None):
+        self._layout = layout or SPS_HC20
         self._font = Font()
         self._blank = self._font.encode(' ')
         self._digits = [self._font.encode(i) for i in '0123456789']
-        self._port = serial.Serial(
-            port=self._device_name,
-            baudrate=self._BAUDRATE,
-            bytesize=self._BYTESIZE,
-            parity=self._PARITY,
-            stopbits=self._STOPBITS,
-            timeout=self._TIMEOUT)
-        self._last_transmitted_data = None
-        self._last_transmitted_packet = bytearray(
-            [self._STX] + [self._blank] * self._DATA_LENGTH + [self._ETX])
-        self._data = Data()
+        # the digits and the indicators share some displays
+        length = self._layout.length + 2
+        self._segments = bytearray([self._blank] * length)
+        self._indicators = bytearray(length)
+        self._plan = self._compile(self._layout)
+        self._data = None
+
+    @property
+    def blank(self):
+        return self._blank
+
+    def encode(self, data, packet):
+        """Update the display bytes of `packet`; return the groups changed."""
+        groups = data.changes(self._data)
+        segments = self._segments
+        indicators = self._indicators
+        for group, numbers, flags, displays in self._plan:
+            if not groups & group:
+                continue
+            for get_value, tables, encode, first, last in numbers:
+                value = get_value(data)
+                table = tables[data.leading_zero_in_minute]
+                if 0 <= value < len(table):
+                    digits = table[value]
+                else:
+                    digits = encode(value, data.leading_zero_in_minute)
+                if last is None:
+                    for i, digit in zip(first, digits):
+                        segments[i] = digit
+                else:
+                    segments[first:last] = digits
+            for display, display_flags in flags:
+                bits = 0
+                for get_flag, bit in display_flags:
+                    if get_flag(data):
+                        bits |= bit
+                indicators[display] = bits
+            for i in displays:
+                packet[i] = segments[i] | indicators[i]
+        self._data = data
+        return groups
+
+    def _compile(self, layout):
+        """Return the plan: for each display group, the numbers and the
+        flags to be encoded, and the displays to be written."""
+        plan = []
+        for group in (
+                Data.HOME_SCORE, Data.CLOCK, Data.GUEST_SCORE,
+                Data.INDICATORS):
+            numbers = []
+            flags = collections.OrderedDict() # display -> [(getter, bit)]
+            displays = set()
+            for value, number_displays, style in layout.numbers:
+                if layout.group(value) == group:
+                    numbers.append(self._compile_number(
+                        value, number_displays, style))
+                    displays.update(number_displays)
+            for field, display, bit in layout.indicators:
+                if layout.group(field) == group:
+                    flags.setdefault(display, []).append(
+                        (operator.attrgetter(field), bit))
+                    displays.add(display)
+            if displays:
+                plan.append(
+                    (group, numbers, list(flags.items()), sorted(displays)))
+        return plan
+
+    def _compile_number(self, value, displays, style):
+        if value == 'minute':
+            get_value = lambda data: data.timestamp[0]
+        elif value == 'second':
+            get_value = lambda data: data.timestamp[1]
+        else:
+            get_value = operator.attrgetter(value)
+        width = len(displays)
+        encode = lambda value, leading_zero: bytearray(
+            self._encode_number(value, width, style, leading_zero))
+        table_length = min(10 ** width, self._MAX_TABLE_LENGTH)
+        tables = [
+            [encode(i, leading_zero) for i in range(table_length)]
+                for leading_zero in (False, True)]
+        if style != 'minute':
+            tables[1] = tables[0]
+        first, last = displays[0], displays[-1] + 1
+        if list(displays) != list(range(first, last)):
+            first, last = list(displays), None # not contiguous
+        return get_value, tables, encode, first, last
+
+    def _encode_number(self, value, width, style, leading_zero):
+        if style == 'digit':
+            return [self._digits[value % 10]]
+        digits = []
+        for power in reversed(range(width)):
+            if power == 0:
+                digit = value % 10
+            elif value < 10 ** power:
+                # no digit: blank, unless zero padded
+                zero_padded = style == 'second' \
+                    or (style == 'minute' and leading_zero)
+                digit = 0 if zero_padded else -1
+            else:
+                digit = value // 10 ** power % 10
+            if style == 'score' and power == width - 1 and power:
+                digit = min(1, digit)
+            digits.append(self._encode_digit(digit))
+        return digits
+
+    def _encode_digit(self, value):
+        return self._blank if value < 0 or value > 9 else self._digits[value]
+
+
+class Scoreboard(object):
+    """The scoreboard driver.
+
+    `device_name` can list several devices separated by commas, one for
+    each scoreboard: the data is encoded once and mirrored to all of them.
+    Each port has its own transmitter thread and link, so a slow or
+    disconnected board never delays the others; given a `reactor.Reactor`,
+    the links are driven by the reactor thread instead. The ports are
+    opened right away, thus a missing device raises `serial.SerialException`;
+    the transmitters reopen them when they fail later on.
+
+    The data is shown following `layout`, the SPS-HC20 one by default (see
+    `Layout`). The frame rate of each port is limited to `max_frame_rate`
+    frames per second, if given (see `Governor`). The boards are given
+    `boot_time` seconds to answer after each open (see `Link`). The traffic
+    of all the ports is recorded by `recorder`, if given (see
+    `wiretrace.Recorder`); the scoreboard closes it on `close`."""
+
+    _BAUDRATE = 57600
+    _BYTESIZE = 8
+    _PARITY = serial.PARITY_NONE
+    _STOPBITS = serial.STOPBITS_ONE
+
+    _STX = LegacyProtocol.STX
+    _ETX = LegacyProtocol.ETX
+
+    def __init__(
+            self,
+            device_name,
+            protocol=None,
+            reactor=None,
+            recorder=None,
+            max_frame_rate=None,
+            layout=None,
+            boot_time=2.):
+        self._device_name = device_name
+        self._device_names = [
+            i.strip() for i in device_name.split(',') if i.strip()]
+        if not self._device_names:
+            raise ValueError('no device name given')
+        protocol = protocol or LegacyProtocol()
+        layout = layout or SPS_HC20
+        siren_bit = layout.indicator('siren')
+        self._scrolling_text = ScrollingText(
+            layout.displays('minute') + layout.displays('second'),
+            [siren_bit])
+        self._sirens = [] # one for each port, to measure each board
+        self._encoder = Encoder(layout)
+        self._last_data = None
+        # the packet encoding the last data; the filters are applied by the
+        # links, on the transmitter threads
+        self._packet = bytearray(
+            [self._STX] + [self._encoder.blank] * layout.length
+                + [self._ETX])
+        self._recorder = recorder
+        governor = Governor(max_frame_rate, layout) if max_frame_rate \
+            else None
+        self._ports = []
+        try:
+            for name in self._device_names:
+                self._ports.append(serial.Serial(
+                    port=name,
+                    baudrate=self._BAUDRATE,
+                    bytesize=self._BYTESIZE,
+                    parity=self._PARITY,
+                    stopbits=self._STOPBITS,
+                    timeout=protocol.read_timeout))
+        except:
+            for port in self._ports:
+                port.close()
+            raise
+        self._transmitters = []
+        for index, port in enumerate(self._ports):
+            self._sirens.append(Siren(bit=siren_bit))
+            link = Link(
+                protocol,
+                bytes(self._packet),
+                FilterChain([self._scrolling_text, self._sirens[-1]]),
+                recorder.port(index) if recorder else None,
+                governor,
+                boot_time)
+            if reactor:
+                self._transmitters.append(reactor.add(port, link))
+            else:
+                self._transmitters.append(Transmitter(port, link))
 
     @property
     def device_name(self):
         return self._device_name
 
+    @property
+    def device_names(self):
+        return list(self._device_names)
+
+    @property
+    def sent_packet_count(self):
+        return sum(i.link.sent_packet_count for i in self._transmitters)
+
+    @property
+    def bad_packet_count(self):
+        return sum(i.link.bad_packet_count for i in self._transmitters)
+
+    @property
+    def unexpected_error_count(self):
+        return sum(i.link.unexpected_error_count for i in self._transmitters)
+
+    @property
+    def lost_packet_count(self):
+        return sum(i.link.lost_packet_count for i in self._transmitters)
+
+    @property
+    def reconnection_count(self):
+        return sum(i.link.reconnection_count for i in self._transmitters)
+
+    @property
+    def saved_frame_count(self):
+        return sum(i.link.saved_frame_count for i in self._transmitters)
+
+    def port_statistics(self):
+        """Return the link `Statistics` of each device, by device name."""
+        now = monotonic()
+        return [
+            (name, transmitter.link.statistics(now))
+                for name, transmitter in zip(
+                    self._device_names, self._transmitters)]
+
+    def statistics(self):
+        """Return a snapshot of the link `Statistics`.
+
+        With several scoreboards the counters are summed up, while the
+        round trip times and the rates are the ones of the worst link."""
+        statistics = [i[1] for i in self.port_statistics()]
+        if len(statistics) == 1:
+            return statistics[0]
+        return Statistics(
+            sum(i.sent_packet_count for i in statistics),
+            sum(i.bad_packet_count for i in statistics),
+            sum(i.lost_packet_count for i in statistics),
+            sum(i.unexpected_error_count for i in statistics),
+            sum(i.reconnection_count for i in statistics),
+            sum(i.saved_frame_count for i in statistics),
+            max((i.round_trip for i in statistics),
+                key=lambda round_trip: round_trip.p95 or 0),
+            [max(rates, key=lambda rate: rate.loss_percentage)
+                for rates in zip(*[i.rates for i in statistics])])
+
+    def close(self):
+        for transmitter in self._transmitters:
+            transmitter.close()
+        for port in self._ports:
+            port.close()
+        if self._recorder:
+            self._recorder.close()
+
     def show_scrolling_text(self, text, delay):
         self._scrolling_text.show(text, delay)
+        self._submit()
 
     def hide_scrolling_text(self):
         self._scrolling_text.hide()
-        # force a display update
-        data = self._last_transmitted_data
-        self._last_transmitted_data = None
-        self.update(data)
+        self._submit()
+
+    def add_filter(self, filter_):
+        """Apply `filter_` too (see `FilterChain`), on all the ports."""
+        for transmitter in self._transmitters:
+            transmitter.link.filters.add(filter_)
+        self._submit()
+
+    def remove_filter(self, filter_):
+        for transmitter in self._transmitters:
+            transmitter.link.filters.remove(filter_)
+        self._submit()
+
+    def filter_timings(self):
+        """Return the `FilterTiming` of each filter, all ports together."""
+        timings = [i.link.filters.timings() for i in self._transmitters]
+        merged = []
+        for filter_timings in zip(*timings):
+            call_count = sum(i.call_count for i in filter_timings)
+            measured = [i for i in filter_timings if i.call_count]
+            merged.append(FilterTiming(
+                filter_timings[0].name,
+                call_count,
+                sum(i.average * i.call_count for i in measured) / call_count
+                    if call_count else None,
+                max(i.max for i in measured) if measured else None))
+        return merged
+
+    def sound_siren(self, pattern=Siren.LONG_BLAST):
+        """Sound the siren following `pattern`, see `Siren`."""
+        start = monotonic()
+        for siren in self._sirens:
+            siren.sound(pattern, start)
+        self._submit()
+
+    def siren_on_times(self):
+        """Return the last siren on-times achieved, for each port."""
+        return [list(siren.on_times) for siren in self._sirens]
 
     def update(self, data):
-        packet_to_transmit = self._last_transmitted_packet[:]
-        # if data is changed, the tx buffer must be updated
-        if not self._last_transmitted_data \
-            or self._last_transmitted_data != data:
-            minute, second = data.timestamp
-            buffer = packet_to_transmit
-            # set digits
-            buffer[ 1] = self._encode_digit(self._units(data.home_set))
-            buffer[ 2] = self._encode_digit(
-                min(1, self._hundreds(data.home_score)))
-            buffer[ 3] = self._encode_digit(self._tens(data.home_score))
-            buffer[ 4] = self._encode_digit(self._units(data.home_score))
-            tens_minute = self._tens(minute)
-            if data.leading_zero_in_minute:
-                tens_minute = max(0, tens_minute)
-            buffer[ 5] = self._encode_digit(tens_minute)
-            buffer[ 6] = self._encode_digit(self._units(minute))
-            buffer[ 7] = self._encode_digit(max(0, self._tens(second)))
-            buffer[ 8] = self._encode_digit(self._units(second))
-            buffer[ 9] = self._encode_digit(
-                min(1, self._hundreds(data.guest_score)))
-            buffer[10] = self._encode_digit(self._tens(data.guest_score))
-            buffer[11] = self._encode_digit(self._units(data.guest_score))
-            buffer[12] = self._encode_digit(self._units(data.guest_set))
-            # set other indicators
-            buffer[2] = buffer[2] \
-                | (0x40 if data.home_seventh_foul else 0x00) \
-                | (0x20 if data.home_first_timeout else 0x00) \
-                | (0x10 if data.home_second_timeout else 0x00)
-            buffer[5] = buffer[5] | (0x80 if data.siren else 0x00)
-            buffer[6] = buffer[6] | (0x80 if data.dot else 0x00)
-            buffer[9] = buffer[9] \
-                | (0x40 if data.guest_first_timeout else 0x00) \
-                | (0x20 if data.guest_second_timeout else 0x00) \
-                | (0x10 if data.guest_seventh_foul else 0x00)
-        # any banner to show?
-        self._scrolling_text.transform(packet_to_transmit)
-        if packet_to_transmit != self._last_transmitted_packet:
-            self._port.write(packet_to_transmit)
-            response = self._port.read()
-            if not response:
-                self.lost_packet_count += 1
-            elif ord(response) == self._ACK:
-                self.sent_packet_count += 1
-                self._last_transmitted_data = data
-                self._last_transmitted_packet = packet_to_transmit
-            elif ord(response) == self._NAK:
-                self.bad_packet_count += 1
-            else:
-                self.unexpected_error_count += 1
+        if data == self._last_data:
+            return # nothing changed
+        self._encoder.encode(data, self._packet)
+        self._last_data = data
+        self._submit()
 
-    def _units(self, value):
-        return value % 10
+    def _submit(self):
+        # the transmitter threads do the actual I/O; a new packet object is
+        # submitted every time, see `Link.shown_packet`
+        packet = bytes(self._packet)
+        for transmitter in self._transmitters:
+            transmitter.submit(packet)
 
-    def _tens(self, value):
-        return -1 if value < 10 else int(value / 10) % 10
 
-    def _hundreds(self, value):
-        return -1 if value < 100 else int(value / 100) % 10
+def discover_port(candidates=None, timeout=2., cache_path=None):
+    """Return the name of the port the scoreboard interface is connected to,
+    None if not found.
 
-    def _encode_digit(self, value):
-        return self._blank if value < 0 or value > 9 else self._digits[value]
+    The `candidates` (all the serial ports of the system by default) are
+    probed at once: a blank frame is sent over and over until a board
+    acknowledges it, for up to `timeout` seconds, long enough for the board
+    to restart on the port opening. The port found is saved in `cache_path`,
+    if given, and probed alone first the next time, so that the other
+    devices are left alone. A port that hangs is left behind: the function
+    returns within `2 * timeout` seconds anyway."""
+    if candidates is None:
+        candidates = [i[0] for i in serial.tools.list_ports.comports()]
+    cached = _read_cached_port(cache_path)
+    if cached in candidates:
+        stages = [[cached], [i for i in candidates if i != cached]]
+    else:
+        stages = [candidates]
+    for names in stages:
+        name = _probe_ports(names, timeout)
+        if name:
+            _write_cached_port(cache_path, name)
+            return name
+    return None
+
+
+def _probe_ports(names, timeout):
+    results = queue.Queue() # (name, answered)
+    found = threading.Event()
+    deadline = monotonic() + timeout
+    for name in names:
+        thread = threading.Thread(
+            target=_probe_port,
+            args=(name, deadline, found, results),
+            name='Discovery')
+        thread.daemon = True
+        thread.start()
+    try:
+        for i in range(len(names)):
+            try:
+                name, answered = results.get(
+                    timeout=max(0, deadline - monotonic()))
+            except queue.Empty:
+                return None # some ports hang
+            if answered:
+                return name
+        return None
+    finally:
+        found.set() # stop the probes still going on
+
+
+def _probe_port(name, deadline, found, results):
+    handshake = bytes(bytearray(
+        [LegacyProtocol.STX]
+            + [Encoder().blank] * LegacyProtocol.DATA_LENGTH
+            + [LegacyProtocol.ETX]))
+    answered = False
+    port = None
+    try:
+        port = serial.Serial(
+            name,
+            baudrate=Scoreboard._BAUDRATE,
+            bytesize=Scoreboard._BYTESIZE,
+            parity=Scoreboard._PARITY,
+            stopbits=Scoreboard._STOPBITS,
+            timeout=0.1)
+        while not answered and not found.is_set() and monotonic() < deadline:
+            port.write(handshake)
+            response = bytearray(port.read(max(1, port.in_waiting)))
+            answered = LegacyProtocol.ACK in response
+    except EnvironmentError: # serial.SerialException included
+        pass
+    finally:
+        if port:
+            port.close()
+    results.put((name, answered))
+
+
+def _read_cached_port(path):
+    if not path:
+        return None
+    try:
+        with open(path) as file:
+            return file.read().strip() or None
+    except EnvironmentError:
+        return None
+
+
+def _write_cached_port(path, name):
+    if not path:
+        return
+    try:
+        with open(path, 'w') as file:
+            file.write(name)
+    except EnvironmentError:
+        pass
+
+
+class TestData(unittest.TestCase):
+
+    def test_equal_data_have_the_same_hash(self):
+        self.assertEqual(Data(timestamp=[1, 2]), Data(timestamp=(1, 2)))
+        self.assertEqual(
+            hash(Data(home_score=3)), hash(Data(home_score=3)))
+        self.assertNotEqual(Data(), None)
+
+    def test_changes(self):
+        data = Data()
+        self.assertEqual(data.changes(None), Data.ALL_GROUPS)
+        self.assertEqual(data.changes(Data()), 0)
+        self.assertEqual(Data(home_set=1).changes(data), Data.HOME_SCORE)
+        self.assertEqual(Data(timestamp=(0, 1)).changes(data), Data.CLOCK)
+        self.assertEqual(
+            Data(leading_zero_in_minute=True).changes(data), Data.CLOCK)
+        self.assertEqual(Data(guest_score=1).changes(data), Data.GUEST_SCORE)
+        self.assertEqual(Data(siren=True).changes(data), Data.INDICATORS)
+        self.assertEqual(
+            Data(dot=True, guest_score=2).changes(data),
+            Data.INDICATORS | Data.GUEST_SCORE)
+
+
+class TestEncoder(unittest.TestCase):
+
+    def test_encode(self):
+        packet = bytearray(14)
+        Encoder().encode(
+            Data(
+                timestamp=(12, 34),
+                dot=True,
+                home_score=105,
+                home_first_timeout=True,
+                guest_score=7,
+                siren=True),
+            packet)
+        self.assertEqual(packet, bytearray([
+            0x00, 0x3f, 0x26, 0x3f, 0x6d, 0x86, 0xdb, 0x4f, 0x66,
+            0x00, 0x00, 0x07, 0x3f, 0x00]))
+
+    def test_values_out_of_the_tables_are_encoded_too(self):
+        packet = bytearray(14)
+        Encoder().encode(
+            Data(timestamp=(123, 5), home_score=250, guest_score=-1), packet)
+        self.assertEqual(packet[1:13], bytearray([
+            0x3f, 0x06, 0x6d, 0x3f, 0x5b, 0x4f, 0x3f, 0x6d,
+            0x00, 0x00, 0x6f, 0x3f]))
+
+    def test_changed_groups_only_are_encoded(self):
+        sequence = [
+            Data(),
+            Data(timestamp=(0, 1), dot=True),
+            Data(timestamp=(0, 1), home_score=1, home_seventh_foul=True),
+            Data(timestamp=(10, 1), guest_set=2, guest_first_timeout=True),
+            Data(timestamp=(10, 1), leading_zero_in_minute=True, siren=True),
+            Data(timestamp=(9, 59), leading_zero_in_minute=True),
+            Data(timestamp=(9, 59), home_score=120, guest_score=99),
+        ]
+        encoder = Encoder()
+        packet = bytearray(14)
+        for data in sequence:
+            encoder.encode(data, packet)
+            expected = bytearray(14)
+            Encoder().encode(data, expected)
+            self.assertEqual(packet, expected)
+
+
+    def test_other_layouts(self):
+        layout = Layout(
+            16,
+            [
+                ('home_score', [1, 2, 3, 4], 'score'),
+                ('minute', [6, 7], 'minute'),
+                ('second', [8, 9], 'second'),
+                ('guest_score', [14, 12, 13], 'score'), # not contiguous
+                ('guest_set', [16], 'digit'),
+            ],
+            [('siren', 5, 0x80), ('guest_seventh_foul', 16, 0x80)])
+        packet = bytearray(18)
+        Encoder(layout).encode(
+            Data(
+                timestamp=(4, 5),
+                home_score=1234,
+                guest_score=12,
+                guest_set=3,
+                guest_seventh_foul=True,
+                siren=True),
+            packet)
+        font = Font()
+        self.assertEqual(packet[1:5], font.encode('1234'))
+        self.assertEqual(packet[5], 0x80 | font.encode(' '))
+        self.assertEqual(packet[6:10], font.encode(' 405'))
+        self.assertEqual(packet[12:15], font.encode('12 '))
+        self.assertEqual(packet[16], 0x80 | font.encode('3'))
+
+    def test_layout_is_checked(self):
+        self.assertRaises(ValueError, Layout, 17, [], [])
+        self.assertRaises(
+            ValueError, Layout, 12, [('timestamp', [1], 'digit')], [])
+
+
+class TestFont(unittest.TestCase):
+
+    def setUp(self):
+        self.font = Font()
+
+    def test_encode(self):
+        self.assertEqual(self.font.encode('0'), 0x3f)
+        self.assertEqual(
+            self.font.encode('Ab1 '), bytearray([0x77, 0x7c, 0x06, 0x00]))
+
+    def test_unknown_characters_are_encoded_as_blanks(self):
+        self.assertEqual(
+            self.font.encode(u'\t\xe8\u20ac'), bytearray([0x00, 0x00, 0x00]))
+
+    def test_encoding_table_matches_the_font(self):
+        for code in range(32, 127):
+            self.assertEqual(
+                self.font.encode(chr(code) * 2)[0], self.font.encode(chr(code)))
+
+    def test_decode(self):
+        self.assertEqual(
+            self.font.decode(self.font.encode('0123456789 -')),
+            '0123456789 -')
+        self.assertEqual(self.font.decode(bytearray([0x86, 0xdb])), '12')
+        self.assertEqual(self.font.decode(self.font.encode('SOS')), '505')
+        self.assertEqual(self.font.decode(bytearray([0x03])), u'\xbf')
+
+
+class TestScrollingText(unittest.TestCase):
+
+    def setUp(self):
+        self.font = Font()
+        self.text = ScrollingText()
+        self.text.show('AB', 100)
+        self.start = self.text._bulletin[2]
+
+    def window(self, now):
+        packet = bytearray(14)
+        self.text.transform(packet, now)
+        return packet[5:9]
+
+    def test_window_position_depends_on_time_only(self):
+        self.assertEqual(self.window(self.start), self.font.encode('    '))
+        self.assertEqual(self.window(self.start + 0.35), self.font.encode(' AB '))
+        self.assertEqual(self.window(self.start + 0.45), self.font.encode('AB  '))
+        self.assertEqual(self.window(self.start + 0.65), self.font.encode('    '))
+        # back to the start
+        self.assertEqual(self.window(self.start + 0.75), self.font.encode('    '))
+        self.assertEqual(self.window(self.start + 0.85), self.font.encode('   A'))
+
+    def test_next_deadline_is_the_next_step(self):
+        self.assertAlmostEqual(
+            self.text.next_deadline(self.start + 0.25), self.start + 0.3)
+
+    def test_delay_must_be_positive(self):
+        self.assertRaises(ValueError, self.text.show, 'AB', 0)
+        # the text shown is left alone
+        self.assertEqual(self.window(self.start + 0.35), self.font.encode(' AB '))
+
+    def test_hidden_text_leaves_the_packet_alone(self):
+        self.text.hide()
+        self.assertFalse(self.text.is_active())
+        self.assertEqual(self.text.next_deadline(self.start), None)
+        self.assertEqual(self.window(self.start), bytearray(4))
+
+
+class TestSiren(unittest.TestCase):
+
+    def setUp(self):
+        self.siren = Siren()
+
+    def siren_bit(self, now, packet=None):
+        packet = packet or bytearray(14)
+        self.siren.transform(packet, now)
+        return packet[5] & 0x80
+
+    def test_siren_follows_the_pattern(self):
+        self.siren.sound(Siren.DOUBLE_BLAST, 10)
+        self.assertTrue(self.siren_bit(10))
+        self.assertFalse(self.siren_bit(10.6))
+        self.assertTrue(self.siren_bit(10.8))
+        self.assertFalse(self.siren_bit(11.3))
+        # the packet bit is left alone once played
+        self.assertTrue(self.siren_bit(11.3, bytearray([0] * 5 + [0x80] * 9)))
+
+    def test_next_deadline_is_the_next_change(self):
+        self.siren.sound(Siren.DOUBLE_BLAST, 10)
+        self.assertAlmostEqual(self.siren.next_deadline(10), 10.5)
+        self.assertAlmostEqual(self.siren.next_deadline(10.5), 10.8)
+        self.assertEqual(self.siren.next_deadline(11.3), None)
+
+    def test_on_time_is_measured_on_the_acknowledgments(self):
+        on = bytearray([0] * 5 + [0x80] + [0] * 8)
+        self.siren.acknowledged(bytearray(14), 9)
+        self.siren.acknowledged(on, 10.002)
+        self.siren.acknowledged(on, 10.5)
+        self.siren.acknowledged(bytearray(14), 11.004)
+        self.assertEqual(len(self.siren.on_times), 1)
+        self.assertAlmostEqual(self.siren.on_times[0], 1.002)
+
+
+class TestBlink(unittest.TestCase):
+
+    def test_displays_are_blanked_half_of_the_time(self):
+        blink = Blink([3, 4], period=1.)
+        blink._start = 10
+        packet = bytearray([0x02] + [0xff] * 12 + [0x03])
+        blink.transform(packet, 10.4)
+        self.assertEqual(packet[3:5], bytearray([0xff] * 2))
+        blink.transform(packet, 10.6)
+        self.assertEqual(packet[2:6], bytearray([0xff, 0x80, 0x80, 0xff]))
+        self.assertAlmostEqual(blink.next_deadline(10.6), 11)
+
+
+class TestFilterChain(unittest.TestCase):
+
+    def test_filters_cant_share_bits(self):
+        chain = FilterChain([ScrollingText(), Siren()])
+        self.assertRaises(ValueError, chain.add, Blink([6]))
+        chain.add(Blink([1, 2]))
+        self.assertEqual(len(list(chain)), 3)
+
+    def test_inactive_filters_are_skipped(self):
+        chain = FilterChain([ScrollingText(), Siren()])
+        packet = bytes(bytearray(14))
+        self.assertEqual(chain.apply(packet, bytearray(14), 0), None)
+        self.assertEqual(chain.next_deadline(0), None)
+        self.assertEqual([i.call_count for i in chain.timings()], [0, 0])
+
+    def test_filter_timings(self):
+        text = ScrollingText()
+        chain = FilterChain([text, Siren()])
+        text.show('ABC', 100)
+        for i in range(3):
+            chain.apply(bytes(bytearray(14)), bytearray(14), 0)
+        text_timing, siren_timing = chain.timings()
+        self.assertEqual(text_timing.name, 'ScrollingText')
+        self.assertEqual(text_timing.call_count, 3)
+        self.assertTrue(0 <= text_timing.average <= text_timing.max)
+        self.assertEqual(siren_timing, FilterTiming('Siren', 0, None, None))
+
+    def test_scrolling_text_leaves_the_siren_alone(self):
+        text = ScrollingText()
+        siren = Siren()
+        chain = FilterChain([text, siren])
+        text.show('ABC', 100)
+        siren.sound(Siren.LONG_BLAST, text._bulletin[2])
+        packet = chain.apply(
+            bytes(bytearray(14)), bytearray(14), text._bulletin[2] + 0.5)
+        self.assertTrue(packet[5] & 0x80)
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_empty_histogram_has_no_percentiles(self):
+        self.assertEqual(
+            Histogram().round_trip(), RoundTrip(0, None, None, None, None))
+
+    def test_percentiles_are_approximated_from_above(self):
+        histogram = Histogram()
+        for i in range(1, 101):
+            histogram.add(i * 0.001)
+        round_trip = histogram.round_trip()
+        self.assertEqual(round_trip.count, 100)
+        self.assertEqual(round_trip.max, 0.1)
+        for value, expected in [
+                (round_trip.p50, 0.05),
+                (round_trip.p95, 0.095),
+                (round_trip.p99, 0.099)]:
+            self.assertTrue(expected <= value <= expected * 1.13)
+
+    def test_out_of_range_times_are_counted(self):
+        histogram = Histogram()
+        histogram.add(0)
+        histogram.add(60)
+        self.assertTrue(histogram.percentile(50) < Histogram._MIN_TIME * 1.13)
+        self.assertEqual(histogram.percentile(100), 60)
+
+
+class TestSlidingWindow(unittest.TestCase):
+
+    def test_rate_covers_the_last_seconds_only(self):
+        window = SlidingWindow(10)
+        for i in range(10):
+            window.add(100.5 + i * 0.05, True)
+        window.add(101.5, False)
+        window.add(102.5, True)
+        self.assertEqual(window.rate(3, 102.5), Rate(3, 11 / 2.5, 100 / 12.))
+        self.assertEqual(window.rate(2, 102.5), Rate(2, 1 / 1.5, 50.))
+        self.assertEqual(window.rate(2, 112.5), Rate(2, 0, 0))
+        self.assertEqual(window.rate(5, 102.5), Rate(5, 11 / 2.5, 100 / 12.))
+
+
+class TestLink(unittest.TestCase):
+
+    def setUp(self):
+        self.blank = bytes(bytearray([0x02] + [0x00] * 12 + [0x03]))
+        self.packets = [
+            bytes(bytearray([0x02] + [i] * 12 + [0x03])) for i in range(1, 6)]
+
+    def test_nothing_to_send_until_a_packet_is_submitted(self):
+        link = Link(LegacyProtocol(), self.blank)
+        self.assertEqual(link.next_frame(0), None)
+        self.assertFalse(link.is_waiting())
+
+    def test_acknowledged_packet_is_not_sent_again(self):
+        link = Link(LegacyProtocol(), self.blank)
+        link.submit(self.packets[0])
+        self.assertEqual(link.next_frame(0), self.packets[0])
+        self.assertEqual(link.next_frame(0), None)
+        link.receive(bytearray([LegacyProtocol.ACK]), 0)
+        self.assertEqual(link.sent_packet_count, 1)
+        self.assertFalse(link.is_waiting())
+        self.assertEqual(link.next_frame(0), None)
+
+    def test_latest_packet_wins(self):
+        link = Link(LegacyProtocol(), self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.submit(self.packets[1])
+        link.submit(self.packets[2])
+        self.assertEqual(link.next_frame(0), None) # stop-and-wait
+        link.receive(bytearray([LegacyProtocol.ACK]), 0)
+        self.assertEqual(link.next_frame(0), self.packets[2])
+
+    def test_rejected_packet_is_retransmitted_later(self):
+        link = Link(LegacyProtocol(), self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.receive(bytearray([LegacyProtocol.NAK]), 0)
+        self.assertEqual(link.bad_packet_count, 1)
+        self.assertEqual(link.next_frame(0), None)
+        self.assertEqual(link.next_deadline(0), Link._RETRY_DELAY)
+        self.assertEqual(
+            link.next_frame(Link._RETRY_DELAY), self.packets[0])
+
+    def test_newer_packet_is_not_delayed_by_a_retransmission(self):
+        link = Link(LegacyProtocol(), self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.receive(bytearray([LegacyProtocol.NAK]), 0)
+        link.submit(self.packets[1])
+        self.assertEqual(link.next_frame(0), self.packets[1])
+
+    def test_missing_response_means_lost_packet(self):
+        link = Link(LegacyProtocol(), self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.expire(0.01)
+        self.assertTrue(link.is_waiting())
+        link.expire(LegacyProtocol.ack_timeout)
+        self.assertFalse(link.is_waiting())
+        self.assertEqual(link.lost_packet_count, 1)
+
+    def test_acknowledged_packet_is_kept_alive_as_full_frame(self):
+        link = Link(LegacyProtocol(delta=True), self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.receive(bytearray([LegacyProtocol.ACK]), 0)
+        self.assertEqual(link.next_deadline(0), Link._KEEP_ALIVE)
+        self.assertEqual(link.next_frame(0.5), None)
+        self.assertEqual(link.next_frame(Link._KEEP_ALIVE), self.packets[0])
+
+    def test_silent_board_makes_the_link_unresponsive(self):
+        link = Link(LegacyProtocol(), self.blank)
+        link.submit(self.packets[0])
+        now = 0
+        for i in range(Link._MAX_UNANSWERED):
+            self.assertFalse(link.is_unresponsive())
+            self.assertEqual(link.next_frame(now), self.packets[0])
+            now += LegacyProtocol.ack_timeout
+            link.expire(now)
+            now += Link._RETRY_DELAY
+        self.assertTrue(link.is_unresponsive())
+        link.receive(bytearray([LegacyProtocol.NAK]), now)
+        self.assertFalse(link.is_unresponsive())
+
+    def test_booting_board_does_not_make_the_link_unresponsive(self):
+        link = Link(LegacyProtocol(), self.blank, boot_time=2.)
+        link.opened(0)
+        link.submit(self.packets[0])
+        now = 0
+        while now + LegacyProtocol.ack_timeout < 2.:
+            self.assertFalse(link.is_unresponsive())
+            link.next_frame(now)
+            now += LegacyProtocol.ack_timeout
+            link.expire(now)
+            now += Link._RETRY_DELAY
+        self.assertTrue(link.lost_packet_count >= Link._MAX_UNANSWERED)
+        for i in range(Link._MAX_UNANSWERED):
+            self.assertFalse(link.is_unresponsive())
+            link.next_frame(now)
+            now += LegacyProtocol.ack_timeout
+            link.expire(now)
+            now += Link._RETRY_DELAY
+        self.assertTrue(link.is_unresponsive())
+
+    def test_reset_resends_the_current_packet_as_full_frame(self):
+        link = Link(LegacyProtocol(delta=True), self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.receive(bytearray([LegacyProtocol.ACK]), 0)
+        link.submit(self.packets[1])
+        link.next_frame(0)
+        link.reset(0)
+        self.assertFalse(link.is_waiting())
+        self.assertEqual(link.reconnection_count, 1)
+        self.assertEqual(link.next_frame(0), self.packets[1])
+
+    def test_windowed_protocol_pipelines_frames(self):
+        protocol = WindowedProtocol(window=2)
+        link = Link(protocol, self.blank)
+        frames = []
+        for packet in self.packets[:3]:
+            link.submit(packet)
+            frames.append(link.next_frame(0))
+        self.assertEqual(frames[0], protocol.frame(0, self.packets[0]))
+        self.assertEqual(frames[1], protocol.frame(1, self.packets[1]))
+        self.assertEqual(frames[2], None) # window is full
+        link.receive(bytearray([protocol.ACK, 0]), 0)
+        self.assertEqual(link.next_frame(0), protocol.frame(2, self.packets[2]))
+
+    def test_windowed_responses_are_matched_by_sequence(self):
+        protocol = WindowedProtocol(window=3)
+        link = Link(protocol, self.blank)
+        for packet in self.packets[:3]:
+            link.submit(packet)
+            link.next_frame(0)
+        # the response to the first frame got lost, the second was rejected
+        link.receive(bytearray([protocol.NAK, 1, protocol.ACK]), 0)
+        self.assertEqual(link.lost_packet_count, 1)
+        self.assertEqual(link.bad_packet_count, 1)
+        self.assertEqual(link.sent_packet_count, 0)
+        link.receive(bytearray([2]), 0)
+        self.assertEqual(link.sent_packet_count, 1)
+        self.assertFalse(link.is_waiting())
+        self.assertEqual(link.next_frame(0), None)
+
+    def test_unknown_sequence_is_an_unexpected_error(self):
+        protocol = WindowedProtocol()
+        link = Link(protocol, self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.receive(bytearray([protocol.ACK, 7, 0x55]), 0)
+        self.assertEqual(link.unexpected_error_count, 2)
+        self.assertTrue(link.is_waiting())
+
+    def test_filters_are_applied_to_the_submitted_packet(self):
+        text = ScrollingText()
+        link = Link(LegacyProtocol(), self.blank, [text])
+        link.submit(self.packets[0])
+        text.show('', 100)
+        start = text._bulletin[2]
+        self.assertEqual(link.next_deadline(start), start + 0.1)
+        frame = bytearray(link.next_frame(start))
+        self.assertEqual(frame[5:9], bytearray(4))
+        self.assertEqual(frame[9:13], bytearray(self.packets[0][9:13]))
+        link.receive(bytearray([LegacyProtocol.ACK]), start)
+        self.assertEqual(link.next_frame(start + 0.05), None)
+        text.hide()
+        self.assertEqual(link.next_frame(start + 0.05), self.packets[0])
+
+    def test_delta_frames_are_sent_once_synchronized(self):
+        protocol = LegacyProtocol(delta=True)
+        link = Link(protocol, self.blank)
+        link.submit(self.packets[0])
+        self.assertEqual(link.next_frame(0), self.packets[0])
+        link.receive(bytearray([protocol.ACK]), 0)
+        packet = bytearray(self.packets[0])
+        packet[3] = packet[12] = 0x7f
+        link.submit(bytes(packet))
+        self.assertEqual(
+            link.next_frame(0),
+            bytes(bytearray([protocol.SO, 0x04, 0x08, 0x7f, 0x7f, protocol.ETX])))
+
+    def test_full_frame_is_sent_after_a_rejected_delta_frame(self):
+        protocol = LegacyProtocol(delta=True)
+        link = Link(protocol, self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.receive(bytearray([protocol.ACK]), 0)
+        packet = bytearray(self.packets[0])
+        packet[1] = 0x7f
+        link.submit(bytes(packet))
+        self.assertTrue(protocol.is_delta(link.next_frame(0)))
+        link.receive(bytearray([protocol.NAK]), 0)
+        self.assertEqual(link.next_frame(1), bytes(packet))
+
+    def test_windowed_delta_frames_are_based_on_the_previous_frame(self):
+        protocol = WindowedProtocol(delta=True)
+        link = Link(protocol, self.blank)
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.receive(bytearray([protocol.ACK, 0]), 0)
+        first = bytearray(self.packets[0])
+        first[1] = 0x7f
+        link.submit(bytes(first))
+        link.next_frame(0)
+        second = bytearray(first)
+        second[2] = 0x7f
+        link.submit(bytes(second))
+        self.assertEqual(
+            link.next_frame(0),
+            bytes(bytearray([protocol.SI, 2, 0x02, 0x00, 0x7f, protocol.ETX])))
+
+    def test_shown_packet_is_the_submitted_one(self):
+        link = Link(LegacyProtocol(), self.blank, [ScrollingText()])
+        packet = bytes(bytearray(self.packets[0]))
+        link.submit(packet)
+        link.next_frame(0)
+        self.assertEqual(link.shown_packet, None)
+        link.receive(bytearray([LegacyProtocol.ACK]), 0)
+        self.assertTrue(link.shown_packet is packet)
+        # nothing to send, thus shown right away
+        same_packet = bytes(bytearray(packet))
+        link.submit(same_packet)
+        self.assertEqual(link.next_frame(0), None)
+        self.assertTrue(link.shown_packet is same_packet)
+
+    def test_statistics(self):
+        link = Link(WindowedProtocol(), self.blank)
+        for i, packet in enumerate(self.packets[:3]):
+            link.submit(packet)
+            link.next_frame(i * 0.001)
+        link.receive(bytearray([WindowedProtocol.ACK, 0]), 0.002)
+        link.receive(bytearray([WindowedProtocol.NAK, 1]), 0.003)
+        link.expire(1)
+        statistics = link.statistics(1)
+        self.assertEqual(statistics.sent_packet_count, 1)
+        self.assertEqual(statistics.bad_packet_count, 1)
+        self.assertEqual(statistics.lost_packet_count, 1)
+        self.assertEqual(statistics.round_trip.count, 1)
+        self.assertTrue(0.002 <= statistics.round_trip.p50 <= 0.0023)
+        self.assertEqual(
+            [i.loss_percentage for i in statistics.rates], [200 / 3.] * 2)
+
+    def test_governor_coalesces_the_minor_changes(self):
+        link = Link(WindowedProtocol(), self.blank, governor=Governor(10.))
+        clock = bytearray(self.packets[0])
+        link.submit(bytes(clock))
+        link.next_frame(0)
+        link.receive(bytearray([WindowedProtocol.ACK, 0]), 0.005)
+        for tenths in range(1, 4):
+            clock[8] = 0x40 | tenths # the clock only
+            link.submit(bytes(clock))
+            self.assertEqual(link.next_frame(0.01 * tenths), None)
+        self.assertEqual(link.next_deadline(0.03), 0.1)
+        self.assertEqual(link.next_frame(0.1)[-13:], bytes(clock[1:]))
+        self.assertEqual(link.saved_frame_count, 2)
+
+    def test_governor_does_not_hold_back_the_score_and_the_siren(self):
+        link = Link(WindowedProtocol(), self.blank, governor=Governor(10.))
+        packet = bytearray(self.packets[0])
+        link.submit(bytes(packet))
+        link.next_frame(0)
+        packet[3] = 0x06 # the home score
+        link.submit(bytes(packet))
+        self.assertNotEqual(link.next_frame(0.01), None)
+        packet[5] = 0x80 # the siren
+        link.submit(bytes(packet))
+        self.assertNotEqual(link.next_frame(0.02), None)
+        self.assertEqual(link.saved_frame_count, 0)
+
+    def test_siren_is_sounded_at_the_pattern_deadlines(self):
+        siren = Siren()
+        link = Link(LegacyProtocol(), self.blank, [siren])
+        link.submit(self.packets[0])
+        link.next_frame(0)
+        link.receive(bytearray([LegacyProtocol.ACK]), 0.002)
+        siren.sound(Siren.LONG_BLAST, 0.1)
+        self.assertEqual(link.next_deadline(0.05), 0.1)
+        self.assertTrue(link.next_frame(0.1)[5] & 0x80)
+        link.receive(bytearray([LegacyProtocol.ACK]), 0.102)
+        self.assertEqual(link.next_deadline(0.102), 1.1)
+        self.assertFalse(link.next_frame(1.1)[5] & 0x80)
+        link.receive(bytearray([LegacyProtocol.ACK]), 1.102)
+        self.assertEqual(list(siren.on_times), [1.])
+
+    def test_delta_frame_is_not_used_when_longer_than_a_full_frame(self):
+        protocol = LegacyProtocol(delta=True)
+        self.assertEqual(
+            protocol.frame(0, self.packets[1], self.packets[0]),
+            self.packets[1])
+
+
+class TestTransmitter(unittest.TestCase):
+
+    def setUp(self):
+        from emulator import Emulator
+        self.emulator = Emulator(response_delay=0.002, boot_time=1.5)
+        self.emulator.start()
+        self.blank = bytes(bytearray(
+            [LegacyProtocol.STX] + [0] * 12 + [LegacyProtocol.ETX]))
+        self.packet = bytes(bytearray(
+            [LegacyProtocol.STX] + [1] * 12 + [LegacyProtocol.ETX]))
+
+    def tearDown(self):
+        self.emulator.close()
+
+    def test_slow_booting_board_gets_connected(self):
+        emulator = self.emulator
+        class RebootingPort(serial.Serial):
+            # the board restarts whenever the port is opened, as the Arduino
+            # does when DTR is raised
+            def open(self):
+                serial.Serial.open(self)
+                emulator.reset()
+        port = RebootingPort(timeout=LegacyProtocol.read_timeout)
+        port.port = emulator.device_name
+        link = Link(LegacyProtocol(), self.blank)
+        transmitter = Transmitter(port, link)
+        transmitter.submit(self.packet)
+        deadline = monotonic() + 4.
+        while not link.sent_packet_count and monotonic() < deadline:
+            time.sleep(0.05)
+        transmitter.close()
+        port.close()
+        self.assertTrue(link.sent_packet_count > 0)
+        self.assertEqual(link.reconnection_count, 0)
+        self.assertEqual(bytes(emulator.display), self.packet[1:-1])
+
+
+class TestScoreboard(unittest.TestCase):
+
+    def setUp(self):
+        from emulator import Emulator
+        self.emulator = Emulator(response_delay=0.002)
+        self.emulator.start()
+
+    def tearDown(self):
+        self.emulator.close()
+
+    def test_missing_device_is_reported(self):
+        self.assertRaises(
+            serial.SerialException,
+            Scoreboard,
+            '{},/dev/nonexistent'.format(self.emulator.device_name))
+
+    def test_data_is_shown(self):
+        board = Scoreboard(self.emulator.device_name)
+        board.update(Data(home_score=12))
+        deadline = monotonic() + 1.
+        while not board.sent_packet_count and monotonic() < deadline:
+            time.sleep(0.01)
+        board.close()
+        self.assertTrue(board.sent_packet_count > 0)
+        self.assertEqual(board.reconnection_count, 0)
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        from emulator import Emulator
+        self.emulator = Emulator(response_delay=0.002)
+        self.emulator.start()
+        # a port nobody answers on
+        self.master, self.slave = os.openpty()
+        self.silent_port = os.ttyname(self.slave)
+        fd, self.cache_path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        self.emulator.close()
+        os.close(self.master)
+        os.close(self.slave)
+        os.remove(self.cache_path)
+
+    def test_the_answering_port_is_found(self):
+        start = monotonic()
+        name = discover_port(
+            ['/dev/nonexistent', self.silent_port, self.emulator.device_name],
+            timeout=1)
+        self.assertEqual(name, self.emulator.device_name)
+        self.assertTrue(monotonic() - start < 0.5)
+
+    def test_the_search_is_bounded_in_time(self):
+        start = monotonic()
+        self.assertEqual(discover_port([self.silent_port], timeout=0.3), None)
+        self.assertTrue(monotonic() - start < 0.5)
+
+    def test_the_port_found_is_cached(self):
+        candidates = [self.silent_port, self.emulator.device_name]
+        discover_port(candidates, timeout=1, cache_path=self.cache_path)
+        self.assertEqual(
+            _read_cached_port(self.cache_path), self.emulator.device_name)
+        self.emulator.frame_count = 0
+        discover_port(candidates, timeout=1, cache_path=self.cache_path)
+        self.assertEqual(self.emulator.frame_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,9 @@
 
 import unittest
 
-import game
 import chrono
+import clock
+import game
 
 
 def render_timestamp(timestamp, config):
@@ -211,22 +212,8 @@ class TestTeamStats(unittest.TestCase):
             ' 10                X       '])
 
 
-class TestStopwatch(object):
-
-    def __init__(self):
-        self._minute = 0
-        self._second = 0
-
-    def now(self):
-        return self._minute, self._second, 0
-
-    def set(self, minute, second):
-        self._minute = minute
-        self._second = second
-
-
 if __name__ == '__main__':
-    stopwatch = TestStopwatch()
+    stopwatch = clock.Stopwatch(clock.VirtualClock())
     match = game.Game(game.ChampionshipGameCourse(25), stopwatch)
     stopwatch.set(0, 0)
     match.phase_expired() # entering first half
@@ -0,0 +1,324 @@
+#!/usr/bin/python
+# -*- coding: utf8 -*-
+
+"""Binary traces of the scoreboard serial traffic.
+
+A trace records every frame sent to the boards and every response byte,
+along with the time; it is a ring buffer of fixed size records in a file,
+so it never grows beyond the capacity given, the oldest records being
+overwritten first:
+
+    board = Scoreboard(device_name, recorder=Recorder('match.trace'))
+
+Run `python wiretrace.py dump match.trace` to print a trace and
+`python wiretrace.py replay match.trace DEVICE` to send the frames
+recorded to a (real or emulated) board again. Requires python 3."""
+
+import argparse
+import collections
+import mmap
+import os
+import serial
+import struct
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from scoreboard import Font
+from scoreboard import LegacyProtocol
+from scoreboard import WindowedProtocol
+from scoreboard import monotonic
+
+# record kinds
+SENT = 0 # a frame written to the port
+RECEIVED = 1 # the bytes read from the port
+RESET = 2 # the port has been reopened
+FAILED = 3 # an I/O error occurred
+
+_KIND_NAMES = ['sent', 'received', 'reset', 'failed']
+
+_MAGIC = b'SBTR'
+_VERSION = 1
+# magic, version, record size, capacity, records written
+_HEADER = struct.Struct('<4sHHIQ12x')
+# time, port, kind, data length, data
+_RECORD = struct.Struct('<dBBB21s')
+_MAX_DATA_LENGTH = 21
+
+Record = collections.namedtuple('Record', ['time', 'port', 'kind', 'data'])
+
+
+class Recorder(object):
+    """Writes a trace, that is memory mapped: recording takes no system call.
+
+    An existing trace of the same capacity is appended to, any other file is
+    overwritten. The records are timestamped with the wall clock time; the
+    ports can be recorded from different threads."""
+
+    def __init__(self, path, capacity=1000000):
+        self._capacity = capacity
+        size = _HEADER.size + capacity * _RECORD.size
+        self._count = _read_count(path, capacity)
+        with open(path, 'r+b' if self._count is not None else 'w+b') as file:
+            file.truncate(size)
+            self._map = mmap.mmap(file.fileno(), size)
+        if self._count is None:
+            self._count = 0
+            self._write_header()
+        self._lock = threading.Lock()
+        self._clock_offset = time.time() - monotonic()
+
+    def port(self, index):
+        """Return the recorder of the link of the `index`-th port."""
+        return PortRecorder(self, index)
+
+    def record(self, port, now, kind, data=b''):
+        now += self._clock_offset
+        with self._lock:
+            # long responses take several records
+            for i in range(0, max(1, len(data)), _MAX_DATA_LENGTH):
+                chunk = bytes(data[i:i + _MAX_DATA_LENGTH])
+                _RECORD.pack_into(
+                    self._map,
+                    _HEADER.size
+                        + (self._count % self._capacity) * _RECORD.size,
+                    now, port, kind, len(chunk), chunk)
+                self._count += 1
+            self._write_header()
+
+    def close(self):
+        self._map.close()
+
+    def _write_header(self):
+        _HEADER.pack_into(
+            self._map, 0,
+            _MAGIC, _VERSION, _RECORD.size, self._capacity, self._count)
+
+
+def _read_count(path, capacity):
+    """Return the records written in the trace, None if it can't be used."""
+    try:
+        with open(path, 'rb') as file:
+            header = file.read(_HEADER.size)
+        magic, version, record_size, trace_capacity, count = \
+            _HEADER.unpack(header)
+    except (EnvironmentError, struct.error):
+        return None
+    if (magic, version, record_size, trace_capacity) \
+            != (_MAGIC, _VERSION, _RECORD.size, capacity):
+        return None
+    return count
+
+
+class PortRecorder(object):
+    """Records the traffic of a link, see `scoreboard.Link`."""
+
+    def __init__(self, recorder, port):
+        self._recorder = recorder
+        self._port = port
+
+    def sent(self, now, frame):
+        self._recorder.record(self._port, now, SENT, frame)
+
+    def received(self, now, data):
+        self._recorder.record(self._port, now, RECEIVED, data)
+
+    def reset(self, now):
+        self._recorder.record(self._port, now, RESET)
+
+    def failed(self, now):
+        self._recorder.record(self._port, now, FAILED)
+
+
+class Trace(object):
+    """Reads a trace, that is memory mapped: only the records actually read
+    are loaded from disk."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self._capacity, self._count = \
+            _HEADER.unpack_from(self._map)
+        if (magic, version, record_size) \
+                != (_MAGIC, _VERSION, _RECORD.size):
+            self._map.close()
+            raise ValueError('{} is not a scoreboard trace'.format(path))
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    def __iter__(self):
+        """Iterate over the `Record`s, the oldest first."""
+        for time_, port, kind, length, data in self.raw_records():
+            yield Record(time_, port, kind, data[:length])
+
+    def raw_records(self):
+        """Iterate over the records as tuples (time, port, kind, length,
+        data); the data is padded to the record size. Faster than `iter`."""
+        records = memoryview(self._map)[_HEADER.size:]
+        records = records[:len(self) * _RECORD.size]
+        start = (self._count % self._capacity) * _RECORD.size \
+            if self._count > self._capacity else 0
+        for segment in (records[start:], records[:start]):
+            for record in _RECORD.iter_unpack(segment):
+                yield record
+
+    def close(self):
+        self._map.close()
+
+
+def _describe(record, font):
+    text = ''
+    if record.kind == SENT:
+        start = bytearray(record.data[:1])
+        if start in (bytearray([LegacyProtocol.STX]),
+                bytearray([WindowedProtocol.SOH])):
+            text = '[{}]'.format(font.decode(record.data[-13:-1]))
+        else:
+            text = '(delta)'
+    return '{}.{:06d} {:>2} {:<8} {:<34} {}'.format(
+        time.strftime('%H:%M:%S', time.localtime(record.time)),
+        int(record.time % 1 * 1000000),
+        record.port,
+        _KIND_NAMES[record.kind],
+        ' '.join('{:02x}'.format(i) for i in bytearray(record.data)),
+        text)
+
+
+def dump(args):
+    """Print the records of a trace."""
+    font = Font()
+    trace = Trace(args.trace)
+    try:
+        for record in trace:
+            if args.port is None or record.port == args.port:
+                print(_describe(record, font))
+    finally:
+        trace.close()
+
+
+def replay(args):
+    """Send the frames of a trace to a board, timed as they were sent."""
+    port = serial.Serial(args.device, 57600, timeout=0)
+    trace = Trace(args.trace)
+    protocol = None
+    sent_count = 0
+    response = bytearray()
+    try:
+        first_time = start = None
+        for time_, record_port, kind, length, data in trace.raw_records():
+            if kind != SENT or record_port != args.port:
+                continue
+            if first_time is None:
+                first_time, start = time_, monotonic()
+                protocol = LegacyProtocol()
+                if data[0] in (WindowedProtocol.SOH, WindowedProtocol.SI):
+                    protocol = WindowedProtocol()
+            if args.speed:
+                delay = start + (time_ - first_time) / args.speed \
+                    - monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            port.write(data[:length])
+            sent_count += 1
+            response.extend(port.read(port.in_waiting))
+        time.sleep(0.1) # the last responses
+        response.extend(port.read(port.in_waiting))
+    finally:
+        trace.close()
+        port.close()
+    codes = [code for code, _ in protocol.parse(response)] \
+        if protocol else []
+    print('{} frames sent, {} ACK, {} NAK'.format(
+        sent_count,
+        codes.count(LegacyProtocol.ACK),
+        codes.count(LegacyProtocol.NAK)))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest='command')
+    subparser = subparsers.add_parser('dump', help=dump.__doc__)
+    subparser.add_argument('trace')
+    subparser.add_argument('--port', type=int)
+    subparser.set_defaults(function=dump)
+    subparser = subparsers.add_parser('replay', help=replay.__doc__)
+    subparser.add_argument('trace')
+    subparser.add_argument('device')
+    subparser.add_argument('--port', type=int, default=0)
+    subparser.add_argument(
+        '--speed', type=float, default=1., help='0 for no pauses')
+    subparser.set_defaults(function=replay)
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        return
+    args.function(args)
+
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_records_are_read_back(self):
+        recorder = Recorder(self.path, capacity=10)
+        recorder.port(0).sent(1, b'\x02abc\x03')
+        recorder.port(1).received(2, b'\x06')
+        recorder.port(1).reset(3)
+        recorder.close()
+        trace = Trace(self.path)
+        records = list(trace)
+        trace.close()
+        self.assertEqual(
+            [(i.port, i.kind, i.data) for i in records],
+            [(0, SENT, b'\x02abc\x03'), (1, RECEIVED, b'\x06'),
+                (1, RESET, b'')])
+        self.assertEqual(
+            [round(i.time - records[0].time) for i in records], [0, 1, 2])
+
+    def test_oldest_records_are_overwritten(self):
+        recorder = Recorder(self.path, capacity=3)
+        for i in range(5):
+            recorder.record(0, i, SENT, bytearray([i]))
+        recorder.close()
+        trace = Trace(self.path)
+        self.assertEqual(len(trace), 3)
+        self.assertEqual([i.data for i in trace], [b'\x02', b'\x03', b'\x04'])
+        trace.close()
+
+    def test_long_data_takes_several_records(self):
+        recorder = Recorder(self.path, capacity=10)
+        recorder.record(0, 0, RECEIVED, b'x' * 50)
+        recorder.close()
+        trace = Trace(self.path)
+        self.assertEqual([len(i.data) for i in trace], [21, 21, 8])
+        trace.close()
+
+    def test_trace_is_appended_to(self):
+        for i in range(2):
+            recorder = Recorder(self.path, capacity=10)
+            recorder.record(0, i, SENT, bytearray([i]))
+            recorder.close()
+        trace = Trace(self.path)
+        self.assertEqual([i.data for i in trace], [b'\x00', b'\x01'])
+        trace.close()
+        # a different capacity means a new trace
+        Recorder(self.path, capacity=5).close()
+        trace = Trace(self.path)
+        self.assertEqual(len(trace), 0)
+        trace.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in ('dump', 'replay'):
+        main(sys.argv[1:])
+    else:
+        unittest.main()